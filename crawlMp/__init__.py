@@ -1,8 +1,17 @@
 __version__ = "0.3.7"
 
-from multiprocessing import Manager
+import sys
+from threading import Lock
+from types import ModuleType
 
-share_manager = Manager()
+# typing is not imported here, it's a large part of the bare package import time
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+    from multiprocessing.managers import SyncManager
+
+_share_manager = None  # type: Optional[SyncManager]
+_share_manager_lock = Lock()
 
 
 class CrawlException(Exception):
@@ -11,3 +20,34 @@ class CrawlException(Exception):
 
 class ActionException(Exception):
     ...
+
+
+def get_share_manager() -> 'SyncManager':
+    """
+    Get shared Manager.
+    Manager server process is spawned on the first call only, so importing crawlMp stays cheap.
+    :return SyncManager: shared manager
+    """
+    global _share_manager
+    with _share_manager_lock:
+        if _share_manager is None:
+            from multiprocessing import Manager
+            _share_manager = Manager()
+    return _share_manager
+
+
+class _Module(ModuleType):
+    """
+    crawlMp module with lazy share_manager attribute.
+    Module __getattr__ needs Python 3.7, class of the module can be replaced on 3.6 too.
+    """
+
+    @property
+    def share_manager(self) -> 'SyncManager':
+        """
+        Shared Manager, kept for code using share_manager, see get_share_manager.
+        """
+        return get_share_manager()
+
+
+sys.modules[__name__].__class__ = _Module
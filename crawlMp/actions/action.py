@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List
+
+from crawlMp import ActionException
 
 
 class Action(ABC):
@@ -24,3 +26,19 @@ class Action(ABC):
         :return Any: link
         """
         ...
+
+    def do_batch(self, links: List[Any]) -> List[Any]:
+        """
+        Execute action on a batch of links, e.g. all hits of one directory.
+        Action can reimplement it to share work among links (directories, syncs, connections).
+        Failed link has its ActionException in place of the output, other links go on.
+        :param list links: input links
+        :return list: output link or ActionException for every input link
+        """
+        outputs: List[Any] = []
+        for link in links:
+            try:
+                outputs.append(self.do(link))
+            except ActionException as exception:
+                outputs.append(exception)
+        return outputs
@@ -1,24 +1,174 @@
+import errno
 import os.path
+import shutil
+import sys
 from os import remove
-from shutil import copy, SameFileError, move
+from stat import S_IMODE
+from typing import Any, BinaryIO, List, Optional, Set
 
 from crawlMp import ActionException
 from crawlMp.actions.action import Action
 from crawlMp.snippets.mixins import TargetDir
 
+# Kernel copy paths, tried in this order, every one falls back to the next one if the file can't use it.
+# Like shutil fast-copy flags, they can be switched off for file objects which aren't backed by real files.
+USE_REFLINK = sys.platform.startswith("linux")
+USE_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
 
-class Copy(Action, TargetDir):
+# ioctl of Linux sharing extents of two files (btrfs, xfs, ...), _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# Maximum number of bytes copied by one system call
+COPY_SIZE = 2 ** 30
+
+
+def clone(src_fd: int, dst_fd: int) -> bool:
+    """
+    Make reflink copy, destination shares data extents with the source until one of them is modified.
+    :param int src_fd: source file descriptor
+    :param int dst_fd: destination file descriptor
+    :return bool: True if file was cloned, False if filesystem doesn't support reflinks
+    """
+    if not USE_REFLINK:
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+
+def copy_data(fsrc: BinaryIO, fdst: BinaryIO, size: int) -> None:
+    """
+    Copy data between files without passing it through user space, if kernel can do it.
+    copy_file_range copies within the kernel (server-side on NFS and SMB), sendfile is the older way,
+    read/write loop is the last resort. Method is changed only if it failed before copying anything.
+    :param BinaryIO fsrc: source file at position 0
+    :param BinaryIO fdst: empty destination file
+    :param int size: size of the source file, copy goes on until the end of the file anyway
+    :return: None
+    """
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    for use, copy_chunk in ((USE_COPY_FILE_RANGE, lambda: os.copy_file_range(src_fd, dst_fd, COPY_SIZE)),
+                            (USE_SENDFILE, lambda: os.sendfile(dst_fd, src_fd, None, COPY_SIZE))):
+        if not use:
+            continue
+        copied = 0
+        try:
+            while True:
+                length = copy_chunk()
+                if not length:
+                    break
+                copied += length
+        except OSError:
+            if copied:
+                raise
+            continue
+        if copied or not size:
+            return
+    shutil.copyfileobj(fsrc, fdst, 2 ** 20)
+
+
+def copy_file(src: str, dst: str, reflink: bool = True, times: bool = False, fsync: bool = False) -> None:
+    """
+    Copy content and mode of the file, reflink is tried first, then kernel copy (see copy_data).
+    Mode is set on the open destination, times too, if platform supports it.
+    :param str src: source file path
+    :param str dst: destination file path, replaced if it exists
+    :param bool reflink: try reflink copy
+    :param bool times: copy access and modification times
+    :param bool fsync: sync destination data before it's closed
+    :return: None
+    """
+    with open(src, "rb", buffering=0) as fsrc:
+        stat = os.fstat(fsrc.fileno())
+        with open(dst, "wb", buffering=0) as fdst:
+            dst_fd = fdst.fileno()
+            if not (reflink and clone(fsrc.fileno(), dst_fd)):
+                copy_data(fsrc, fdst, stat.st_size)
+            on_fd = os.chmod in os.supports_fd
+            os.chmod(dst_fd if on_fd else dst, S_IMODE(stat.st_mode))
+            if times:
+                os.utime(dst_fd if os.utime in os.supports_fd else dst, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            if fsync:
+                os.fsync(dst_fd)
+
+
+def sync_dirs(dirs: Set[str]) -> None:
+    """
+    Sync directories, so entries created in them are durable.
+    Directories can't be opened on every platform, they are not synced there.
+    :param set dirs: directory paths
+    :return: None
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    for directory in dirs:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class RelativeTarget(TargetDir):
+    """
+    Mixin class providing target path of the link.
+    Links are put to target_dir, with base_dir to their path relative to base_dir under target_dir.
+    """
+    base_dir: Optional[str] = None
+
+    def target(self, link: str) -> str:
+        """
+        Get target path of the link.
+        :param str link: input link
+        :return str: target path
+        """
+        if self.base_dir is None:
+            return os.path.join(self.target_dir, os.path.basename(link))
+        relative = os.path.relpath(link, self.base_dir)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            raise ActionException("%s is not in %s" % (link, self.base_dir))
+        return os.path.join(self.target_dir, relative)
+
+    def make_parent(self, target: str, parents: Set[str]) -> None:
+        """
+        Create parent directory of the target, every directory once per batch.
+        :param str target: target path
+        :param set parents: parent directories of the batch
+        :return: None
+        """
+        parent = os.path.dirname(target)
+        if parent not in parents:
+            os.makedirs(parent, exist_ok=True)
+            parents.add(parent)
+
+
+class Copy(Action, RelativeTarget):
     """
-    Copy file or folder.
+    Copy file.
+    Data is copied by the kernel, reflink copy is tried first (see copy_file), mode is always copied.
+    Batch of files (e.g. hits of one directory) creates every target directory once,
+    with fsync, files are synced when they are written and their directories once per batch.
     """
 
-    def __init__(self, target_dir: str, *args, **kwargs) -> None:
+    def __init__(self, target_dir: str, base_dir: Optional[str] = None, reflink: bool = True, times: bool = False,
+                 fsync: bool = False, *args, **kwargs) -> None:
         """
         :param str target_dir: target directory for a copy
+        :param str base_dir: keep path relative to base_dir under target_dir, None to copy all files to target_dir
+        :param bool reflink: try reflink copy first
+        :param bool times: copy access and modification times
+        :param bool fsync: sync copies and their directories to disk
         :param args:
         :param kwargs:
         """
         self.target_dir = target_dir
+        self.base_dir = base_dir
+        self.reflink = reflink
+        self.times = times
+        self.fsync = fsync
         super().__init__(*args, **kwargs)
 
     def do(self, link: str) -> str:
@@ -27,27 +177,63 @@ class Copy(Action, TargetDir):
         :param str link: input link
         :return str: path to copied link
         """
-        try:
-            return copy(link, self.target_dir)
-        except SameFileError:
-            # File already exists, this is valid outcome, so just return new path.
-            return os.path.join(self.target_dir, os.path.basename(link))
-        except FileNotFoundError as exception:
-            raise ActionException(exception)
+        output = self.do_batch([link])[0]
+        if isinstance(output, ActionException):
+            raise output
+        return output
+
+    def do_batch(self, links: List[str]) -> List[Any]:
+        """
+        Copy input links and return paths to copied links.
+        :param list links: input links
+        :return list: path to copied link or ActionException for every link
+        """
+        parents: Set[str] = set()
+        outputs: List[Any] = []
+        for link in links:
+            try:
+                target = self.target(link)
+                self.make_parent(target, parents)
+                try:
+                    same = os.path.samefile(link, target)
+                except FileNotFoundError:
+                    same = False
+                # Link is already the target, this is valid outcome, so just return the path.
+                if not same:
+                    copy_file(link, target, self.reflink, self.times, self.fsync)
+                outputs.append(target)
+            except ActionException as exception:
+                outputs.append(exception)
+            except OSError as exception:
+                outputs.append(ActionException(exception))
+        if self.fsync:
+            sync_dirs(parents)
+        return outputs
 
 
-class Move(Action, TargetDir):
+class Move(Action, RelativeTarget):
     """
     Move file or folder.
+    Link is renamed, if target is on the same filesystem, otherwise file is copied (see copy_file) and removed,
+    symlink is recreated and removed.
+    Existing target is never replaced.
+    Batch of links creates every target directory once, with fsync, directories are synced once per batch.
     """
 
-    def __init__(self, target_dir: str, *args, **kwargs) -> None:
+    def __init__(self, target_dir: str, base_dir: Optional[str] = None, reflink: bool = True, fsync: bool = False,
+                 *args, **kwargs) -> None:
         """
         :param str target_dir: target directory for a moved link
+        :param str base_dir: keep path relative to base_dir under target_dir, None to move all links to target_dir
+        :param bool reflink: try reflink copy first, if link is moved to other filesystem
+        :param bool fsync: sync moved files and directories to disk
         :param args:
         :param kwargs:
         """
         self.target_dir = target_dir
+        self.base_dir = base_dir
+        self.reflink = reflink
+        self.fsync = fsync
         super().__init__(*args, **kwargs)
 
     def do(self, link: str) -> str:
@@ -56,10 +242,49 @@ class Move(Action, TargetDir):
         :param str link: input link
         :return str: path to moved link
         """
-        try:
-            return move(link, self.target_dir)
-        except PermissionError as exception:
-            raise ActionException(exception)
+        output = self.do_batch([link])[0]
+        if isinstance(output, ActionException):
+            raise output
+        return output
+
+    def do_batch(self, links: List[str]) -> List[Any]:
+        """
+        Move input links and return paths to moved links.
+        :param list links: input links
+        :return list: path to moved link or ActionException for every link
+        """
+        parents: Set[str] = set()
+        outputs: List[Any] = []
+        for link in links:
+            try:
+                target = self.target(link)
+                self.make_parent(target, parents)
+                if os.path.lexists(target):
+                    raise ActionException("Destination path %s already exists" % target)
+                try:
+                    os.rename(link, target)
+                except OSError as exception:
+                    if exception.errno != errno.EXDEV:
+                        raise
+                    if os.path.islink(link):
+                        # Symlink is moved, not the file it points to
+                        os.symlink(os.readlink(link), target)
+                        remove(link)
+                    elif os.path.isdir(link):
+                        shutil.move(link, target)
+                    else:
+                        copy_file(link, target, self.reflink, True, self.fsync)
+                        remove(link)
+                if self.fsync:
+                    parents.add(os.path.dirname(os.path.abspath(link)))
+                outputs.append(target)
+            except ActionException as exception:
+                outputs.append(exception)
+            except OSError as exception:
+                outputs.append(ActionException(exception))
+        if self.fsync:
+            sync_dirs(parents)
+        return outputs
 
 
 class Remove(Action):
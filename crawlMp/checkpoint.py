@@ -0,0 +1,175 @@
+import os
+import pickle
+from collections import Counter
+from threading import Lock
+from time import time
+from typing import Any, BinaryIO, List, Optional, Tuple
+
+from crawlMp.enums import Record
+
+
+class Checkpoint:
+    """
+    Append-only log of crawl progress.
+    Log consists of pickled records, one record per submitted list of entrypoints (Record.LINKS)
+    and one per collected result batch (Record.BATCH). Batch record holds links extracted by crawls
+    of the batch together with its hits, followed and skipped links, so nothing is ever rewritten.
+    Frontier of the crawl are entrypoints and extracted links, which were neither followed nor skipped.
+    Data is flushed after every record and synced to disk at most once per sync_interval seconds.
+    Truncated last record (e.g. after host crash) is ignored.
+    """
+
+    def __init__(self, path: str, sync_interval: float = 1.0) -> None:
+        """
+        :param str path: path of the log file
+        :param float sync_interval: minimum number of seconds between two fsync calls
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self.file: Optional[BinaryIO] = None
+        self.sync_time = 0.
+        self.lock = Lock()
+
+    def open(self, resume: bool = False) -> 'Checkpoint':
+        """
+        Open log for writing.
+        :param bool resume: keep records of the previous crawl and append new records behind them
+        :return Checkpoint: self object
+        """
+        if self.file is None:
+            if resume:
+                size = self.valid_size()
+                self.file = open(self.path, "ab")
+                # Drop truncated record left by crash, new records would be unreadable behind it
+                self.file.truncate(size)
+            else:
+                self.file = open(self.path, "wb")
+        return self
+
+    def close(self) -> None:
+        """
+        Sync and close the log.
+        :return: None
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+
+    def add_links(self, links: List[Any]) -> None:
+        """
+        Append entrypoints submitted to the crawl.
+        :param list links: entrypoints
+        :return: None
+        """
+        self._append((Record.LINKS, links))
+
+    def add_batch(self, hits: List[Any], links_followed: List[Any], links_skipped: List[Any],
+                  links_extracted: List[Any]) -> None:
+        """
+        Append collected result batch.
+        :param list hits: hits
+        :param list links_followed: followed links
+        :param list links_skipped: skipped links
+        :param list links_extracted: links extracted from the followed links
+        :return: None
+        """
+        self.add_record(self.encode_batch(hits, links_followed, links_skipped, links_extracted))
+
+    @staticmethod
+    def encode_batch(hits: List[Any], links_followed: List[Any], links_skipped: List[Any],
+                     links_extracted: List[Any]) -> bytes:
+        """
+        Encode result batch as a log record.
+        Worker processes encode batches themselves, so the parent process only writes them to the log.
+        :param list hits: hits
+        :param list links_followed: followed links
+        :param list links_skipped: skipped links
+        :param list links_extracted: links extracted from the followed links
+        :return bytes: record
+        """
+        return pickle.dumps((Record.BATCH, hits, links_followed, links_skipped, links_extracted),
+                            pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def decode_batch(data: bytes) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+        """
+        Decode result batch encoded by encode_batch.
+        :param bytes data: record
+        :return tuple: (hits, links_followed, links_skipped, links_extracted)
+        """
+        return pickle.loads(data)[1:]
+
+    def _append(self, record: Tuple[Any, ...]) -> None:
+        """
+        Append record to the log.
+        :param tuple record: record
+        :return: None
+        """
+        self.add_record(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+
+    def add_record(self, data: bytes) -> None:
+        """
+        Append encoded record to the log.
+        :param bytes data: pickled record
+        :return: None
+        """
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+            now = time()
+            if now - self.sync_time >= self.sync_interval:
+                os.fsync(self.file.fileno())
+                self.sync_time = now
+
+    def records(self) -> Tuple[List[Tuple[Any, ...]], int]:
+        """
+        Read all complete records of the log.
+        :return tuple: (records, size of the complete records in bytes)
+        """
+        records, size = [], 0
+        if not os.path.exists(self.path):
+            return records, size
+        with open(self.path, "rb") as fp:
+            while True:
+                try:
+                    records.append(pickle.load(fp))
+                except (EOFError, pickle.UnpicklingError, ValueError, AttributeError, IndexError):
+                    # End of log or truncated record
+                    break
+                size = fp.tell()
+        return records, size
+
+    def valid_size(self) -> int:
+        """
+        Get size of the complete records.
+        :return int: size in bytes
+        """
+        return self.records()[1]
+
+    def load(self) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+        """
+        Load frontier and results from the log.
+        Links submitted or extracted more times are crawled more times, same as in the crawl itself.
+        :return tuple: (frontier, hits, links_followed, links_skipped)
+        """
+        links, hits, links_followed, links_skipped = [], [], [], []
+        for record in self.records()[0]:
+            if record[0] == Record.LINKS:
+                links += record[1]
+            elif record[0] == Record.BATCH:
+                hits += record[1]
+                links_followed += record[2]
+                links_skipped += record[3]
+                links += record[4]
+        done = Counter(links_followed)
+        done.update(links_skipped)
+        frontier = []
+        for link in links:
+            if done[link] > 0:
+                done[link] -= 1
+            else:
+                frontier.append(link)
+        return frontier, hits, links_followed, links_skipped
@@ -0,0 +1,429 @@
+import os
+from array import array
+from itertools import compress, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from crawlMp.enums import Header, Header_ref
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from pandas import DataFrame
+    from pyarrow import Table
+
+# Filenames are not guaranteed to be valid utf-8, undecodable bytes are kept as surrogates
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"
+
+# array typecodes and numpy dtypes of numeric header types
+TYPECODES = {float: "d", int: "q"}
+DTYPES = {"d": "float64", "q": "int64", "I": "uint32"}
+
+Column = Union[array, List[Any], 'StringColumn', 'PathColumn', 'NameColumn']
+
+
+class StringColumn:
+    """
+    Strings encoded to one buffer, row i is data[offsets[i]:offsets[i + 1]].
+    Layout is the Arrow large_string layout, so the column is exported without copying.
+    """
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def append(self, value: str) -> None:
+        self.data += value.encode(ENCODING, ERRORS)
+        self.offsets.append(len(self.data))
+
+    def extend_column(self, other: 'StringColumn') -> None:
+        """
+        Append all strings of other column, strings are not decoded.
+        :param StringColumn other: column
+        :return: None
+        """
+        base = len(self.data)
+        self.data += other.data
+        self.offsets.extend(array("q", [offset + base for offset in islice(other.offsets, 1, None)]))
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode(ENCODING, ERRORS)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        data, offsets = self.data, self.offsets
+        for index in range(len(self)):
+            yield data[offsets[index]:offsets[index + 1]].decode(ENCODING, ERRORS)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class PathColumn:
+    """
+    Paths split to the parent directory and the base name.
+    Every parent directory is stored once, rows hold its code and the base name.
+    """
+
+    def __init__(self) -> None:
+        self.dirs: List[str] = []
+        self.dir_codes: Dict[str, int] = {}
+        self.codes = array("I")
+        self.names = StringColumn()
+        # Base name of the last appended path, used by NameColumn
+        self.last_name = ""
+
+    def append(self, value: str) -> None:
+        parent, sep, name = value.rpartition(os.sep)
+        # Separator stays with the parent, so path is always rebuilt exactly
+        self.codes.append(self.dir_id(parent + sep))
+        self.names.append(name)
+        self.last_name = name
+
+    def dir_id(self, parent: str) -> int:
+        """
+        Get id of the parent directory, directory is added to the table if it's not there yet.
+        :param str parent: parent directory with trailing separator
+        :return int: directory id
+        """
+        code = self.dir_codes.get(parent)
+        if code is None:
+            code = self.dir_codes[parent] = len(self.dirs)
+            self.dirs.append(parent)
+        return code
+
+    def extend_column(self, other: 'PathColumn') -> None:
+        """
+        Append all paths of other column, directory ids of other column are mapped to ids of this one.
+        :param PathColumn other: column
+        :return: None
+        """
+        ids = [self.dir_id(parent) for parent in other.dirs]
+        self.codes.extend(array("I", [ids[code] for code in other.codes]))
+        self.names.extend_column(other.names)
+        self.last_name = other.last_name
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Directory index is rebuilt from the table, it would double the pickled directories
+        state = self.__dict__.copy()
+        del state["dir_codes"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.dir_codes = {parent: code for code, parent in enumerate(self.dirs)}
+
+    def __getitem__(self, index: int) -> str:
+        return self.dirs[self.codes[index]] + self.names[index]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        dirs = self.dirs
+        for code, name in zip(self.codes, self.names):
+            yield dirs[code] + name
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + self.names.nbytes + sum(len(d) for d in self.dirs)
+
+
+class NameColumn:
+    """
+    File names of hits, which already have PathColumn.
+    Name is almost always the base name of the path, so only names which differ are stored.
+    """
+
+    def __init__(self, paths: PathColumn) -> None:
+        """
+        :param PathColumn paths: path column of the same hits, filled before this column
+        """
+        self.paths = paths
+        self.other: Dict[int, str] = {}
+        self.size = 0
+
+    def append(self, value: str) -> None:
+        if value != self.paths.last_name:
+            self.other[self.size] = value
+        self.size += 1
+
+    def extend_column(self, other: 'NameColumn') -> None:
+        """
+        Append all names of other column, its path column must be appended to the path column of this one.
+        :param NameColumn other: column
+        :return: None
+        """
+        self.other.update((index + self.size, name) for index, name in other.other.items())
+        self.size += other.size
+
+    def __getitem__(self, index: int) -> str:
+        if index in self.other:
+            return self.other[index]
+        return self.paths.names[index]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[str]:
+        other = self.other
+        for index, name in enumerate(islice(self.paths.names, self.size)):
+            yield other.get(index, name)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(name) for name in self.other.values())
+
+
+def new_column(header: Header_ref, paths: Optional[PathColumn] = None) -> Column:
+    """
+    Build column storing values of given header.
+    :param tuple header: (Attribute name, Attribute type, Attribute unit)
+    :param PathColumn paths: path column preceding the new column
+    :return: empty column
+    """
+    name, value_type, _ = header
+    if value_type in TYPECODES:
+        return array(TYPECODES[value_type])
+    if value_type is str:
+        if name == Header.PATH:
+            return PathColumn()
+        if name == Header.NAME and paths is not None:
+            return NameColumn(paths)
+        return StringColumn()
+    return []
+
+
+class ColumnarHits:
+    """
+    Hits stored by columns instead of list of tuples.
+    Numeric columns are typed arrays, strings are encoded to a single buffer, paths reference
+    their parent directory stored once and file names are not stored twice.
+    It behaves as a list of hit tuples (+=, len, indexing, iteration), so it can replace Results.hits.
+    Pickled hits are the column buffers, workers of columnar crawl send hit batches in this form.
+    Numeric and string columns are exported to numpy, pandas and Arrow without copying.
+    While exported arrays are alive, columns can't grow (BufferError), so export finished results.
+    Deleted rows stay in the columns, marked in alive, until compact is called. Iteration and exports skip them,
+    indexing has to count alive rows then.
+    """
+
+    def __init__(self, hits_header: Tuple[Header_ref, ...], hits: Optional[Iterable[Tuple[Any, ...]]] = None) -> None:
+        """
+        :param tuple hits_header: header of the hits
+        :param hits: initial hits
+        """
+        self.hits_header = hits_header
+        self.columns: List[Column] = []
+        paths = None
+        for header in hits_header:
+            column = new_column(header, paths)
+            if isinstance(column, PathColumn) and paths is None:
+                paths = column
+            self.columns.append(column)
+        # Rows not deleted, None until the first delete
+        self.alive: Optional[bytearray] = None
+        self.deleted = 0
+        if hits is not None:
+            self.extend(hits)
+
+    def append(self, hit: Tuple[Any, ...]) -> None:
+        """
+        Add hit.
+        :param tuple hit: values in order of the header
+        :return: None
+        """
+        assert len(hit) == len(self.columns)
+        for column, value in zip(self.columns, hit):
+            column.append(value)
+        if self.alive is not None:
+            self.alive.append(1)
+
+    def extend(self, hits: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        Add hits.
+        Columns of ColumnarHits with the same header are merged without building hit tuples.
+        :param hits: hits
+        :return: None
+        """
+        if isinstance(hits, ColumnarHits) and hits.hits_header == self.hits_header and not hits.deleted:
+            for column, other in zip(self.columns, hits.columns):
+                if isinstance(column, (array, list)):
+                    column.extend(other)
+                else:
+                    column.extend_column(other)
+            if self.alive is not None:
+                self.alive += b"\1" * len(hits)
+            return
+        for hit in hits:
+            self.append(hit)
+
+    def __iadd__(self, hits: Iterable[Tuple[Any, ...]]) -> 'ColumnarHits':
+        self.extend(hits)
+        return self
+
+    def delete(self, row: int) -> None:
+        """
+        Mark row as deleted, columns are not changed until compact.
+        Row is the position in the columns, it doesn't change by deleting other rows.
+        :param int row: row in the columns
+        :return: None
+        """
+        if self.alive is None:
+            self.alive = bytearray(b"\1" * self.rows)
+        if self.alive[row]:
+            self.alive[row] = 0
+            self.deleted += 1
+
+    def compact(self) -> None:
+        """
+        Remove deleted rows from the columns, rows of remaining hits change.
+        :return: None
+        """
+        if self.deleted:
+            self.columns = ColumnarHits(self.hits_header, iter(self)).columns
+        self.alive = None
+        self.deleted = 0
+
+    def row(self, row: int) -> Tuple[Any, ...]:
+        """
+        Get hit in the row of the columns, deleted row too.
+        :param int row: row in the columns
+        :return tuple: hit
+        """
+        return tuple(column[row] for column in self.columns)
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows in the columns, deleted rows included.
+        """
+        return len(self.columns[0]) if self.columns else 0
+
+    def __len__(self) -> int:
+        return self.rows - self.deleted
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        if self.deleted:
+            return compress(zip(*self.columns), self.alive)
+        return zip(*self.columns)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Tuple[Any, ...], List[Tuple[Any, ...]]]:
+        if isinstance(index, slice):
+            if self.deleted:
+                return list(self)[index]
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("hit index out of range")
+        if self.deleted:
+            index = next(islice(compress(range(self.rows), self.alive), index, None))
+        return self.row(index)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ColumnarHits, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "%s(%d hits)" % (self.__class__.__name__, len(self))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the hits, without constant overhead of the columns.
+        """
+        size = 0
+        for column in self.columns:
+            if isinstance(column, array):
+                size += column.itemsize * len(column)
+            elif isinstance(column, list):
+                size += 8 * len(column)
+            else:
+                size += column.nbytes
+        return size + (0 if self.alive is None else len(self.alive))
+
+    def numpy(self) -> Dict[Header, 'ndarray']:
+        """
+        Get columns as numpy arrays.
+        Numeric columns are views of the typed arrays, strings are object arrays.
+        Deleted rows are filtered out, which copies the arrays.
+        numpy is imported on the first call.
+        :return dict: {Header: array}
+        """
+        import numpy as np
+        arrays = {}
+        for (name, _, _), column in zip(self.hits_header, self.columns):
+            if isinstance(column, array):
+                arrays[name] = np.frombuffer(column, dtype=DTYPES[column.typecode]) if len(column) else \
+                    np.empty(0, dtype=DTYPES[column.typecode])
+            else:
+                arrays[name] = np.array(list(column), dtype=object)
+        if self.deleted:
+            alive = np.frombuffer(self.alive, dtype=bool)
+            arrays = {name: values[alive] for name, values in arrays.items()}
+        return arrays
+
+    def dataframe(self) -> 'DataFrame':
+        """
+        Get pandas data frame of the hits, columns are the same as in Results.dataframe.
+        Numeric columns are not copied, parent directories of paths are shared by path strings.
+        pandas is imported on the first call.
+        :return DataFrame: pandas DataFrame
+        """
+        from pandas import DataFrame, MultiIndex
+        frame = DataFrame(dict(enumerate(self.numpy().values())), copy=False)
+        frame.columns = MultiIndex.from_tuples(self.hits_header)
+        return frame
+
+    def to_arrow(self) -> 'Table':
+        """
+        Get pyarrow table of the hits, columns are named by the header.
+        Numeric and string columns are not copied, paths are joined from dictionary encoded parents and names.
+        Deleted rows are filtered out, which copies the columns.
+        pyarrow is imported on the first call.
+        :return Table: pyarrow Table
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        arrays = []
+        for column in self.columns:
+            if isinstance(column, array):
+                arrays.append(pa.Array.from_buffers(pa.from_numpy_dtype(DTYPES[column.typecode]), len(column),
+                                                    [None, pa.py_buffer(column)]))
+            elif isinstance(column, StringColumn):
+                arrays.append(_arrow_strings(column))
+            elif isinstance(column, PathColumn):
+                codes = pa.Array.from_buffers(pa.uint32(), len(column), [None, pa.py_buffer(column.codes)])
+                parents = pa.DictionaryArray.from_arrays(codes, pa.array(column.dirs, type=pa.large_string()))
+                arrays.append(pc.binary_join_element_wise(parents.dictionary_decode(),
+                                                          _arrow_strings(column.names), ""))
+            else:
+                arrays.append(pa.array(list(column)))
+        table = pa.Table.from_arrays(arrays, names=[str(name) for name, _, _ in self.hits_header])
+        if self.deleted:
+            table = table.filter(pa.array([bool(alive) for alive in self.alive]))
+        return table
+
+    def to_parquet(self, path: str, **kwargs: Any) -> None:
+        """
+        Write hits to Parquet file.
+        pyarrow is imported on the first call.
+        :param str path: path of the file
+        :param kwargs: options of pyarrow.parquet.write_table
+        :return: None
+        """
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+
+def _arrow_strings(column: StringColumn) -> Any:
+    """
+    Wrap string column to Arrow large_string array without copying.
+    :param StringColumn column: column
+    :return LargeStringArray: array
+    """
+    import pyarrow as pa
+    return pa.LargeStringArray.from_buffers(len(column), pa.py_buffer(column.offsets), pa.py_buffer(column.data))
@@ -1,15 +1,23 @@
-from multiprocessing import Lock, Event
+import queue
+from multiprocessing import Event
 from threading import Thread
 from time import time
-from typing import Any, Callable, Type, List, Tuple, Optional
+from typing import Any, AsyncIterator, Callable, Iterator, Type, List, Tuple, Optional, Union, TYPE_CHECKING
 
-# Create global Process Manager
-from crawlMp import share_manager, CrawlException
+from crawlMp import CrawlException
 from crawlMp.actions.action import Action
-from crawlMp.crawlWorker import CrawlWorker
-from crawlMp.crawlers.crawler import Crawler
-from crawlMp.enums import Mode
+from crawlMp.checkpoint import Checkpoint
+from crawlMp.crawlWorker import CrawlWorkerMixin, Job
+from crawlMp.crawlers.crawler import BaseCrawler
+from crawlMp.crawlers.crawler_async import AsyncCrawler
+from crawlMp.enums import Mode, Backend
+from crawlMp.pool import CrawlPool
 from crawlMp.results import Results
+from crawlMp.scheduler import Scheduler
+from crawlMp.sinks import Sink
+
+if TYPE_CHECKING:
+    from crawlMp.watch import Hit, Watcher
 
 
 class CrawlMp:
@@ -18,43 +26,83 @@ class CrawlMp:
     If keepalive is True, crawlMp keep Workers running and waiting for new links to crawl.
     One batch is finished, after all links were crawled.
     This is useful to manage multiple searches while in keepalive loop.
+    Workers are processes by default, with Backend.THREAD they are threads of the calling process.
+    Every worker can run multiple crawling threads (num_threads), so N processes x M threads is possible.
+    AsyncCrawler is driven by asyncio event loop in every crawling thread, with bounded concurrency.
+    Workers are spawned by start() and stopped when crawl is over, unless CrawlPool is given.
+    Pool workers are already running and keep running after the crawl, which saves spawn time of short crawls.
+    With checkpoint, progress of the crawl is logged, so stopped or killed crawl can continue by resume_from.
+    With max_links, memory of the frontier is bounded, links over the limit are spilled to disk by the workers.
+    Hits can be consumed while crawling by stream/iter_hits (or astream/aiter_hits in asyncio), with backpressure.
+    With columnar, hits are collected by columns (typed arrays, encoded strings) and exported to numpy, pandas or Arrow.
+    With sink, workers write hits straight to the output file(s) (NDJSON, CSV, ...), hits never reach the parent.
+    Keepalive manager of a filesystem crawler can watch crawled directories and keep results current (watch).
     """
     stopped = False
     running = False
     batch_id = 0
 
-    def __init__(self, crawler_class: Type[Crawler], links: List[Any], keepalive: bool = False,
+    def __init__(self, crawler_class: Type[BaseCrawler], links: List[Any], keepalive: bool = False,
                  on_batch_done: Optional[Callable] = None, num_proc: int = 4, buffer_size: int = 96,
-                 actions: Optional[Tuple[Action, ...]] = None, *args: Any, **kwargs: Any) -> None:
+                 actions: Optional[Tuple[Action, ...]] = None, num_threads: int = 1,
+                 backend: Union[Backend, str] = Backend.PROCESS, pool: Optional[CrawlPool] = None,
+                 checkpoint: Optional[Union[Checkpoint, str]] = None, max_links: Optional[int] = None,
+                 spill_dir: Optional[str] = None, visited_size: int = 2 ** 20, columnar: bool = False,
+                 sink: Optional[Sink] = None, *args: Any, **kwargs: Any) -> None:
         """
         :param crawler_class: Crawler class to use with Worker
         :param list links: List of entrypoints
         :param bool keepalive: don't stop workers after crawl finishes
         :param callable on_batch_done: callback on finished batch
-        :param int num_proc: Number of processes
+        :param int num_proc: Number of workers (processes or threads, depending on backend)
         :param int buffer_size: Size of links buffer
+        :param int num_threads: Number of crawling threads per worker
+        :param backend: Backend.PROCESS or Backend.THREAD
+        :param CrawlPool pool: running pool of workers, num_proc, buffer_size, num_threads and backend are
+                               taken from the pool
+        :param checkpoint: Checkpoint or path of its log, progress of the crawl is logged there
+        :param int max_links: maximum number of links kept in memory by every crawl loop, the rest is spilled to disk
+        :param str spill_dir: directory for spilled links, system temporary directory if None
+        :param int visited_size: Capacity of the visited set shared by workers, if crawler follows symlinks,
+                                 process pool given by pool must be started with its own visited_size
+        :param bool columnar: Collect hits to ColumnarHits, which needs several times less memory than list of tuples,
+                              workers send them as column buffers with every directory once
+        :param Sink sink: Output of hits written by the workers, hits are not sent to results then
         :param args:
         :param kwargs:
         """
+        if pool is not None:
+            num_proc, buffer_size, num_threads, backend = pool.num_proc, pool.buffer_size, pool.num_threads, \
+                                                          pool.backend
         self.num_proc = num_proc
+        self.num_threads = num_threads
+        self.backend = Backend(backend)
         self.crawler_class = crawler_class
-        self.jobs_list = share_manager.list(links)
+        self.links = links
+        self.pool = pool
+        self.own_pool = pool is None
+        self.job: Optional[Job] = None
+        self.checkpoint = checkpoint
+        self._resuming = False
+        # Numbers of hits and followed links already finished by the crawler class, see finish_results
+        self._finished = (0, 0)
+        self.max_links = max_links
+        self.spill_dir = spill_dir
+        self.visited_size = visited_size
+        self.sink = sink
+        self.scheduler: Optional[Scheduler] = None
         self.keepalive = keepalive
         self.on_batch_done = on_batch_done
-        self.jobs_acquiring_lock = Lock()
         self.args = args
         self.kwargs = kwargs
-        self.workers: List[CrawlWorker] = []
+        self.workers: List[CrawlWorkerMixin] = []
         self.buffer_size = buffer_size
         self.sig_resumed = Event()
         self.sig_paused = Event()
-        self.sig_worker_idle = Event()
         self.sig_batch_done = Event()
-        self.lock_jobs_acq = Lock()
         self.actions = actions
         self.results = Results(crawler_class.hits_header(kwargs.get("mode", Mode.SIMPLE)),
-                               crawler_class.hits_header(kwargs.get("mode", Mode.SIMPLE)),
-                               shared=True)
+                               crawler_class.hits_header(kwargs.get("mode", Mode.SIMPLE)), columnar=columnar)
 
     @property
     def buffer_size(self) -> int:
@@ -65,6 +113,17 @@ class CrawlMp:
         assert new_buffer_size >= 1
         self._buffer_size = new_buffer_size
 
+    @property
+    def checkpoint(self) -> Optional[Checkpoint]:
+        return self._checkpoint
+
+    @checkpoint.setter
+    def checkpoint(self, new_checkpoint: Optional[Union[Checkpoint, str]]) -> None:
+        if isinstance(new_checkpoint, str):
+            new_checkpoint = Checkpoint(new_checkpoint)
+        assert new_checkpoint is None or isinstance(new_checkpoint, Checkpoint)
+        self._checkpoint = new_checkpoint
+
     @property
     def num_proc(self) -> int:
         return self._num_proc
@@ -74,57 +133,36 @@ class CrawlMp:
         assert new_num_proc > 0
         self._num_proc = new_num_proc
 
-    def _init_workers(self) -> None:
-        """
-        Initiate workers
-        Number of workers equals num_proc attribute value.
-        :return: None
-        """
-        for i in range(self.num_proc):
-            worker = CrawlWorker(self.results, self.crawler_class, self.jobs_list, self.sig_paused,
-                                 self.sig_worker_idle, self.lock_jobs_acq, actions=self.actions, links=None, *self.args,
-                                 **self.kwargs)
-            self.workers.append(worker)
-            worker.start()
+    @property
+    def num_threads(self) -> int:
+        return self._num_threads
 
-            if not self.running:
-                return
+    @num_threads.setter
+    def num_threads(self, new_num_threads: int) -> None:
+        assert new_num_threads > 0
+        self._num_threads = new_num_threads
 
-    def _start(self, callback: Optional[Callable] = None) -> 'CrawlMp':
+    def _start(self, callback: Optional[Callable] = None,
+               on_hits: Optional[Callable[[List[Any]], None]] = None) -> 'CrawlMp':
         """
         Start crawling using multiple workers.
         :param Callable callback: callback function
+        :param callable on_hits: consumer of hit batches, hits are not stored in results then
         :return Results: results
         """
-        # Spawn and start all workers
-        self._init_workers()
+        # Collect results streamed by workers
+        collector = Thread(target=self.scheduler.collect, args=(self.results, self.checkpoint, on_hits))
+        collector.start()
         while True:
-            idle_workers = 0
-            if not self.sig_worker_idle.wait(timeout=0.1) and self.stopped or not self.running:
-                # All workers are idle and job_list is empty
-                # All jobs are finished, close all workers
-                self.running = False
+            # Block until batch is done or crawling is stopped, workers notify on every idle transition
+            self.scheduler.wait_for(self._is_batch_finished)
+            if not self.running:
+                # Crawling was stopped, close all workers
                 self.stop_workers()
                 break
-            # If one of the Workers is Idle
-            # Count number of Idle workers
-            if len(self.jobs_list) > 0:
-                for worker in self.workers:
-                    if not worker.wake_signal.is_set():
-                        # Worker's wake_signal is low
-                        # Wake up Worker
-                        worker.wake_signal.set()
-                # Clear worker idle signal
-                self.sig_worker_idle.clear()
-                continue
-
-            for worker in self.workers:
-                if not worker.wake_signal.is_set():
-                    idle_workers += 1
-            if self.is_paused():
-                self.sig_resumed.wait()
-            elif not self.sig_batch_done.is_set() and idle_workers == self.num_proc and len(self.jobs_list) == 0:
+            else:
                 # All jobs in the batch are finished
+                self._finish_results()
                 self.sig_batch_done.set()
                 self.batch_id += 1
                 if self.on_batch_done is not None:
@@ -134,9 +172,24 @@ class CrawlMp:
                     self.stop_workers()
                     break
 
-        for worker in self.workers:
+        if self.own_pool:
             # Wait until all workers are finished
-            worker.join()
+            self.pool.close()
+        else:
+            # Wait until workers of the pool dropped links of cancelled job
+            self.pool.wait_idle()
+        # Results of finished workers are already in the queue, stop collector behind them
+        self.scheduler.stop_collecting()
+        collector.join()
+        # Stopped crawl finishes results of links crawled until then
+        self._finish_results()
+        if self.scheduler.visited is not None:
+            # Read before the pool can start other job, which clears the visited set
+            self.results.visited_overflow = self.scheduler.visited.overflowed
+        if not self.own_pool:
+            self.pool.finish_job()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
 
         self.results.done_time = time()
         # Call the Callback if it's set
@@ -145,17 +198,55 @@ class CrawlMp:
 
         return self
 
-    def _init_start(self) -> None:
+    def _finish_results(self) -> None:
+        """
+        Let the crawler class finish hits collected since the last call, see BaseCrawler.finish_results.
+        :return: None
+        """
+        hits, links_followed = len(self.results.hits), len(self.results.links_followed)
+        self.crawler_class.finish_results(self.results, *self._finished)
+        self._finished = (hits, links_followed)
+
+    def _init_start(self, max_unread: int = 0) -> None:
         """
-        Initiate all flags and clear all signals.
+        Initiate all flags, clear all signals and submit the job to the workers.
+        Workers are spawned, unless pool was given.
+        :param int max_unread: maximum number of result batches not collected yet, 0 for no limit
         :return: None
         """
+        if self.own_pool:
+            self.pool = CrawlPool(self.num_proc, self.buffer_size, self.num_threads, self.backend,
+                                  issubclass(self.crawler_class, AsyncCrawler),
+                                  self.visited_size if self.kwargs.get("follow_symlinks") else 0).start()
+        if self.checkpoint is not None:
+            self.checkpoint.open(resume=self._resuming)
+            if not self._resuming:
+                self.checkpoint.add_links(self.links)
+        if self.sink is not None:
+            # Resumed crawl appends to the output of the previous run
+            self.sink.prepare(self.crawler_class.hits_header(self.kwargs.get("mode", Mode.SIMPLE)),
+                              append=self._resuming)
+        self._resuming = False
+        self.pool.scheduler.max_unread = max_unread
+        self.job = self.pool.submit(self.crawler_class, self.links, self.args,
+                                    dict(self.kwargs, actions=self.actions, links=None),
+                                    track_links=self.checkpoint is not None, max_links=self.max_links,
+                                    spill_dir=self.spill_dir, sink=self.sink, columnar=self.results.columnar)
         self.results.start_time = time()
         self.running = True
         self.stopped = False
         self.sig_resumed.clear()
-        self.sig_paused.clear()
-        self.sig_worker_idle.clear()
+        self.sig_batch_done.clear()
+        self.scheduler = self.pool.scheduler
+        self.sig_paused = self.pool.sig_paused
+        self.workers = self.pool.workers
+
+    def _is_batch_finished(self) -> bool:
+        """
+        Predicate for the manager loop, evaluated under the scheduler's lock.
+        :return bool: True if crawling was stopped or current batch is done
+        """
+        return not self.running or (not self.sig_batch_done.is_set() and self.scheduler.done)
 
     def start(self, callback: Optional[Callable] = None, reset_results: bool = True) -> None:
         """
@@ -165,23 +256,157 @@ class CrawlMp:
         :param callable callback: Callable
         :return: None
         """
+        self._run(callback, reset_results)
+
+    def _run(self, callback: Optional[Callable] = None, reset_results: bool = True,
+             on_hits: Optional[Callable[[List[Any]], None]] = None, max_unread: int = 0) -> None:
+        """
+        Start crawl managers, see start.
+        :param callable callback: Callable
+        :param bool reset_results: Reset previous results
+        :param callable on_hits: consumer of hit batches, hits are not stored in results then
+        :param int max_unread: maximum number of result batches not collected yet, 0 for no limit
+        :return: None
+        """
         if self.running:
             raise CrawlException("Crawling is already in progress.")
 
-        self._init_start()
+        self._init_start(max_unread)
         if reset_results:
             self.results.reset()
+            self._finished = (0, 0)
 
         if callback is None:
-            self._start()
+            self._start(on_hits=on_hits)
         else:
             assert callable(callback)
-            Thread(target=self._start, args=(callback,)).start()
+            Thread(target=self._start, args=(callback, on_hits)).start()
 
             for worker in self.workers:
                 # Block until all workers are idle
                 worker.wake_signal.wait()
 
+    def stream(self, max_batches: int = 16) -> Iterator[List[Any]]:
+        """
+        Start crawl and yield hit batches as soon as workers flush them (every buffer_size crawled links).
+        Streamed hits are not stored in results, followed and skipped links are.
+        At most max_batches batches wait for the consumer and at most max_batches more are in flight,
+        workers with another batch to send are blocked, so slow consumer throttles the crawl.
+        Closing the generator before the crawl is finished stops the crawl.
+        With keepalive, batches of appended links are streamed too, until stop is called.
+        :param int max_batches: maximum number of hit batches waiting for the consumer
+        :return: generator of hit batches
+        """
+        assert max_batches >= 1
+        batches: 'queue.Queue[Optional[List[Any]]]' = queue.Queue(max_batches)
+        # End of the crawl is marked by None, after all results were collected
+        self._run(lambda manager: batches.put(None), True, batches.put, max_batches)
+        finished = False
+        try:
+            while True:
+                hits = batches.get()
+                if hits is None:
+                    finished = True
+                    break
+                yield hits
+        finally:
+            if not finished:
+                self.stop()
+                # Collector and workers are blocked until their batches are taken
+                while batches.get() is not None:
+                    pass
+
+    def iter_hits(self, max_batches: int = 16) -> Iterator[Any]:
+        """
+        Start crawl and yield hits one by one as soon as workers flush them, see stream.
+        :param int max_batches: maximum number of hit batches waiting for the consumer
+        :return: generator of hits
+        """
+        for hits in self.stream(max_batches):
+            yield from hits
+
+    async def astream(self, max_batches: int = 16) -> AsyncIterator[List[Any]]:
+        """
+        Asynchronous variant of stream, hit batches are awaited in the running event loop.
+        Collector waits for free space in the asyncio queue, so backpressure is the same as in stream.
+        asyncio is imported on the first call.
+        :param int max_batches: maximum number of hit batches waiting for the consumer
+        :return: asynchronous generator of hit batches
+        """
+        import asyncio
+        assert max_batches >= 1
+        loop = asyncio.get_event_loop()
+        batches: 'asyncio.Queue[Optional[List[Any]]]' = asyncio.Queue(max_batches)
+
+        def put(hits: Optional[List[Any]]) -> None:
+            # Called by the collector thread, blocks until the batch is in the queue
+            asyncio.run_coroutine_threadsafe(batches.put(hits), loop).result()
+
+        # Starting blocks until workers are ready, don't block the event loop meanwhile
+        await loop.run_in_executor(None, self._run, lambda manager: put(None), True, put, max_batches)
+        finished = False
+        try:
+            while True:
+                hits = await batches.get()
+                if hits is None:
+                    finished = True
+                    break
+                yield hits
+        finally:
+            if not finished:
+                self.stop()
+                while await batches.get() is not None:
+                    pass
+
+    async def aiter_hits(self, max_batches: int = 16) -> AsyncIterator[Any]:
+        """
+        Asynchronous variant of iter_hits, see astream.
+        :param int max_batches: maximum number of hit batches waiting for the consumer
+        :return: asynchronous generator of hits
+        """
+        batches = self.astream(max_batches)
+        try:
+            async for hits in batches:
+                for hit in hits:
+                    yield hit
+        finally:
+            # Stop the crawl at once, if the consumer left early
+            await batches.aclose()
+
+    def watch(self, on_change: Optional[Callable[[List['Hit'], List[str]], None]] = None,
+              interval: float = 0.5) -> 'Watcher':
+        """
+        Start crawl and keep its results current by watching crawled directories with inotify (Linux only).
+        New directories are crawled by the workers, changed files are checked by the watcher, see Watcher.
+        Blocks until the initial crawl is done, watching goes on until stop is called.
+        :param callable on_change: called with list of added (or changed) hits and list of removed paths
+        :param float interval: seconds between applying changes to the results
+        :return Watcher: running watcher
+        """
+        from crawlMp.watch import Watcher
+        return Watcher(self, on_change, interval).start()
+
+    def resume_from(self, checkpoint: Union[Checkpoint, str], callback: Optional[Callable] = None) -> None:
+        """
+        Continue crawl logged in the checkpoint.
+        Results are loaded from the checkpoint, only links which were neither followed nor skipped are crawled.
+        New progress is appended to the same checkpoint.
+        :param checkpoint: Checkpoint or path of its log
+        :param callable callback: Callable, same as in start
+        :return: None
+        """
+        if self.running:
+            raise CrawlException("Crawling is already in progress.")
+        self.checkpoint = checkpoint
+        self.links, hits, links_followed, links_skipped = self.checkpoint.load()
+        self.results.reset()
+        self.results.hits += hits
+        self.results.links_followed += links_followed
+        self.results.links_skipped += links_skipped
+        self._finished = (0, 0)
+        self._resuming = True
+        self.start(callback, reset_results=False)
+
     def pause(self) -> None:
         """
         Pause crawling until resume
@@ -190,9 +415,10 @@ class CrawlMp:
         self.sig_resumed.clear()
         self.sig_paused.set()
 
-        for worker in self.workers:
-            # Block until all workers are idle
-            worker.sig_idle.wait()
+        if self.scheduler is None:
+            return
+        # Block until all workers are idle or paused and results they flushed were collected
+        self.scheduler.wait_for(lambda: (self.scheduler.halted and self.scheduler.collected) or not self.running)
 
     def is_paused(self) -> bool:
         """
@@ -223,15 +449,22 @@ class CrawlMp:
         if self.is_paused():
             self.sig_paused.clear()
             self.sig_resumed.set()
+        if self.scheduler is not None:
+            # Wake up the manager loop
+            self.scheduler.notify()
 
     def stop_workers(self) -> None:
         """
-        Stop all workers
+        Stop all workers, workers of the pool only drop links of the job.
         :return: None
         """
+        if not self.own_pool:
+            self.pool.cancel()
+            return
         for worker in self.workers:
             worker.stop()
-            worker.wake_signal.set()
+        # Wake up idle workers blocked on their inbox
+        self.scheduler.wake()
 
     def append_links(self, links: List[Any]) -> None:
         """
@@ -241,8 +474,9 @@ class CrawlMp:
         """
         if not self.running:
             raise CrawlException("Crawler is already finished.")
-        self.jobs_list += links
-        for worker in self.workers:
-            # Wake up all workers again
-            worker.wake_signal.set()
+        if self.checkpoint is not None:
+            self.checkpoint.add_links(links)
+        self.scheduler.offer(links, self.job)
         self.sig_batch_done.clear()
+        # Batch could be already done before sig_batch_done was cleared, let the manager re-evaluate it
+        self.scheduler.notify()
@@ -1,8 +1,13 @@
-from multiprocessing import Event, Process, Lock
-from typing import Any, Iterator, Type, List
+from multiprocessing import Event, Process
+from threading import Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
 
-from crawlMp.crawlers.crawler import Crawler
+from crawlMp.crawlers.crawler import BaseCrawler
 from crawlMp.results import Results
+from crawlMp.scheduler import Scheduler
+from crawlMp.sinks import Sink
+from crawlMp.spill import SpillStore
+from crawlMp.visited import VisitedSet
 
 
 def worker_id_gen() -> Iterator:
@@ -16,38 +21,106 @@ def worker_id_gen() -> Iterator:
         worker_id += 1
 
 
-class CrawlWorker(Process):
+class Job:
     """
-    Worker process, which will run Crawler.
+    Crawl job, everything a worker needs to build the crawler of given links.
+    Job travels together with its links, so one worker can crawl jobs of different crawlers.
     """
-    id_gen = worker_id_gen()
 
-    def __init__(self, results: Results, crawler_class: Type[Crawler], jobs_list: List[Any], sig_pause: Event,
-                 sig_idle: Event, lock_jobs_acq: Lock, buffer_size: int = 96, *args: Any, **kwargs: Any) -> None:
+    def __init__(self, job_id: int, crawler_class: Type[BaseCrawler], args: Tuple[Any, ...] = (),
+                 kwargs: Optional[Dict[str, Any]] = None, track_links: bool = False,
+                 max_links: Optional[int] = None, spill_dir: Optional[str] = None,
+                 sink: Optional[Sink] = None, columnar: bool = False) -> None:
         """
-        :param Result results: results object
+        :param int job_id: job id, unique within the scheduler
         :param crawler_class: Crawler class
-        :param list jobs_list: list of links
+        :param tuple args: positional arguments of the crawler
+        :param dict kwargs: key arguments of the crawler
+        :param bool track_links: send extracted links together with results (needed by Checkpoint)
+        :param int max_links: maximum number of links kept in memory by a crawl loop, the rest is spilled to disk
+        :param str spill_dir: directory for spilled links, system temporary directory if None
+        :param Sink sink: output of hits, written by the workers instead of sending hits to the parent
+        :param bool columnar: crawlers collect hits to ColumnarHits, which are sent to the parent as column buffers
+        """
+        self.job_id = job_id
+        self.crawler_class = crawler_class
+        self.args = args
+        self.kwargs = {} if kwargs is None else kwargs
+        self.track_links = track_links
+        self.max_links = max_links
+        self.spill_dir = spill_dir
+        self.sink = sink
+        self.columnar = columnar
+
+    @property
+    def max_links(self) -> Optional[int]:
+        return self._max_links
+
+    @max_links.setter
+    def max_links(self, new_max_links: Optional[int]) -> None:
+        assert new_max_links is None or new_max_links >= 1
+        self._max_links = new_max_links
+
+    def spill_store(self) -> Optional[SpillStore]:
+        """
+        Build new store for links over max_links.
+        :return SpillStore: spill store or None if the job keeps all links in memory
+        """
+        if self.max_links is None:
+            return None
+        # Paged in segment fits in the memory kept by spill_links
+        return SpillStore(self.spill_dir, max(1, self.max_links // 2))
+
+    def crawler(self, visited: Optional[VisitedSet] = None, slot: int = 0) -> BaseCrawler:
+        """
+        Build new crawler of the job.
+        :param VisitedSet visited: visited set shared by all workers
+        :param int slot: scheduler slot of the crawl loop, which owns the crawler
+        :return BaseCrawler: crawler
+        """
+        crawler = self.crawler_class(*self.args, **self.kwargs)
+        crawler.visited = visited
+        crawler.sink = None if self.sink is None else self.sink.writer(slot)
+        if self.columnar:
+            # Directory of every hit is interned, batches carry each directory once
+            crawler.results = Results(crawler.results.hits_header, crawler.results.links_header, columnar=True)
+        return crawler
+
+
+class CrawlWorkerMixin:
+    """
+    Mixin class providing Worker body, shared by process and thread workers.
+    Worker runs num_threads crawl loops, each of them with its own Crawler and scheduler slot.
+    Crawler is built from the job of received links, links without job belong to the worker's own job
+    (crawler_class, args and kwargs), so worker can outlive many jobs.
+    """
+    id_gen = worker_id_gen()
+
+    def __init__(self, crawler_class: Optional[Type[BaseCrawler]], scheduler: Scheduler, slot: int,
+                 sig_pause: Event, buffer_size: int = 96, num_threads: int = 1, *args: Any, **kwargs: Any) -> None:
+        """
+        :param crawler_class: Crawler class of the worker's own job, None if all links come with their job
+        :param Scheduler scheduler: work-stealing scheduler
+        :param int slot: worker's first slot in the scheduler, worker occupies num_threads slots
         :param Event sig_pause: Pause signal
-        :param Event sig_idle: Idle signal
-        :param Lock lock_jobs_acq: Lock for job acquisition
-        :param int buffer_size: Size of links buffer
+        :param int buffer_size: Size of links buffer, results are also sent after every buffer_size crawled links
+        :param int num_threads: Number of crawling threads
         :param args:
         :param kwargs:
         """
         super().__init__()
         self.worker_id = next(self.id_gen)
-        self.results = results
         self.stop_signal = Event()
         self.wake_signal = Event()
         self.buffer_size = buffer_size
         self.crawler_class = crawler_class
-        self.jobs_list = jobs_list
+        self.scheduler = scheduler
+        self.slot = slot
+        self.num_threads = num_threads
         self.sig_pause = sig_pause
-        self.sig_idle = sig_idle
-        self.lock_jobs_acq = lock_jobs_acq
         self.args = args
         self.kwargs = kwargs
+        self.job = Job(0, crawler_class, args, kwargs)
 
     @property
     def buffer_size(self) -> int:
@@ -58,62 +131,217 @@ class CrawlWorker(Process):
         assert new_buffer_size >= 1
         self._buffer_size = new_buffer_size
 
+    @property
+    def num_threads(self) -> int:
+        return self._num_threads
+
+    @num_threads.setter
+    def num_threads(self, new_num_threads: int) -> None:
+        assert new_num_threads >= 1
+        self._num_threads = new_num_threads
+
     def run(self) -> None:
         """
         Worker body
-        Initiate Crawler and crawl through
+        Run crawl loop for every slot of the worker.
         :return: None
         """
-        crawler = self.crawler_class(*self.args, **self.kwargs)
+        if self.num_threads == 1:
+            self.crawl(self.slot)
+        else:
+            threads = [Thread(target=self.crawl, args=(slot,))
+                       for slot in range(self.slot, self.slot + self.num_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.scheduler.release()
 
-        def flush_results(worker_crawler: Crawler) -> None:
-            """
-            Flush crawler results into shared worker results.
-            :return: None
-            """
-            self.results.hits += worker_crawler.results.hits
-            self.results.links_followed += worker_crawler.results.links_followed
-            self.results.links_skipped += worker_crawler.results.links_skipped
-            worker_crawler.results.reset()
+    def crawl(self, slot: int) -> None:
+        """
+        Crawl loop
+        Initiate Crawler and crawl through links received from the scheduler.
+        :param int slot: scheduler slot of this crawl loop
+        :return: None
+        """
+        job: Optional[Job] = None
+        crawler: Optional[BaseCrawler] = None
+        # Links extracted since results were sent last time, if job tracks them
+        extracted: Optional[List[Any]] = None
+        # Links over job's max_links, if job has a limit
+        spill: Optional[SpillStore] = None
+        # Links extracted minus links crawled, published to the scheduler when worker goes idle
+        pending_delta = 0
+        # Links crawled since results were sent last time
+        crawled = 0
+        idle = False
 
         # Set worker as active
         self.wake_signal.set()
-        # Crawl until wake_signal is high
-        while True:
-            if not self.wake_signal.wait(timeout=0.1) and self.stop_signal.is_set():
-                break
-            else:
+        # Crawl until stop_signal is high
+        while not self.stop_signal.is_set():
+            if crawler is not None and (crawler.links or spill) and job.job_id != self.scheduler.job_id:
+                # Job was cancelled, drop its links
+                crawler.links.clear()
+                if spill is not None:
+                    spill.clear()
+                pending_delta = 0
+            if self.sig_pause.is_set() and not idle:
+                self.flush_results(crawler, extracted, idle=True)
+                # Clear wake_signal first, so resume can't slip in between the check and the wait
+                self.wake_signal.clear()
                 if self.sig_pause.is_set():
-                    self.wake_signal.clear()
-                    self.sig_idle.set()
-                elif crawler.links:
-                    # Crawl next link
-                    next(crawler)
-                    if self.sig_idle.is_set() and len(crawler.links) > self.buffer_size:
-                        # One of the workers is IDLE and Worker has more links than buffer size
-                        # Keep links of buffer size
-                        self.jobs_list += crawler.links[self.buffer_size:]
-                        # Remove those links from crawler links
-                        del crawler.links[self.buffer_size:]
-                elif self.jobs_list:
-                    # Crawler has no links to follow, but there are some links already in job_queue
-                    # Fill crawler.links from jobs_list of buffer_size
-                    with self.lock_jobs_acq:
-                        crawler.links += self.jobs_list[:self.buffer_size]
-                        # Remove fetched links from jobs_list
-                        del self.jobs_list[:self.buffer_size]
-                else:
-                    # job_queue is empty
-                    flush_results(crawler)
-                    # set wake_signal to low
-                    self.wake_signal.clear()
-                    # set worker_idle_signal to high
-                    self.sig_idle.set()
-        flush_results(crawler)
+                    self.scheduler.set_paused(True)
+                    self.wake_signal.wait()
+                    self.scheduler.set_paused(False)
+                self.wake_signal.set()
+            elif crawler is not None and (crawler.links or spill):
+                if not crawler.links:
+                    # Page spilled links back in
+                    crawler.links += spill.pop()
+                # Crawl next link
+                links = crawler.crawl_next()
+                pending_delta += len(links) - 1
+                if extracted is not None:
+                    extracted += links
+                crawled += 1
+                if crawled >= self.buffer_size:
+                    # Stream results of large subtrees in batches
+                    self.flush_results(crawler, extracted)
+                    crawled = 0
+                self.spill_links(crawler, job, spill)
+                self.share_links(slot, crawler, job, spill)
+            else:
+                # Crawler has no links to follow, check the inbox, block there if worker is already idle
+                received = self.scheduler.receive(slot, block=idle)
+                if received is not None:
+                    links_job, links = received
+                    links_job = self.job if links_job is None else links_job
+                    if links_job.job_id != self.scheduler.job_id:
+                        # Links of a cancelled job
+                        continue
+                    if job is None or links_job.job_id != job.job_id:
+                        # First links of the next job
+                        self.flush_results(crawler, extracted)
+                        self.close_sink(crawler)
+                        self.close_spill(spill)
+                        job, crawler = links_job, links_job.crawler(self.scheduler.visited, slot)
+                        extracted = [] if job.track_links else None
+                        spill = job.spill_store()
+                    crawler.links += links
+                    if idle:
+                        idle = False
+                        self.scheduler.set_busy()
+                elif not idle:
+                    # Inbox is empty
+                    self.flush_results(crawler, extracted, idle=True)
+                    idle = True
+                    self.scheduler.set_idle(slot, pending_delta)
+                    pending_delta = 0
+        self.flush_results(crawler, extracted)
+        self.close_sink(crawler)
+        self.close_spill(spill)
+
+    def flush_results(self, crawler: Optional[BaseCrawler], extracted: Optional[List[Any]] = None,
+                      idle: bool = False) -> None:
+        """
+        Send crawler results to the parent process.
+        If job has a sink, hits are written to the sink and only links are sent.
+        :param BaseCrawler crawler: crawler of the crawl loop, None if nothing was crawled yet
+        :param list extracted: links extracted from followed links, emptied after they are sent
+        :param bool idle: crawl loop goes idle or pauses, buffered hits of the sink are written out
+        :return: None
+        """
+        if crawler is None:
+            return
+        results = crawler.results
+        if crawler.sink is not None:
+            crawler.sink.write(results.hits)
+            if idle or extracted is not None:
+                # Output is complete when the batch is done, hits of logged batches are in the output
+                crawler.sink.flush()
+            results.hits = results.new_hits()
+        if results.hits or results.links_followed or results.links_skipped:
+            self.scheduler.send_results(results.hits, results.links_followed, results.links_skipped,
+                                        None if extracted is None else list(extracted))
+            results.reset()
+            if extracted is not None:
+                del extracted[:]
+
+    def share_links(self, slot: int, crawler: BaseCrawler, job: Job, spill: Optional[SpillStore] = None) -> None:
+        """
+        Give part of the crawler links to an idle worker, if there is one.
+        :param int slot: scheduler slot of the crawl loop
+        :param BaseCrawler crawler: crawler of the crawl loop
+        :param Job job: job of the crawler
+        :param SpillStore spill: links spilled by the crawl loop
+        :return: None
+        """
+        if len(crawler.links) > self.buffer_size or spill:
+            thief = self.scheduler.next_thief()
+            if thief is not None and thief != slot:
+                if spill:
+                    # Spilled links are the oldest ones, give away whole segment
+                    self.scheduler.give(thief, spill.pop(), job)
+                    return
+                # One of the workers is IDLE and Worker has more links than buffer size
+                # Keep at least links of buffer size and give the rest to the idle worker
+                keep = max(self.buffer_size, len(crawler.links) // 2)
+                # Links crawled last are removed from crawler links
+                self.scheduler.give(thief, crawler.links.split(len(crawler.links) - keep), job)
+
+    @staticmethod
+    def spill_links(crawler: BaseCrawler, job: Job, spill: Optional[SpillStore]) -> None:
+        """
+        Spill crawler links over job's max_links to disk, keep half of max_links crawled next in memory.
+        At least one link is kept, so crawling always goes on before spilled links are paged back in.
+        :param BaseCrawler crawler: crawler of the crawl loop
+        :param Job job: job of the crawler
+        :param SpillStore spill: links spilled by the crawl loop, None if job has no limit
+        :return: None
+        """
+        if spill is not None and len(crawler.links) > job.max_links:
+            keep = max(1, job.max_links // 2)
+            spill.push(crawler.links.split(len(crawler.links) - keep))
+
+    @staticmethod
+    def close_sink(crawler: Optional[BaseCrawler]) -> None:
+        """
+        Write out and close sink of the finished crawler.
+        :param BaseCrawler crawler: crawler of the crawl loop, None if nothing was crawled yet
+        :return: None
+        """
+        if crawler is not None and crawler.sink is not None:
+            crawler.sink.close()
+
+    @staticmethod
+    def close_spill(spill: Optional[SpillStore]) -> None:
+        """
+        Remove spilled links of the finished job.
+        :param SpillStore spill: links spilled by the crawl loop
+        :return: None
+        """
+        if spill is not None:
+            spill.close()
 
     def stop(self) -> None:
         """
         Stop worker
+        Worker blocked on its inbox must be woken up by Scheduler.wake().
         :return: None
         """
         self.stop_signal.set()
+        self.wake_signal.set()
+
+
+class CrawlWorker(CrawlWorkerMixin, Process):
+    """
+    Worker process, which will run Crawler.
+    """
+
+
+class CrawlWorkerThread(CrawlWorkerMixin, Thread):
+    """
+    Worker thread, which will run Crawler.
+    Suitable for I/O bound crawlers (e.g. os.scandir releases the GIL), no processes are spawned.
+    """
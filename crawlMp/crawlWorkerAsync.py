@@ -0,0 +1,181 @@
+import asyncio
+from multiprocessing import Process
+from threading import Thread
+from typing import Any, List, Optional
+
+from crawlMp.crawlWorker import CrawlWorkerMixin, Job
+from crawlMp.crawlers.crawler_async import AsyncCrawler
+from crawlMp.spill import SpillStore
+
+
+class AsyncCrawlWorkerMixin(CrawlWorkerMixin):
+    """
+    Mixin class providing Worker body for AsyncCrawler.
+    Every crawl loop runs its own event loop with at most crawler.concurrency entrypoints in flight.
+    Scheduling, pause and termination detection are the same as in CrawlWorkerMixin,
+    blocking waits (idle inbox, pause) are moved to the default executor of the loop, so they neither block
+    the event loop nor take threads of the crawler's executor.
+    """
+
+    def crawl(self, slot: int) -> None:
+        """
+        Run async crawl loop in a new event loop.
+        :param int slot: scheduler slot of this crawl loop
+        :return: None
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.crawl_async(slot))
+        finally:
+            loop.close()
+
+    async def crawl_async(self, slot: int) -> None:
+        """
+        Async crawl loop
+        Initiate AsyncCrawler and crawl through links received from the scheduler.
+        :param int slot: scheduler slot of this crawl loop
+        :return: None
+        """
+        loop = asyncio.get_event_loop()
+        job: Optional[Job] = None
+        crawler: Optional[AsyncCrawler] = None
+        # Entrypoints in flight
+        tasks = set()
+        # Links extracted since results were sent last time, if job tracks them
+        extracted: Optional[List[Any]] = None
+        # Links over job's max_links, if job has a limit
+        spill: Optional[SpillStore] = None
+        # Links extracted minus links crawled, published to the scheduler when worker goes idle
+        pending_delta = 0
+        # Links crawled since results were sent last time
+        crawled = 0
+        idle = False
+
+        # Set worker as active
+        self.wake_signal.set()
+        # Crawl until stop_signal is high
+        while not self.stop_signal.is_set():
+            if crawler is not None and (crawler.links or spill or tasks) and job.job_id != self.scheduler.job_id:
+                # Job was cancelled, drop its links and entrypoints in flight
+                crawler.links.clear()
+                if spill is not None:
+                    spill.clear()
+                await self.cancel_tasks(tasks)
+                tasks = set()
+                pending_delta = 0
+            if self.sig_pause.is_set() and not idle:
+                if tasks:
+                    # Let entrypoints in flight finish first
+                    done, tasks = await asyncio.wait(tasks)
+                    pending_delta += self.count_links(done, extracted)
+                    continue
+                self.flush_results(crawler, extracted, idle=True)
+                # Clear wake_signal first, so resume can't slip in between the check and the wait
+                self.wake_signal.clear()
+                if self.sig_pause.is_set():
+                    self.scheduler.set_paused(True)
+                    await loop.run_in_executor(None, self.wake_signal.wait)
+                    self.scheduler.set_paused(False)
+                self.wake_signal.set()
+            elif crawler is not None and (crawler.links or spill) and len(tasks) < crawler.concurrency:
+                if not crawler.links:
+                    # Page spilled links back in
+                    crawler.links += spill.pop()
+                # Start crawling of next link
+                tasks.add(asyncio.ensure_future(crawler.crawl(crawler.links.pop())))
+                pending_delta -= 1
+            elif tasks:
+                # Wait for at least one entrypoint to be crawled
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                pending_delta += self.count_links(done, extracted)
+                crawled += len(done)
+                if crawled >= self.buffer_size:
+                    # Stream results of large subtrees in batches
+                    self.flush_results(crawler, extracted)
+                    crawled = 0
+                self.spill_links(crawler, job, spill)
+                self.share_links(slot, crawler, job, spill)
+            else:
+                # Crawler has no links to follow, check the inbox, block there if worker is already idle
+                if idle:
+                    received = await loop.run_in_executor(None, self.scheduler.receive, slot, True)
+                else:
+                    received = self.scheduler.receive(slot)
+                if received is not None:
+                    links_job, links = received
+                    links_job = self.job if links_job is None else links_job
+                    if links_job.job_id != self.scheduler.job_id:
+                        # Links of a cancelled job
+                        continue
+                    if job is None or links_job.job_id != job.job_id:
+                        # First links of the next job
+                        self.close_crawler(crawler, extracted)
+                        self.close_spill(spill)
+                        job, crawler = links_job, links_job.crawler(self.scheduler.visited, slot)
+                        extracted = [] if job.track_links else None
+                        spill = job.spill_store()
+                    crawler.links += links
+                    if idle:
+                        idle = False
+                        self.scheduler.set_busy()
+                elif not idle:
+                    # Inbox is empty
+                    self.flush_results(crawler, extracted, idle=True)
+                    idle = True
+                    self.scheduler.set_idle(slot, pending_delta)
+                    pending_delta = 0
+        await self.cancel_tasks(tasks)
+        self.close_crawler(crawler, extracted)
+        self.close_spill(spill)
+
+    @staticmethod
+    async def cancel_tasks(tasks: set) -> None:
+        """
+        Cancel entrypoints in flight and wait until they are finished.
+        :param set tasks: crawl tasks
+        :return: None
+        """
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    @staticmethod
+    def count_links(done: set, extracted: Optional[List[Any]]) -> int:
+        """
+        Count links extracted by finished crawl tasks, keep them if job tracks them.
+        :param set done: finished crawl tasks
+        :param list extracted: links extracted since results were sent last time, None if job doesn't track them
+        :return int: number of extracted links
+        """
+        count = 0
+        for task in done:
+            links = task.result()
+            count += len(links)
+            if extracted is not None:
+                extracted += links
+        return count
+
+    def close_crawler(self, crawler: Optional[AsyncCrawler], extracted: Optional[List[Any]] = None) -> None:
+        """
+        Send the rest of crawler results, close its sink and shut down its executor.
+        :param AsyncCrawler crawler: crawler of the crawl loop, None if nothing was crawled yet
+        :param list extracted: links extracted since results were sent last time
+        :return: None
+        """
+        if crawler is not None:
+            crawler.close()
+            self.flush_results(crawler, extracted)
+            self.close_sink(crawler)
+
+
+class CrawlWorkerAsync(AsyncCrawlWorkerMixin, Process):
+    """
+    Worker process, which will run AsyncCrawler.
+    """
+
+
+class CrawlWorkerAsyncThread(AsyncCrawlWorkerMixin, Thread):
+    """
+    Worker thread, which will run AsyncCrawler.
+    """
@@ -1,23 +1,47 @@
+import sys
 from abc import ABC, abstractmethod
-from multiprocessing.managers import ListProxy
-from typing import Any, Tuple, List, Optional
+from typing import Any, Callable, Tuple, List, Optional, Union, TYPE_CHECKING
 
 from crawlMp import CrawlException, ActionException
 from crawlMp.actions.action import Action
-from crawlMp.enums import Mode, Header_ref
+from crawlMp.enums import Mode, Header_ref, Traversal
+from crawlMp.frontier import Frontier, new_frontier
 from crawlMp.results import Results
 
+if TYPE_CHECKING:
+    from crawlMp.sinks import SinkWriter
+    from crawlMp.visited import VisitedSet
 
-class Crawler(ABC):
+
+def is_list_proxy(obj: Any) -> bool:
     """
-    Basic Crawler interface.
+    Check if object is a shared list (ListProxy).
+    multiprocessing.managers is not imported for that, ListProxy can't exist before someone imported it.
+    :param Any obj: object to check
+    :return bool: True if obj is ListProxy
+    """
+    managers = sys.modules.get("multiprocessing.managers")
+    return managers is not None and isinstance(obj, managers.ListProxy)
+
+
+class BaseCrawler(ABC):
+    """
+    Pieces shared by synchronous and asynchronous Crawler interfaces.
+    Headers, modes, actions, links and results.
+    Links are kept in a Frontier, traversal decides which link is crawled next:
+      - Traversal.BFS: breadth-first (FIFO), shallow results first
+      - Traversal.DFS: depth-first (LIFO), lowest memory
+      - Traversal.PRIORITY: lowest priority(link) first
     """
 
     def __init__(self, links: Optional[List[Any]] = None, mode: Mode = Mode.SIMPLE,
-                 actions: Optional[Tuple[Action, ...]] = None, *args, **kwargs):
+                 actions: Optional[Tuple[Action, ...]] = None, *args, traversal: Union[Traversal, str] = Traversal.BFS,
+                 priority: Optional[Callable[[Any], Any]] = None, **kwargs):
         """
         :param list links: list of entrypoints
         :param str mode: Data collection mode
+        :param traversal: Traversal strategy
+        :param callable priority: priority of the link for Traversal.PRIORITY, lower is crawled first
         :param args:
         :param kwargs:
         """
@@ -26,31 +50,15 @@ class Crawler(ABC):
         self.kwargs = kwargs
         self.actions = actions
         self.mode = mode
-        self.metadata: Tuple[Any, ...] = ()
-        self.entrypoint: Any = None
+        self.traversal = Traversal(traversal)
+        self.priority = priority
+        # Visited resources shared by all workers of the crawl, set by the worker
+        self.visited: Optional['VisitedSet'] = None
+        # Writer of hits, if the job has a sink, set by the worker
+        self.sink: Optional['SinkWriter'] = None
         self.results = Results(self.hits_header(self.mode), self.links_header(self.mode))
         self.links = links
 
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        """
-        Generate next link and execute crawl method over it.
-        :return Crawler: self object
-        """
-        try:
-            next_link = self.links.pop(0)
-        except IndexError:
-            # No other links exists, stop iteration
-            raise StopIteration
-        try:
-            self.crawl(next_link)
-        except CrawlException:
-            # If crawl fails for any reason, don't follow that link
-            self.results.links_skipped.append(next_link)
-        return self
-
     @property
     def mode(self) -> Mode:
         return self._mode
@@ -61,13 +69,17 @@ class Crawler(ABC):
         self._mode = new_mode
 
     @property
-    def links(self) -> List[Any]:
+    def links(self) -> Frontier:
         return self._links
 
     @links.setter
-    def links(self, new_links: Optional[List[Any]]) -> None:
-        assert isinstance(new_links, (list, ListProxy)) or new_links is None
-        self._links = new_links if new_links is not None else []
+    def links(self, new_links: Optional[Union[Frontier, List[Any]]]) -> None:
+        if isinstance(new_links, Frontier):
+            self._links = new_links
+            return
+        assert isinstance(new_links, list) or is_list_proxy(new_links) or new_links is None
+        # Links are copied to the frontier of the crawler's traversal
+        self._links = new_frontier(self.traversal, self.priority, new_links)
 
     @property
     def actions(self) -> Tuple[Action, ...]:
@@ -108,6 +120,19 @@ class Crawler(ABC):
         """
         ...
 
+    @staticmethod
+    def finish_results(results: Results, hits_start: int = 0, followed_start: int = 0) -> None:
+        """
+        Complete hits which depend on other links of the same crawl, e.g. line numbers of file chunks.
+        Called in the parent process once all links the new hits depend on are crawled.
+        Results are already finished up to the given indices, hits streamed or written to a sink are not finished.
+        :param Results results: collected results
+        :param int hits_start: index of the first new hit
+        :param int followed_start: index of the first new followed link
+        :return: None
+        """
+        pass
+
     def execute_actions(self, hit: Any) -> bool:
         """
         Execute all actions sequence on the given hit.
@@ -123,26 +148,117 @@ class Crawler(ABC):
                 return False
         return True
 
-    def crawl(self, entrypoint: Any) -> None:
+    def execute_actions_batch(self, hits: List[Any]) -> List[bool]:
+        """
+        Execute actions pipeline on a batch of hits, every action gets outputs of the previous one at once.
+        Hit failed by one action is not passed to the next ones.
+        :param list hits: input hits
+        :return list: True for every hit, which passed whole pipeline
+        """
+        passed = [True] * len(hits)
+        indexes = list(range(len(hits)))
+        for action in self.actions:
+            if not indexes:
+                break
+            outputs = action.do_batch(hits)
+            hits, next_indexes = [], []
+            for index, output in zip(indexes, outputs):
+                if isinstance(output, ActionException):
+                    passed[index] = False
+                else:
+                    hits.append(output)
+                    next_indexes.append(index)
+            indexes = next_indexes
+        return passed
+
+    @abstractmethod
+    def is_hit(self, item: Any) -> bool:
+        """
+        Decide if input item is hits or not.
+        This method must be reimplemented.
+        :param Any item: Input item
+        :return bool: True if item is a Hit
+        """
+        ...
+
+    @abstractmethod
+    def is_link(self, item: Any) -> bool:
+        """
+        Decide if input item is link or not.
+        This method must be reimplemented.
+        :param Any item: Input item
+        :return bool: True if item is a Link
+        """
+        ...
+
+
+class Crawler(BaseCrawler):
+    """
+    Basic Crawler interface.
+    """
+
+    def __init__(self, links: Optional[List[Any]] = None, mode: Mode = Mode.SIMPLE,
+                 actions: Optional[Tuple[Action, ...]] = None, *args, **kwargs):
+        """
+        :param list links: list of entrypoints
+        :param str mode: Data collection mode
+        :param args:
+        :param kwargs:
+        """
+        self.metadata: Tuple[Any, ...] = ()
+        self.entrypoint: Any = None
+        super().__init__(links, mode, actions, *args, **kwargs)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """
+        Generate next link and execute crawl method over it.
+        :return Crawler: self object
+        """
+        if not self.links:
+            # No other links exists, stop iteration
+            raise StopIteration
+        self.crawl_next()
+        return self
+
+    def crawl_next(self) -> List[Any]:
+        """
+        Crawl next link of the frontier, frontier must not be empty.
+        :return list: extracted links
+        """
+        next_link = self.links.pop()
+        try:
+            return self.crawl(next_link)
+        except CrawlException:
+            # If crawl fails for any reason, don't follow that link
+            self.results.links_skipped.append(next_link)
+            return []
+
+    def crawl(self, entrypoint: Any) -> List[Any]:
         """
         Init entrypoint (next link), extract links and hits, close entrypoint.
         :param Any entrypoint: Address of entrypoint / resource
-        :return: None
+        :return list: extracted links
         """
         if entrypoint is None:
-            return
+            return []
         self.entrypoint = entrypoint
         self.metadata = self.init_entrypoint()
-        self.results.links_followed.append(entrypoint)
+        self.results.links_followed.append(self.entrypoint)
         self.results.hits += self.extract_hits()
-        self.links += self.extract_links()
+        links = self.extract_links()
+        self.links += links
         self.close_entrypoint()
+        return links
 
     @abstractmethod
     def init_entrypoint(self) -> Tuple[Any, ...]:
         """
         Initialize entrypoint / resource
         Good example is opening new webpage, when entrypoint is url.
+        Entrypoint can be replaced by equal link carrying what was found, that one is logged as followed.
         :return tuple: Resource metadata
         """
         ...
@@ -173,23 +289,3 @@ class Crawler(ABC):
         :return list: list of extracted links
         """
         ...
-
-    @abstractmethod
-    def is_hit(self, item: Any) -> bool:
-        """
-        Decide if input item is hits or not.
-        This method must be reimplemented.
-        :param Any item: Input item
-        :return bool: True if item is a Hit
-        """
-        ...
-
-    @abstractmethod
-    def is_link(self, item: Any) -> bool:
-        """
-        Decide if input item is link or not.
-        This method must be reimplemented.
-        :param Any item: Input item
-        :return bool: True if item is a Link
-        """
-        ...
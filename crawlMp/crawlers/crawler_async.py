@@ -0,0 +1,154 @@
+from abc import abstractmethod
+from typing import Any, Callable, Tuple, List, Optional, TYPE_CHECKING
+
+from crawlMp import CrawlException
+from crawlMp.actions.action import Action
+from crawlMp.crawlers.crawler import BaseCrawler
+from crawlMp.enums import Mode
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncCrawler(BaseCrawler):
+    """
+    Asynchronous Crawler interface.
+    Many entrypoints are crawled concurrently by one crawler (at most concurrency of them),
+    so entrypoint and its metadata are passed to every hook instead of being stored in the crawler.
+    Suitable for crawlers whose cost is waiting on I/O (HTTP, remote object stores, slow mounts).
+    Blocking calls run in the crawler's own executor with concurrency threads, so every entrypoint
+    in flight has a thread and waits of the worker itself (idle inbox, pause) never take one of them.
+    asyncio is imported only when crawling starts, so importing crawlers stays cheap.
+    """
+
+    def __init__(self, links: Optional[List[Any]] = None, mode: Mode = Mode.SIMPLE,
+                 actions: Optional[Tuple[Action, ...]] = None, concurrency: int = 64, *args, **kwargs):
+        """
+        :param list links: list of entrypoints
+        :param str mode: Data collection mode
+        :param int concurrency: Maximum number of entrypoints crawled at once
+        :param args:
+        :param kwargs:
+        """
+        self.concurrency = concurrency
+        self._executor: Optional['ThreadPoolExecutor'] = None
+        super().__init__(links, mode, actions, *args, **kwargs)
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, new_concurrency: int) -> None:
+        assert new_concurrency >= 1
+        self._concurrency = new_concurrency
+
+    @property
+    def executor(self) -> 'ThreadPoolExecutor':
+        """
+        Executor running blocking calls, created on first use.
+        """
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(self.concurrency)
+        return self._executor
+
+    def close(self) -> None:
+        """
+        Shut down the executor, it is created again if crawler is used afterwards.
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def run(self) -> 'AsyncCrawler':
+        """
+        Crawl all links until there are none left, keep at most concurrency entrypoints in flight.
+        :return AsyncCrawler: self object
+        """
+        import asyncio
+        tasks = set()
+        try:
+            while self.links or tasks:
+                while self.links and len(tasks) < self.concurrency:
+                    tasks.add(asyncio.ensure_future(self.crawl(self.links.pop())))
+                _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.close()
+        return self
+
+    async def run_blocking(self, func: Callable, *args: Any) -> Any:
+        """
+        Run blocking function in the crawler's executor.
+        :param callable func: blocking function
+        :param args: function arguments
+        :return Any: function result
+        """
+        import asyncio
+        return await asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
+
+    async def crawl(self, entrypoint: Any) -> List[Any]:
+        """
+        Init entrypoint, extract links and hits, close entrypoint.
+        If crawl fails for any reason, link is counted as skipped.
+        :param Any entrypoint: Address of entrypoint / resource
+        :return list: extracted links
+        """
+        if entrypoint is None:
+            return []
+        try:
+            metadata = await self.init_entrypoint(entrypoint)
+        except CrawlException:
+            self.results.links_skipped.append(entrypoint)
+            return []
+        try:
+            hits = await self.extract_hits(entrypoint, metadata)
+            links = await self.extract_links(entrypoint, metadata)
+            # Publish everything at once after the awaits, results can be flushed while this task waits,
+            # so a batch never holds followed entrypoint without its hits and links
+            self.results.links_followed.append(entrypoint)
+            self.results.hits += hits
+            self.links += links
+            return links
+        finally:
+            await self.close_entrypoint(entrypoint, metadata)
+
+    @abstractmethod
+    async def init_entrypoint(self, entrypoint: Any) -> Tuple[Any, ...]:
+        """
+        Initialize entrypoint / resource
+        :param Any entrypoint: Address of entrypoint / resource
+        :return tuple: Resource metadata
+        """
+        ...
+
+    @abstractmethod
+    async def close_entrypoint(self, entrypoint: Any, metadata: Tuple[Any, ...]) -> None:
+        """
+        Clean allocated resources attached to entrypoint / resource.
+        :param Any entrypoint: Address of entrypoint / resource
+        :param tuple metadata: Resource metadata
+        :return: None
+        """
+        ...
+
+    @abstractmethod
+    async def extract_hits(self, entrypoint: Any, metadata: Tuple[Any, ...]) -> List[Any]:
+        """
+        Extract all hits from entrypoint / resource.
+        :param Any entrypoint: Address of entrypoint / resource
+        :param tuple metadata: Resource metadata
+        :return list: list of extracted hits
+        """
+        ...
+
+    @abstractmethod
+    async def extract_links(self, entrypoint: Any, metadata: Tuple[Any, ...]) -> List[Any]:
+        """
+        Extract all links from entrypoint / resource.
+        :param Any entrypoint: Address of entrypoint / resource
+        :param tuple metadata: Resource metadata
+        :return list: list of extracted links
+        """
+        ...
@@ -1,38 +1,284 @@
 import os
-import re
 from builtins import OSError
-from typing import Tuple, List, Optional, Any
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Tuple, List, Optional, Any, Union, Iterable, Pattern, TYPE_CHECKING
 
 from crawlMp import CrawlException
 from crawlMp.actions.action import Action
 from crawlMp.constants import inf_int
-from crawlMp.crawlers.crawler import Crawler
+from crawlMp.crawlers.crawler import BaseCrawler, Crawler
+from crawlMp.crawlers.crawler_async import AsyncCrawler
 from crawlMp.enums import Mode, Header, Header_ref
+from crawlMp.grep import FileChunk, Match, grep_chunk, grep_file, is_binary, read_head, resolve_lines, split_file
+from crawlMp.results import Results
+from crawlMp.snippets.mixins import ContentPattern, FilePredicate, FollowSymlinks, ListingIndex, \
+    MultiSearchPattern, PruneRules, SearchPattern
 
+if TYPE_CHECKING:
+    from crawlMp.filters import FileFilter
+    from crawlMp.ignore import IgnoreChain, IgnoreRules
+    from crawlMp.index import CrawlIndex
+    from crawlMp.visited import VisitedSet
 
-class CrawlerFs(Crawler):
+# Hit columns collected from os.stat: (stat attribute, type, unit)
+STAT_COLUMNS = {
+    Header.SIZE: ("st_size", float, "byte"),
+    Header.MODIFIED: ("st_mtime", float, "timestamp"),
+    Header.ACCESSED: ("st_atime", float, "timestamp"),
+    Header.CHANGED: ("st_ctime", float, "timestamp"),
+    Header.INODE: ("st_ino", int, None),
+    Header.MODE: ("st_mode", int, None),
+    Header.UID: ("st_uid", int, None),
+}
+
+# Last hit column of multi-pattern crawlers: ids of patterns matching the file
+PATTERNS_COLUMN: Header_ref = (Header.PATTERNS, tuple, None)
+# Last hit columns of content-grep crawlers: line number and byte offset of the match
+MATCH_COLUMNS: Tuple[Header_ref, ...] = ((Header.LINE, int, None), (Header.OFFSET, int, "byte"))
+
+Files = List[Tuple[str, str, Optional[os.DirEntry]]]
+# Metadata of the crawled directory: dirs, files and exclude rules of the directory
+Listing = Tuple[List[str], Files, Optional['IgnoreChain']]
+
+
+def stat_header(*columns: Header) -> Tuple[Header_ref, ...]:
+    """
+    Build hits header of filesystem crawler: path, name and given stat columns.
+    Crawler collects exactly the columns of its hits_header, so this is the way to collect other columns.
+    :param columns: Header.SIZE, Header.MODIFIED, Header.ACCESSED, Header.CHANGED, Header.INODE, Header.MODE or
+                    Header.UID
+    :return tuple: hits header
+    """
+    header: Tuple[Header_ref, ...] = ((Header.PATH, str, None), (Header.NAME, str, None))
+    for column in columns:
+        _, column_type, unit = STAT_COLUMNS[column]
+        header += ((column, column_type, unit),)
+    return header
+
+
+@lru_cache(maxsize=None)
+def stat_getter(hits_header: Tuple[Header_ref, ...]) -> Tuple[Optional[Callable[[os.stat_result], tuple]], bool]:
+    """
+    Build getter of stat columns of the hits header, header must start with path and name columns.
+    Patterns column or match columns, if they are the last ones, are not stat columns.
+    :param tuple hits_header: hits header
+    :return tuple: (getter returning tuple of column values or None if hits need no stat, True if inode is the only
+                   stat column, which is known from the directory listing)
+    """
+    assert [name for name, _, _ in hits_header[:2]] == [Header.PATH, Header.NAME]
+    columns = hits_header[2:]
+    if columns[-1:] == (PATTERNS_COLUMN,):
+        columns = columns[:-1]
+    elif columns[-2:] == MATCH_COLUMNS:
+        columns = columns[:-2]
+    try:
+        attributes = [STAT_COLUMNS[name][0] for name, _, _ in columns]
+    except KeyError as e:
+        raise CrawlException("Column %s can't be collected from the filesystem!" % e)
+    if not attributes:
+        return None, False
+    if len(attributes) == 1:
+        attribute = attributes[0]
+        return (lambda stat: (getattr(stat, attribute),)), attribute == "st_ino"
+    return attrgetter(*attributes), False
+
+
+def scan_dir(path: str, visited: Optional['VisitedSet'] = None,
+             index: Optional['CrawlIndex'] = None) -> Tuple[List[str], Files, List[str]]:
+    """
+    Walk directory and extract list of dirs, files and other entries.
+    If visited set is given, symlinks are followed and directory already in the visited set is not walked.
+    If index is given, listing of directory with unchanged mtime is taken from the index.
+    Files keep their DirEntry, so its cached data are reused by collect_hits (entry is None for indexed listings).
+    :param str path: Directory path
+    :param VisitedSet visited: directories visited by the crawl
+    :param CrawlIndex index: persistent index of directory listings
+    :return tuple: ([dirs], [(filename, filepath, DirEntry)], [others])
+    """
+    follow_symlinks = visited is not None
+    try:
+        if follow_symlinks or index is not None:
+            stat = os.stat(path)
+        if follow_symlinks and not visited.add(stat.st_dev, stat.st_ino):
+            raise CrawlException("Entrypoint was already crawled!")
+        if index is not None:
+            listing = index.get(path, stat.st_mtime_ns, follow_symlinks)
+            if listing is not None:
+                return listing
+        files, dirs, others = [], [], []
+        for entry in os.scandir(path):
+            if entry.is_file(follow_symlinks=follow_symlinks):
+                files.append((entry.name, entry.path, entry))
+            elif entry.is_dir(follow_symlinks=follow_symlinks):
+                dirs.append(entry.path)
+            else:
+                others.append(entry.path)
+        if index is not None:
+            index.put(path, stat.st_mtime_ns, (dirs, files, others), follow_symlinks)
+        return dirs, files, others
+    except (PermissionError, OSError):
+        # Raise an error if for any reason scandir fails
+        raise CrawlException("Entrypoint cannot be accessed!")
+
+
+def collect_hits(crawler: BaseCrawler, files: Files, chain: Optional['IgnoreChain'] = None) -> List[Tuple[Any, ...]]:
+    """
+    Select files which are hits of the crawler and execute crawler actions on them.
+    Excluded files are skipped first, then file filter of the crawler is evaluated, name tests before is_hit
+    and stat tests after it. Actions are executed on the batch of all selected files, after they were stat-ed.
+    Columns are given by hits header of the crawler: path, name, stat columns and ids of matching patterns.
+    Files are stat-ed only if header has stat columns (e.g. size, modification and access time in EXTENDED_MODE)
+    or filter has stat tests, stat of the DirEntry is used, if file has one. Every file is stat-ed once.
+    :param BaseCrawler crawler: crawler deciding hits
+    :param list files: list of (filename, filepath, DirEntry or None)
+    :param IgnoreChain chain: exclude rules of the directory
+    :return list: list of hits
+    """
+    hits_header = crawler.hits_header(crawler.mode)
+    getter, inode_only = stat_getter(hits_header)
+    # Multi-pattern crawler is asked once per file, its pattern ids are the hit test
+    match = crawler.patterns.match if hits_header[-1] == PATTERNS_COLUMN else None
+    file_filter: Optional['FileFilter'] = getattr(crawler, "file_filter", None)
+    name_test, stat_test = (None, None) if file_filter is None else file_filter.compile()
+    hits: List[Tuple[Any, ...]] = []
+    for filename, filepath, entry in files:
+        if chain is not None and chain.excluded(filepath, filename, False):
+            continue
+        if name_test is not None and not name_test(filename):
+            continue
+        if match is not None:
+            pattern_ids = match(filename)
+            if not pattern_ids:
+                continue
+        elif not crawler.is_hit(filename):
+            continue
+        stat = None
+        if stat_test is not None:
+            try:
+                stat = os.stat(filepath) if entry is None else entry.stat()
+            except FileNotFoundError:
+                continue
+            if not stat_test(stat):
+                continue
+        if getter is None:
+            hit = (filepath, filename)
+        elif stat is not None:
+            hit = (filepath, filename) + getter(stat)
+        elif inode_only and entry is not None and not entry.is_symlink():
+            # Inode of the directory entry is known without stat, unless it's a symlink to follow
+            hit = (filepath, filename, entry.inode())
+        else:
+            try:
+                hit = (filepath, filename) + getter(os.stat(filepath) if entry is None else entry.stat())
+            except FileNotFoundError:
+                # Ignore if File does not exist anymore
+                # this can happen for linux processes and such
+                continue
+        hits.append(hit if match is None else hit + (pattern_ids,))
+    if crawler.actions and hits:
+        # Actions get all hits of the directory at once, hit is skipped, if not all actions were successful
+        passed = crawler.execute_actions_batch([hit[0] for hit in hits])
+        hits = [hit for hit, ok in zip(hits, passed) if ok]
+    return hits
+
+
+def grep_hits(crawler: 'CrawlerGrepFs', files: Files,
+              chain: Optional['IgnoreChain'] = None) -> Tuple[List[Tuple[Any, ...]], List[FileChunk]]:
+    """
+    Search content pattern of the crawler in files which are hits of its name pattern.
+    Files are selected as in collect_hits, every selected file is stat-ed, its size decides how it's searched.
+    Empty files are skipped, files up to chunk_size are searched at once, larger files are split to chunks.
+    Every matching line of the file is a hit, actions are executed on the batch of files with matches.
+    :param CrawlerGrepFs crawler: crawler deciding hits
+    :param list files: list of (filename, filepath, DirEntry or None)
+    :param IgnoreChain chain: exclude rules of the directory
+    :return tuple: (list of hits, list of chunks of large files to crawl as links)
+    """
+    getter, _ = stat_getter(crawler.hits_header(crawler.mode))
+    file_filter: Optional['FileFilter'] = crawler.file_filter
+    name_test, stat_test = (None, None) if file_filter is None else file_filter.compile()
+    hits: List[Tuple[Any, ...]] = []
+    chunks: List[FileChunk] = []
+    for filename, filepath, entry in files:
+        if chain is not None and chain.excluded(filepath, filename, False):
+            continue
+        if name_test is not None and not name_test(filename):
+            continue
+        if not crawler.is_hit(filename):
+            continue
+        try:
+            stat = os.stat(filepath) if entry is None else entry.stat()
+        except FileNotFoundError:
+            continue
+        if stat.st_size == 0 or (stat_test is not None and not stat_test(stat)):
+            continue
+        try:
+            if stat.st_size > crawler.chunk_size:
+                # Binary test is done once, chunks are scanned as text
+                if crawler.binary or not is_binary(read_head(filepath)):
+                    chunks += split_file(filepath, stat.st_size, crawler.chunk_size)
+                continue
+            matches = grep_file(filepath, crawler.content, check_binary=not crawler.binary)
+        except OSError:
+            # File can't be read
+            continue
+        if matches:
+            columns = (filepath, filename) if getter is None else (filepath, filename) + getter(stat)
+            hits += [columns + match for match in matches]
+    if crawler.actions and hits:
+        # Actions get files with matches at once, lines of a file are skipped, if not all actions were successful
+        paths = list(dict.fromkeys(hit[0] for hit in hits))
+        passed = dict(zip(paths, crawler.execute_actions_batch(paths)))
+        hits = [hit for hit in hits if passed[hit[0]]]
+    return hits, chunks
+
+
+class CrawlerFs(FollowSymlinks, ListingIndex, FilePredicate, PruneRules, Crawler):
     """
     Crawl through filesystem and find all files.
     Supporting two collection modes:
       - MODE_SIMPLE: (PATH)
       - MODE_EXTENDED: (PATH, SIZE, MODIFIED, ACCESSED)
     MODE_EXTENDED is slower, because os.stat has to be called for every hit.
+    Subclass can collect other stat columns (inode, mode, uid, ctime) by its hits_header, see stat_header.
+    With follow_symlinks, symlinked files and directories are crawled too. Every physical directory
+    (st_dev, st_ino) is crawled once per crawl, its other paths (symlinks, bind mounts) are skipped.
+    With index, listings of directories are kept in CrawlIndex, rescan lists only directories which mtime changed.
+    With file_filter, only files passing FileFilter (name, extension, size, mtime, owner) are hits.
+    With exclude rules (gitignore syntax) or ignore_file (e.g. ".ignore", rules of its directory tree),
+    excluded directories are never listed and excluded files are never hits.
     """
 
     def __init__(self, links: List[str], max_depth: int = inf_int, mode: Mode = Mode.SIMPLE,
-                 actions: Optional[Tuple[Action, ...]] = None, *args, **kwargs) -> None:
+                 actions: Optional[Tuple[Action, ...]] = None, follow_symlinks: bool = False,
+                 index: Optional[Union['CrawlIndex', str]] = None, file_filter: Optional['FileFilter'] = None,
+                 exclude: Optional[Union['IgnoreRules', Iterable[str]]] = None, ignore_file: Optional[str] = None,
+                 *args, **kwargs) -> None:
         """
         Crawl is finished when links list is empty.
         :param list links: List of paths / entrypoints
         :param int max_depth: Maximum crawl depth (how deep crawler goes)
         :param str mode: Data collection mode
+        :param bool follow_symlinks: Follow symlinks, crawl every physical directory once
+        :param index: CrawlIndex or path of its database
+        :param FileFilter file_filter: filter of files, evaluated before is_hit
+        :param exclude: IgnoreRules or exclude rules in gitignore syntax, patterns with a slash are absolute
+        :param str ignore_file: name of ignore files with rules of their directories
         :param args: other positional argument
         :param kwargs: other key arguments
         """
         assert max_depth >= 0
         self.actions = actions
         self.max_depth = max_depth
-        super().__init__(links, mode, actions, args, kwargs)
+        self.follow_symlinks = follow_symlinks
+        self.index = index
+        self.file_filter = file_filter
+        self.exclude = exclude
+        self.ignore_file = ignore_file
+        super().__init__(links, mode, actions, *args, **kwargs)
+        # Fail early, if hits header has columns which can't be collected
+        stat_getter(self.hits_header(self.mode))
 
     @staticmethod
     def links_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
@@ -43,38 +289,22 @@ class CrawlerFs(Crawler):
     @staticmethod
     def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
         if mode == Mode.EXTENDED:
-            return ((Header.PATH, str, None),
-                    (Header.NAME, str, None),
-                    (Header.SIZE, float, "byte"),
-                    (Header.MODIFIED, float, "timestamp"),
-                    (Header.ACCESSED, float, "timestamp"))
-
-        return ((Header.PATH, str, None),
-                (Header.NAME, str, None))
+            return stat_header(Header.SIZE, Header.MODIFIED, Header.ACCESSED)
+        return stat_header()
 
     @staticmethod
     def crawl_modes() -> List[Mode]:
         return [Mode.SIMPLE, Mode.EXTENDED]
 
-    def init_entrypoint(self) -> Tuple[List, List]:
+    def init_entrypoint(self) -> Listing:
         """
-        Walk directory and extract list of dirs, files
-        :return tuple: ([dirs], [files])
+        Walk directory and extract list of dirs, files and exclude rules of the directory
+        :return tuple: ([dirs], [files], IgnoreChain or None)
         """
-        try:
-            files, dirs = [], []
-            for entry in os.scandir(self.entrypoint):
-                if entry.is_file(follow_symlinks=False):
-                    files.append((entry.name, entry.path))
-                elif entry.is_dir(follow_symlinks=False):
-                    dirs.append(entry.path)
-                else:
-                    # entry is not dir nor file, count it as a skipped link
-                    self.results.links_skipped.append(entry.path)
-            return dirs, files
-        except (PermissionError, OSError):
-            # Raise an error if for any reason scandir fails
-            raise CrawlException("Entrypoint cannot be accessed!")
+        dirs, files, others = scan_dir(self.entrypoint, self.visited_set(), self.index)
+        # entries which are not dirs nor files are counted as skipped links
+        self.results.links_skipped += others
+        return dirs, files, self.ignore_chain(self.entrypoint, files)
 
     def close_entrypoint(self) -> None:
         """
@@ -90,34 +320,20 @@ class CrawlerFs(Crawler):
         Collect filenames, filesize, modification and access time
         :return list: list of files
         """
-        _, files = self.metadata
-        hits: List[Tuple[Any, ...]] = []
-        for filename, filepath in files:
-            if self.is_hit(filename):
-                if not self.execute_actions(filepath):
-                    # Skip hit, if not all actions were successful
-                    continue
-                if self.mode == Mode.SIMPLE:
-                    hits.append((filepath, filename))
-                elif self.mode == Mode.EXTENDED:
-                    try:
-                        file_stat = os.stat(filepath)
-                        hits.append((filepath, filename, file_stat.st_size, file_stat.st_mtime, file_stat.st_atime))
-                    except FileNotFoundError:
-                        # Ignore if File does not exist anymore
-                        # this can happen for linux processes and such
-                        continue
-        return hits
+        _, files, chain = self.metadata
+        return collect_hits(self, files, chain)
 
     def extract_links(self) -> List[Tuple]:
         """
-        Extract all other directories in entrypoint.
+        Extract all other directories in entrypoint, excluded directories are pruned.
         :return list: list of directories
         """
-        dirs, _ = self.metadata
+        dirs, _, chain = self.metadata
         links = []
         for dir_path in dirs:
             if self.is_link(dir_path):
+                if chain is not None and chain.excluded(dir_path, os.path.basename(dir_path), True):
+                    continue
                 links.append(dir_path, )
         return links
 
@@ -138,7 +354,7 @@ class CrawlerFs(Crawler):
         return self.entrypoint.count(os.sep) < self.max_depth
 
 
-class CrawlerSearchFs(CrawlerFs):
+class CrawlerSearchFs(SearchPattern, CrawlerFs):
     """
     Crawl through filesystem and find all files matching regexp pattern.
     """
@@ -153,13 +369,321 @@ class CrawlerSearchFs(CrawlerFs):
         :param args: other positional argument
         :param kwargs: other key arguments
         """
-        self.pattern = re.compile(pattern)
-        super().__init__(links, max_depth, mode, actions, args, kwargs)
+        self.pattern = pattern
+        super().__init__(links, max_depth, mode, actions, *args, **kwargs)
+
+
+class CrawlerMultiSearchFs(MultiSearchPattern, CrawlerFs):
+    """
+    Crawl through filesystem and find all files matching any of many patterns in one pass.
+    Every hit has ids of the patterns it matched as its last column, see PatternSet.
+    """
+
+    def __init__(self, links: List[str], patterns: Iterable[Union[str, Pattern]] = (".",),
+                 max_depth: int = inf_int, mode: Mode = Mode.SIMPLE, actions: Optional[Tuple[Action, ...]] = None,
+                 *args, **kwargs) -> None:
+        """
+        :param list links: List of paths / entrypoints
+        :param patterns: regular expressions or globs with "glob:" prefix, pattern id is its index
+        :param int max_depth: Maximum crawl depth (how deep crawler goes)
+        :param str mode: Data collection mode
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        self.patterns = patterns
+        super().__init__(links, max_depth, mode, actions, *args, **kwargs)
+
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return CrawlerFs.hits_header(mode) + (PATTERNS_COLUMN,)
+
+
+class CrawlerGrepFs(ContentPattern, CrawlerSearchFs):
+    """
+    Crawl through filesystem and search regexp content pattern in files matching regexp pattern.
+    Files are memory-mapped and searched in bytes mode, the first match of every matching line is a hit.
+    Line number and byte offset of the match are the last two hit columns.
+    Binary files (NUL byte in the first 8 KiB) are not searched, unless binary is True.
+    Size of searched files is limited by max_size of file_filter, larger files are never read.
+    Files over chunk_size are split to chunks, chunks are crawled as links (FileChunk), so chunks of one large file
+    are searched by many workers. Actions are executed once per chunk with matches.
+    Worker numbers lines of the chunk from its first line, line numbers are resolved in the file by finish_results,
+    once all chunks are crawled. Hits streamed or written to a sink keep line numbers relative to the chunk.
+    """
+
+    def __init__(self, links: List[str], content: Union[str, bytes, Pattern] = ".", pattern: str = ".",
+                 max_depth: int = inf_int, mode: Mode = Mode.SIMPLE, actions: Optional[Tuple[Action, ...]] = None,
+                 chunk_size: int = 2 ** 26, binary: bool = False, *args, **kwargs) -> None:
+        """
+        :param list links: List of paths / entrypoints
+        :param content: regular expression searched in lines of files, str is searched as utf-8
+        :param str pattern: regular expression pattern of filenames to search in
+        :param int max_depth: Maximum crawl depth (how deep crawler goes)
+        :param str mode: Data collection mode
+        :param int chunk_size: Files over chunk_size bytes are searched by chunks of this size
+        :param bool binary: Search binary files too
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        assert chunk_size >= 1
+        self.content = content
+        self.chunk_size = chunk_size
+        self.binary = binary
+        # Chunks of large files found by the last extract_hits
+        self.chunks: List[FileChunk] = []
+        # Matches of the chunk scanned by the last init_entrypoint
+        self.matches: List[Match] = []
+        # Numbers of hits and followed links resolved by the last iteration, see __next__
+        self.finished = (0, 0)
+        super().__init__(links, pattern, max_depth, mode, actions, *args, **kwargs)
+
+    def __next__(self):
+        """
+        Crawl next link, resolve line numbers of chunk hits when the frontier is empty.
+        :return CrawlerGrepFs: self object
+        """
+        try:
+            return super().__next__()
+        except StopIteration:
+            hits, links_followed = len(self.results.hits), len(self.results.links_followed)
+            self.finish_results(self.results, *self.finished)
+            self.finished = (hits, links_followed)
+            raise
+
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return CrawlerFs.hits_header(mode) + MATCH_COLUMNS
+
+    @staticmethod
+    def finish_results(results: Results, hits_start: int = 0, followed_start: int = 0) -> None:
+        """
+        Resolve line numbers of new chunk hits by newlines of chunks followed since followed_start.
+        :param Results results: collected results
+        :param int hits_start: index of the first new hit
+        :param int followed_start: index of the first new followed link
+        :return: None
+        """
+        resolve_lines(results.hits, hits_start, results.links_followed[followed_start:])
+
+    def init_entrypoint(self) -> Listing:
+        """
+        Walk directory and extract list of dirs, files and exclude rules of the directory.
+        Chunk has no listing, it's scanned and replaced by the scanned chunk.
+        :return tuple: ([dirs], [files], IgnoreChain or None)
+        """
+        if isinstance(self.entrypoint, FileChunk):
+            try:
+                self.entrypoint, self.matches = grep_chunk(self.entrypoint, self.content)
+            except OSError:
+                raise CrawlException("Entrypoint cannot be accessed!")
+            return [], [], None
+        return super().init_entrypoint()
+
+    def extract_hits(self) -> List[Tuple[Any, ...]]:
+        """
+        Search lines of files in entrypoint, large files are left to extract_links as chunks.
+        Matching lines of the chunk are hits, if entrypoint is a chunk.
+        :return list: list of matching lines
+        """
+        if isinstance(self.entrypoint, FileChunk):
+            matches, self.matches = self.matches, []
+            return self.chunk_hits(self.entrypoint, matches)
+        _, files, chain = self.metadata
+        hits, self.chunks = grep_hits(self, files, chain)
+        return hits
+
+    def extract_links(self) -> List[Any]:
+        """
+        Extract all other directories in entrypoint and chunks of its large files.
+        :return list: list of directories and chunks
+        """
+        if isinstance(self.entrypoint, FileChunk):
+            return []
+        links: List[Any] = super().extract_links()
+        links += self.chunks
+        self.chunks = []
+        return links
+
+    def chunk_hits(self, chunk: FileChunk, matches: List[Match]) -> List[Tuple[Any, ...]]:
+        """
+        Make hits of matching lines of the chunk.
+        :param FileChunk chunk: chunk of a large file
+        :param list matches: matches in the chunk
+        :return list: list of matching lines
+        """
+        if not matches:
+            return []
+        getter, _ = stat_getter(self.hits_header(self.mode))
+        try:
+            if not self.execute_actions(chunk.path):
+                return []
+            columns = (chunk.path, os.path.basename(chunk.path))
+            if getter is not None:
+                columns += getter(os.stat(chunk.path))
+        except OSError:
+            raise CrawlException("Entrypoint cannot be accessed!")
+        return [columns + match for match in matches]
+
+
+class AsyncCrawlerFs(FollowSymlinks, ListingIndex, FilePredicate, PruneRules, AsyncCrawler):
+    """
+    Crawl through filesystem asynchronously and find all files.
+    Directories are listed in the crawler's executor, so many directories of slow (network) mounts
+    are listed at once. Collection modes, follow_symlinks, index, file_filter and exclude rules are the same
+    as in CrawlerFs.
+    """
+
+    def __init__(self, links: List[str], max_depth: int = inf_int, mode: Mode = Mode.SIMPLE,
+                 actions: Optional[Tuple[Action, ...]] = None, concurrency: int = 64, follow_symlinks: bool = False,
+                 index: Optional[Union['CrawlIndex', str]] = None, file_filter: Optional['FileFilter'] = None,
+                 exclude: Optional[Union['IgnoreRules', Iterable[str]]] = None, ignore_file: Optional[str] = None,
+                 *args, **kwargs) -> None:
+        """
+        :param list links: List of paths / entrypoints
+        :param int max_depth: Maximum crawl depth (how deep crawler goes)
+        :param str mode: Data collection mode
+        :param int concurrency: Maximum number of directories crawled at once
+        :param bool follow_symlinks: Follow symlinks, crawl every physical directory once
+        :param index: CrawlIndex or path of its database
+        :param FileFilter file_filter: filter of files, evaluated before is_hit
+        :param exclude: IgnoreRules or exclude rules in gitignore syntax, patterns with a slash are absolute
+        :param str ignore_file: name of ignore files with rules of their directories
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        assert max_depth >= 0
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self.index = index
+        self.file_filter = file_filter
+        self.exclude = exclude
+        self.ignore_file = ignore_file
+        super().__init__(links, mode, actions, concurrency, *args, **kwargs)
+        stat_getter(self.hits_header(self.mode))
+
+    @staticmethod
+    def links_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return CrawlerFs.links_header(mode)
+
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return CrawlerFs.hits_header(mode)
+
+    @staticmethod
+    def crawl_modes() -> List[Mode]:
+        return CrawlerFs.crawl_modes()
+
+    async def init_entrypoint(self, entrypoint: str) -> Listing:
+        """
+        List directory in the executor and extract list of dirs, files and exclude rules of the directory
+        :param str entrypoint: Directory path
+        :return tuple: ([dirs], [files], IgnoreChain or None)
+        """
+        dirs, files, others = await self.run_blocking(scan_dir, entrypoint, self.visited_set(), self.index)
+        # entries which are not dirs nor files are counted as skipped links
+        self.results.links_skipped += others
+        return dirs, files, await self.async_ignore_chain(entrypoint, files)
+
+    async def close_entrypoint(self, entrypoint: str, metadata: Listing) -> None:
+        """
+        Just pass, as we didn't allocate any resources.
+        :return: None
+        """
+        pass
+
+    async def extract_hits(self, entrypoint: str, metadata: Listing) -> List[Tuple[Any, ...]]:
+        """
+        Extract all files in entrypoint, actions and stat calls run in the executor.
+        Collect only filenames in SIMPLE_MODE
+        Collect filenames, filesize, modification and access time in EXTENDED_MODE
+        :return list: list of files
+        """
+        _, files, chain = metadata
+        return await self.run_blocking(collect_hits, self, files, chain)
+
+    async def extract_links(self, entrypoint: str, metadata: Listing) -> List[str]:
+        """
+        Extract all other directories in entrypoint, if depth of entrypoint is < than max_depth.
+        Excluded directories are pruned.
+        :return list: list of directories
+        """
+        if entrypoint.count(os.sep) >= self.max_depth:
+            return []
+        dirs, _, chain = metadata
+        if chain is not None:
+            return [dir_path for dir_path in dirs
+                    if self.is_link(dir_path) and not chain.excluded(dir_path, os.path.basename(dir_path), True)]
+        return [dir_path for dir_path in dirs if self.is_link(dir_path)]
+
+    async def async_ignore_chain(self, entrypoint: str, files: Files) -> Optional['IgnoreChain']:
+        """
+        Get exclude rules of the entrypoint, ignore files are read in the executor.
+        :param str entrypoint: Directory path
+        :param list files: listing of the directory
+        :return IgnoreChain: rules or None if there are no rules
+        """
+        if self.ignore_file is None:
+            return self.ignore_chain(entrypoint, files)
+        return await self.run_blocking(self.ignore_chain, entrypoint, files)
 
     def is_hit(self, item: str) -> bool:
         """
-        Check if pattern was found in filepath
+        Just return True, since every item is already a file.
         :param str item: Filepath
-        :return: True if pattern wqs found in string
+        :return bool: True
+        """
+        return True
+
+    def is_link(self, item: str) -> bool:
+        """
+        Just return True, depth is checked per entrypoint in extract_links.
+        :param str item: Directory
+        :return bool: True
         """
-        return self.pattern.search(item) is not None
+        return True
+
+
+class AsyncCrawlerSearchFs(SearchPattern, AsyncCrawlerFs):
+    """
+    Crawl through filesystem asynchronously and find all files matching regexp pattern.
+    """
+
+    def __init__(self, links: List[str], pattern: str = ".", max_depth: int = inf_int, mode: Mode = Mode.SIMPLE,
+                 actions: Optional[Tuple[Action, ...]] = None, concurrency: int = 64, *args, **kwargs) -> None:
+        """
+        :param list links: List of paths / entrypoints
+        :param str pattern: regular expression pattern used to search for hits
+        :param int max_depth: Maximum crawl depth (how deep crawler goes)
+        :param str mode: Data collection mode
+        :param int concurrency: Maximum number of directories crawled at once
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        self.pattern = pattern
+        super().__init__(links, max_depth, mode, actions, concurrency, *args, **kwargs)
+
+
+class AsyncCrawlerMultiSearchFs(MultiSearchPattern, AsyncCrawlerFs):
+    """
+    Crawl through filesystem asynchronously and find all files matching any of many patterns in one pass.
+    Every hit has ids of the patterns it matched as its last column, see PatternSet.
+    """
+
+    def __init__(self, links: List[str], patterns: Iterable[Union[str, Pattern]] = (".",),
+                 max_depth: int = inf_int, mode: Mode = Mode.SIMPLE, actions: Optional[Tuple[Action, ...]] = None,
+                 concurrency: int = 64, *args, **kwargs) -> None:
+        """
+        :param list links: List of paths / entrypoints
+        :param patterns: regular expressions or globs with "glob:" prefix, pattern id is its index
+        :param int max_depth: Maximum crawl depth (how deep crawler goes)
+        :param str mode: Data collection mode
+        :param int concurrency: Maximum number of directories crawled at once
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        self.patterns = patterns
+        super().__init__(links, max_depth, mode, actions, concurrency, *args, **kwargs)
+
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return CrawlerMultiSearchFs.hits_header(mode)
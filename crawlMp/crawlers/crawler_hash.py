@@ -0,0 +1,124 @@
+import os
+from typing import Any, List, Optional, Tuple, Union
+
+from crawlMp import CrawlException
+from crawlMp.actions.action import Action
+from crawlMp.crawlers.crawler import Crawler
+from crawlMp.enums import Mode, Header, Header_ref
+from crawlMp.hashing import HashCache, full_digest, partial_digest
+
+
+class CrawlerHash(Crawler):
+    """
+    Hash files given as links, every file is one link, so files are hashed in parallel by all workers.
+    With partial block size, only the first and the last block of the file are hashed, smaller files whole.
+    Hits are (PATH, SIZE, DIGEST), size is taken right before the file is hashed.
+    With cache, digest of the file with unchanged (st_dev, st_ino, size, mtime) is taken from HashCache.
+    Files which can't be read are skipped links.
+    """
+
+    def __init__(self, links: List[str], partial: int = 0, algorithm: str = "blake2b",
+                 cache: Optional[Union[HashCache, str]] = None, mode: Mode = Mode.SIMPLE,
+                 actions: Optional[Tuple[Action, ...]] = None, *args, **kwargs) -> None:
+        """
+        :param list links: List of file paths
+        :param int partial: Size of the head and the tail block to hash, 0 to hash whole files
+        :param str algorithm: hashlib algorithm
+        :param cache: HashCache or path of its database
+        :param str mode: Data collection mode
+        :param args: other positional argument
+        :param kwargs: other key arguments
+        """
+        assert partial >= 0
+        self.partial = partial
+        self.algorithm = algorithm
+        self.cache = cache
+        super().__init__(links, mode, actions, *args, **kwargs)
+
+    @property
+    def cache(self) -> Optional[HashCache]:
+        return self._cache
+
+    @cache.setter
+    def cache(self, new_cache: Optional[Union[HashCache, str]]) -> None:
+        if isinstance(new_cache, str):
+            new_cache = HashCache(new_cache)
+        self._cache = new_cache
+
+    @property
+    def kind(self) -> str:
+        """
+        Kind of the digest in the cache.
+        """
+        return self.algorithm if self.partial == 0 else "%s:%d" % (self.algorithm, self.partial)
+
+    @staticmethod
+    def links_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return (Header.PATH, str, None),
+
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return (Header.PATH, str, None), (Header.SIZE, int, "byte"), (Header.DIGEST, bytes, None)
+
+    @staticmethod
+    def crawl_modes() -> List[Mode]:
+        return [Mode.SIMPLE]
+
+    def init_entrypoint(self) -> Tuple[int, bytes]:
+        """
+        Hash the file, unless cache has its digest.
+        :return tuple: (size, digest)
+        """
+        try:
+            stat = os.stat(self.entrypoint)
+            digest = None if self.cache is None else self.cache.get(stat, self.kind)
+            if digest is None:
+                if self.partial:
+                    digest = partial_digest(self.entrypoint, stat.st_size, self.partial, self.algorithm)
+                else:
+                    digest = full_digest(self.entrypoint, self.algorithm)
+                if self.cache is not None:
+                    self.cache.put(stat, self.kind, digest)
+        except OSError:
+            raise CrawlException("Entrypoint cannot be accessed!")
+        return stat.st_size, digest
+
+    def close_entrypoint(self) -> None:
+        """
+        Just pass, file is already closed.
+        :return: None
+        """
+        pass
+
+    def extract_hits(self) -> List[Tuple[str, int, bytes]]:
+        """
+        Hash of the file is the only hit.
+        :return list: [(path, size, digest)]
+        """
+        if not self.execute_actions(self.entrypoint):
+            return []
+        size, digest = self.metadata
+        return [(self.entrypoint, size, digest)]
+
+    def extract_links(self) -> List[Any]:
+        """
+        Files have no links.
+        :return list: empty list
+        """
+        return []
+
+    def is_hit(self, item: str) -> bool:
+        """
+        Just return True, every file is hashed.
+        :param str item: Filepath
+        :return bool: True
+        """
+        return True
+
+    def is_link(self, item: str) -> bool:
+        """
+        Just return True, links are given files.
+        :param str item: Filepath
+        :return bool: True
+        """
+        return True
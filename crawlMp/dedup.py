@@ -0,0 +1,120 @@
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs
+from crawlMp.crawlers.crawler_hash import CrawlerHash
+from crawlMp.enums import Backend, Mode
+from crawlMp.filters import FileFilter
+from crawlMp.hashing import HashCache
+from crawlMp.pool import CrawlPool
+
+
+def same_groups(items: Iterable[Tuple[Hashable, str]]) -> Dict[Hashable, List[str]]:
+    """
+    Group paths by their key, only groups of two or more paths are kept.
+    :param items: (key, path)
+    :return dict: {key: paths}
+    """
+    groups: Dict[Hashable, List[str]] = defaultdict(list)
+    for key, path in items:
+        groups[key].append(path)
+    return {key: paths for key, paths in groups.items() if len(paths) > 1}
+
+
+class DuplicateFinder:
+    """
+    Find files with the same content in stages, every stage reads only files left by the previous one:
+      - crawl with CrawlerFs in EXTENDED mode, group files by size, files with unique size are done
+      - hash first and last partial bytes of same-size files, group by (size, partial digest)
+      - hash remaining files whole, group by (size, digest)
+    Files of at most 2 * partial bytes are hashed whole by the partial stage, they skip the last one.
+    All stages run on the same CrawlPool, hashing stages give every file to the workers as one link.
+    Files are stat-ed by the workers, but grouping by size runs in the parent, it needs sizes of all files
+    and it's a single pass over the columnar hits.
+    With cache, digests of files with unchanged (st_dev, st_ino, size, mtime) are reused between runs.
+    Hard links of one file are reported as duplicates too.
+    """
+
+    def __init__(self, num_proc: int = 4, buffer_size: int = 16, num_threads: int = 1,
+                 backend: Union[Backend, str] = Backend.PROCESS, pool: Optional[CrawlPool] = None,
+                 cache: Optional[Union[HashCache, str]] = None, partial: int = 4096, min_size: int = 1,
+                 algorithm: str = "blake2b") -> None:
+        """
+        :param int num_proc: Number of workers (processes or threads, depending on backend)
+        :param int buffer_size: Size of links buffer, hashed files are sent after every buffer_size files
+        :param int num_threads: Number of crawling threads per worker
+        :param backend: Backend.PROCESS or Backend.THREAD
+        :param CrawlPool pool: running pool of workers, num_proc, buffer_size, num_threads and backend are
+                               taken from the pool
+        :param cache: HashCache or path of its database
+        :param int partial: Size of the head and the tail block hashed by the partial stage
+        :param int min_size: Smaller files are not compared, empty files are all the same
+        :param str algorithm: hashlib algorithm
+        """
+        assert partial >= 1
+        assert min_size >= 0
+        self.num_proc = num_proc
+        self.buffer_size = buffer_size
+        self.num_threads = num_threads
+        self.backend = Backend(backend)
+        self.pool = pool
+        self.cache = HashCache(cache) if isinstance(cache, str) else cache
+        self.partial = partial
+        self.min_size = min_size
+        self.algorithm = algorithm
+        # Number of files entering every stage of the last run
+        self.stats: Dict[str, int] = {}
+
+    def find(self, links: List[str], **kwargs: Any) -> List[List[str]]:
+        """
+        Find duplicate files under links.
+        :param list links: List of paths / entrypoints
+        :param kwargs: other key arguments of CrawlerFs (max_depth, exclude, file_filter, ...), file_filter
+                       defaults to files of at least min_size bytes
+        :return list: groups of paths of files with the same content, sorted
+        """
+        pool = self.pool
+        if pool is None:
+            pool = CrawlPool(self.num_proc, self.buffer_size, self.num_threads, self.backend,
+                             visited_size=2 ** 20 if kwargs.get("follow_symlinks") else 0).start()
+        try:
+            kwargs.setdefault("file_filter", FileFilter(min_size=self.min_size))
+            manager = CrawlMp(CrawlerFs, links, pool=pool, columnar=True, mode=Mode.EXTENDED, **kwargs)
+            manager.start()
+            self.stats = {"files": len(manager.results.hits)}
+            by_size = same_groups((size, path) for path, _, size, _, _ in manager.results.hits
+                                  if size >= self.min_size)
+
+            candidates = [path for paths in by_size.values() for path in paths]
+            self.stats["partial"] = len(candidates)
+            by_partial = same_groups(((size, digest), path) for path, size, digest
+                                     in self.hash(pool, candidates, self.partial))
+            # Partial digest of a small file is its full digest
+            groups = [paths for (size, _), paths in by_partial.items() if size <= 2 * self.partial]
+
+            candidates = [path for (size, _), paths in by_partial.items() if size > 2 * self.partial
+                          for path in paths]
+            self.stats["full"] = len(candidates)
+            by_digest = same_groups(((size, digest), path) for path, size, digest
+                                    in self.hash(pool, candidates, 0))
+            groups += by_digest.values()
+        finally:
+            if self.pool is None:
+                pool.close()
+        return sorted(sorted(paths) for paths in groups)
+
+    def hash(self, pool: CrawlPool, paths: List[str], partial: int) -> List[Tuple[str, int, bytes]]:
+        """
+        Hash files by the workers of the pool.
+        :param CrawlPool pool: running pool
+        :param list paths: file paths
+        :param int partial: Size of the head and the tail block, 0 to hash whole files
+        :return list: [(path, size, digest)]
+        """
+        if not paths:
+            return []
+        manager = CrawlMp(CrawlerHash, paths, pool=pool, partial=partial, algorithm=self.algorithm,
+                          cache=self.cache)
+        manager.start()
+        return list(manager.results.hits)
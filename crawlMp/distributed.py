@@ -0,0 +1,424 @@
+import socket
+from collections import deque
+from itertools import count, islice
+from multiprocessing import AuthenticationError, Event, Process
+from multiprocessing.connection import Connection, Listener, answer_challenge, deliver_challenge
+from threading import Condition, Thread
+from time import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+from crawlMp import CrawlException
+from crawlMp.actions.action import Action
+from crawlMp.crawlers.crawler import BaseCrawler, Crawler
+from crawlMp.enums import Mode, Message
+from crawlMp.results import Results
+from crawlMp.spill import SpillStore
+
+Address = Tuple[str, int]
+
+
+def keepalive(conn: Connection) -> None:
+    """
+    Enable TCP keepalive on the connection, so connection to a host, which silently vanished, breaks.
+    :param Connection conn: connection
+    :return: None
+    """
+    sock = socket.socket(fileno=conn.fileno())
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    finally:
+        # Socket doesn't own the descriptor, connection does
+        sock.detach()
+
+
+class Coordinator:
+    """
+    Coordinator of distributed crawl.
+    Coordinator owns the frontier and aggregates Results, RemoteWorkers connect to it over TCP.
+    Workers pull batches of links and push back results together with links they extracted.
+    Every link handed to a worker is leased by its connection until the worker pushes results for it.
+    If worker disappears (connection is closed or broken, or worker is silent for lease_timeout seconds),
+    its leased links are put back to the frontier and crawled by other workers,
+    results of a lost worker are never counted twice.
+    Crawl is finished, when the frontier is empty and no links are leased.
+    With max_links, frontier over the limit is spilled to disk.
+    Messages are pickled, authkey must be kept secret and the coordinator must not be exposed
+    to untrusted networks, anyone knowing the key can execute code in the coordinator and workers.
+    """
+    running = False
+    stopped = False
+
+    def __init__(self, crawler_class: Type[BaseCrawler], links: List[Any], address: Address, authkey: bytes,
+                 batch_size: int = 16, mode: Mode = Mode.SIMPLE, lease_timeout: float = 60.0,
+                 max_links: Optional[int] = None, spill_dir: Optional[str] = None) -> None:
+        """
+        :param crawler_class: Crawler class used by workers, used for results header
+        :param list links: List of entrypoints
+        :param tuple address: (host, port) to listen on, port 0 picks a free port
+        :param bytes authkey: secret key used to authenticate workers
+        :param int batch_size: Maximum number of links handed to the worker at once
+        :param Mode mode: Data collection mode
+        :param float lease_timeout: Seconds without any message, after which the worker is considered lost
+        :param int max_links: Maximum number of links of the frontier kept in memory, the rest is spilled to disk
+        :param str spill_dir: directory for spilled links, system temporary directory if None
+        """
+        self.crawler_class = crawler_class
+        self.batch_size = batch_size
+        self.authkey = authkey
+        self.lease_timeout = lease_timeout
+        self.frontier: Deque[Any] = deque(links)
+        self.max_links = max_links
+        self.spill = SpillStore(spill_dir, max(1, (max_links or 0) // 2))
+        self._spill_links()
+        self.leases: Dict[int, List[Any]] = {}
+        self.lease_ids = count()
+        self.cond = Condition()
+        self.serve_threads: List[Thread] = []
+        self.results = Results(crawler_class.hits_header(mode), crawler_class.links_header(mode))
+        self.listener = Listener(address, authkey=authkey)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @batch_size.setter
+    def batch_size(self, new_batch_size: int) -> None:
+        assert new_batch_size >= 1
+        self._batch_size = new_batch_size
+
+    @property
+    def authkey(self) -> bytes:
+        return self._authkey
+
+    @authkey.setter
+    def authkey(self, new_authkey: bytes) -> None:
+        assert isinstance(new_authkey, bytes) and new_authkey
+        self._authkey = new_authkey
+
+    @property
+    def lease_timeout(self) -> float:
+        return self._lease_timeout
+
+    @lease_timeout.setter
+    def lease_timeout(self, new_lease_timeout: float) -> None:
+        assert new_lease_timeout > 0
+        self._lease_timeout = new_lease_timeout
+
+    @property
+    def max_links(self) -> Optional[int]:
+        return self._max_links
+
+    @max_links.setter
+    def max_links(self, new_max_links: Optional[int]) -> None:
+        assert new_max_links is None or new_max_links >= 1
+        self._max_links = new_max_links
+
+    @property
+    def address(self) -> Address:
+        return self.listener.address
+
+    @property
+    def done(self) -> bool:
+        """
+        All links were crawled and results of all of them were collected.
+        Doesn't acquire the lock, use it in wait_for predicates.
+        """
+        return not self.frontier and not self.spill and not any(self.leases.values())
+
+    def start(self, callback: Optional[Callable] = None) -> None:
+        """
+        Start accepting workers and block until crawl is done.
+        If callback is set, then run coordinator in the Thread and call callback in the end.
+        :param callable callback: Callable
+        :return: None
+        """
+        if self.running:
+            raise CrawlException("Crawling is already in progress.")
+        self.running = True
+        self.stopped = False
+        self.results.start_time = time()
+        if callback is None:
+            self._start()
+        else:
+            assert callable(callback)
+            Thread(target=self._start, args=(callback,)).start()
+
+    def _start(self, callback: Optional[Callable] = None) -> 'Coordinator':
+        """
+        Accept workers until crawl is done or stopped.
+        :param Callable callback: callback function
+        :return Coordinator: self object
+        """
+        accept_thread = Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+        with self.cond:
+            self.cond.wait_for(lambda: self.done or not self.running)
+            self.running = False
+            # Workers waiting for links are sent home
+            self.cond.notify_all()
+        # Wake accept thread up by a connection, which fails authentication, closing the listener doesn't
+        # interrupt accept
+        try:
+            socket.create_connection(self.address).close()
+        except OSError:
+            pass
+        accept_thread.join(self.lease_timeout)
+        self.listener.close()
+        # Serve threads answer the next request of their worker with None, worker silent for
+        # lease_timeout is lost anyway
+        for thread in self.serve_threads:
+            thread.join(self.lease_timeout)
+        self.spill.close()
+        self.crawler_class.finish_results(self.results)
+        self.results.done_time = time()
+        if callback is not None:
+            callback(self)
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop crawling, workers waiting for links are sent home.
+        :return: None
+        """
+        with self.cond:
+            self.running = False
+            self.stopped = True
+            self.cond.notify_all()
+
+    def _accept(self) -> None:
+        """
+        Accept connections of workers, serve every worker in its own thread.
+        :return: None
+        """
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except (AuthenticationError, EOFError):
+                continue
+            except OSError:
+                # Listener was closed
+                break
+            if not self.running:
+                conn.close()
+                break
+            thread = Thread(target=self._serve, args=(conn,), daemon=True)
+            self.serve_threads.append(thread)
+            thread.start()
+
+    def _serve(self, conn: Connection) -> None:
+        """
+        Serve requests of one worker until it disconnects, is silent for lease_timeout or crawl is over.
+        Every request is answered, None tells the worker to finish.
+        Links leased by the worker are returned to the frontier when connection ends.
+        :param Connection conn: worker connection
+        :return: None
+        """
+        lease_id = next(self.lease_ids)
+        with self.cond:
+            self.leases[lease_id] = []
+        try:
+            keepalive(conn)
+            while conn.poll(self.lease_timeout):
+                message, *payload = conn.recv()
+                if message == Message.PULL:
+                    reply = self._lease(lease_id)
+                elif message == Message.PUSH:
+                    self._collect(lease_id, *payload)
+                    reply = True if self.running else None
+                else:
+                    reply = True
+                conn.send(reply)
+                if reply is None:
+                    break
+        except (EOFError, OSError):
+            # Worker disappeared
+            pass
+        finally:
+            with self.cond:
+                self.frontier.extend(self.leases.pop(lease_id))
+                self._spill_links()
+                self.cond.notify_all()
+            conn.close()
+
+    def _lease(self, lease_id: int) -> Optional[List[Any]]:
+        """
+        Block until there are links in the frontier and lease batch of them.
+        :param int lease_id: worker lease
+        :return list: links or None if crawl is over
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.frontier or self.spill or self.done or not self.running)
+            if not (self.frontier or self.spill) or not self.running:
+                return None
+            if not self.frontier:
+                # Page spilled links back in
+                self.frontier.extend(self.spill.pop())
+            links = [self.frontier.popleft() for _ in range(min(self.batch_size, len(self.frontier)))]
+            self.leases[lease_id] += links
+            return links
+
+    def _collect(self, lease_id: int, hits: List[Any], links_followed: List[Any], links_skipped: List[Any],
+                 links: List[Any], links_kept: List[Any]) -> None:
+        """
+        Collect results of the worker.
+        :param int lease_id: worker lease
+        :param list hits: hits
+        :param list links_followed: followed links
+        :param list links_skipped: skipped links
+        :param list links: extracted links returned to the frontier
+        :param list links_kept: links worker keeps to crawl next, they stay leased
+        :return: None
+        """
+        with self.cond:
+            self.results.hits += hits
+            self.results.links_followed += links_followed
+            self.results.links_skipped += links_skipped
+            self.frontier.extend(links)
+            self._spill_links()
+            self.leases[lease_id] = list(links_kept)
+            self.cond.notify_all()
+
+    def _spill_links(self) -> None:
+        """
+        Spill frontier over max_links to disk, keep the first half of max_links in memory.
+        Must be called with the lock held.
+        :return: None
+        """
+        if self.max_links is not None and len(self.frontier) > self.max_links:
+            keep = max(1, self.max_links // 2)
+            self.spill.push(list(islice(self.frontier, keep, None)))
+            for _ in range(len(self.frontier) - keep):
+                self.frontier.pop()
+
+
+class RemoteWorker(Process):
+    """
+    Worker process, which connects to the Coordinator and runs Crawler.
+    Worker keeps at most buffer_size links for itself, all other extracted links are returned to the Coordinator.
+    Results are pushed after every buffer_size crawled links or after heartbeat seconds, whatever comes first,
+    so heartbeat must be well below lease_timeout of the Coordinator.
+    Worker finishes when the Coordinator tells it so or when the Coordinator is gone.
+    """
+
+    def __init__(self, crawler_class: Type[Crawler], address: Address, authkey: bytes, buffer_size: int = 16,
+                 actions: Optional[Tuple[Action, ...]] = None, heartbeat: float = 10.0, *args: Any,
+                 **kwargs: Any) -> None:
+        """
+        :param crawler_class: Crawler class
+        :param tuple address: (host, port) of the Coordinator
+        :param bytes authkey: secret key used to authenticate to the Coordinator
+        :param int buffer_size: Size of links buffer
+        :param float heartbeat: Maximum number of seconds between two pushes
+        :param args:
+        :param kwargs:
+        """
+        super().__init__()
+        self.crawler_class = crawler_class
+        self.address = address
+        self.authkey = authkey
+        self.heartbeat = heartbeat
+        self.buffer_size = buffer_size
+        self.actions = actions
+        self.stop_signal = Event()
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
+
+    @buffer_size.setter
+    def buffer_size(self, new_buffer_size: int) -> None:
+        assert new_buffer_size >= 1
+        self._buffer_size = new_buffer_size
+
+    @property
+    def authkey(self) -> bytes:
+        return self._authkey
+
+    @authkey.setter
+    def authkey(self, new_authkey: bytes) -> None:
+        assert isinstance(new_authkey, bytes) and new_authkey
+        self._authkey = new_authkey
+
+    @property
+    def heartbeat(self) -> float:
+        return self._heartbeat
+
+    @heartbeat.setter
+    def heartbeat(self, new_heartbeat: float) -> None:
+        assert new_heartbeat > 0
+        self._heartbeat = new_heartbeat
+
+    def run(self) -> None:
+        """
+        Worker body
+        Pull links, crawl them and push results until the Coordinator has no more links.
+        Worker ends also when the Coordinator is gone (or doesn't answer the connection within heartbeat).
+        :return: None
+        """
+        crawler = self.crawler_class(*self.args, actions=self.actions, links=None, **self.kwargs)
+        try:
+            with self.connect() as conn:
+                self.crawl(crawler, conn)
+        except (EOFError, OSError):
+            # Coordinator is gone
+            pass
+
+    def connect(self) -> Connection:
+        """
+        Connect and authenticate to the Coordinator.
+        Unlike multiprocessing.connection.Client, don't wait forever for the Coordinator, which accepted
+        connection, but never answers (e.g. listener socket was inherited by another process).
+        :return Connection: authenticated connection
+        """
+        sock = socket.create_connection(self.address, self.heartbeat)
+        sock.setblocking(True)
+        conn = Connection(sock.detach())
+        try:
+            if not conn.poll(self.heartbeat):
+                raise TimeoutError("Coordinator doesn't answer.")
+            answer_challenge(conn, self.authkey)
+            deliver_challenge(conn, self.authkey)
+            keepalive(conn)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def crawl(self, crawler: Crawler, conn: Connection) -> None:
+        """
+        Crawl loop
+        :param Crawler crawler: crawler of the worker
+        :param Connection conn: connection to the Coordinator
+        :return: None
+        """
+        while not self.stop_signal.is_set():
+            if not crawler.links:
+                conn.send((Message.PULL,))
+                links = conn.recv()
+                if links is None:
+                    # Crawl is over
+                    break
+                crawler.links += links
+            push_time = time() + self.heartbeat
+            for _ in range(self.buffer_size):
+                if not crawler.links or time() >= push_time:
+                    break
+                next(crawler)
+            results = crawler.results
+            # Links crawled last are returned, worker keeps buffer_size links crawled next
+            returned = crawler.links.split(len(crawler.links) - self.buffer_size)
+            conn.send((Message.PUSH, results.hits, results.links_followed, results.links_skipped,
+                       returned, list(crawler.links)))
+            results.reset()
+            if conn.recv() is None:
+                # Crawl was stopped
+                break
+
+    def stop(self) -> None:
+        """
+        Stop worker after current buffer is crawled, its links are returned to the Coordinator.
+        :return: None
+        """
+        self.stop_signal.set()
@@ -16,6 +16,14 @@ class Header(Enum):
     SIZE = "Size"
     MODIFIED = "Modified"
     ACCESSED = "Accessed"
+    CHANGED = "Changed"
+    INODE = "Inode"
+    MODE = "Mode"
+    UID = "Uid"
+    PATTERNS = "Patterns"
+    LINE = "Line"
+    OFFSET = "Offset"
+    DIGEST = "Digest"
     INPUT = "Input"
     OUTPUT = "Output"
 
@@ -24,3 +32,45 @@ class Header(Enum):
 
 
 Header_ref = Tuple[Header, Type, Optional[str]]
+
+
+class Backend(Enum):
+    PROCESS = "process"
+    THREAD = "thread"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Traversal(Enum):
+    BFS = "bfs"
+    DFS = "dfs"
+    PRIORITY = "priority"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Format(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    NULL = "null"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Message(Enum):
+    PULL = "pull"
+    PUSH = "push"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Record(Enum):
+    LINKS = "l"
+    BATCH = "b"
+
+    def __str__(self) -> str:
+        return self.value
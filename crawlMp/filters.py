@@ -0,0 +1,147 @@
+import os
+import re
+from fnmatch import translate
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Test = Callable[[Any], bool]
+
+# Multipliers of size suffixes, powers of 1024 as in find and du
+SIZE_UNITS = {"": 1, "k": 2 ** 10, "m": 2 ** 20, "g": 2 ** 30, "t": 2 ** 40}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse size with optional suffix, e.g. 512, 10k, 1.5M, 2G.
+    :param str size: size
+    :return int: size in bytes
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([kmgt]?)i?b?\s*", size, re.IGNORECASE)
+    if match is None:
+        raise ValueError("Invalid size: %r" % size)
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def all_of(tests: List[Test]) -> Optional[Test]:
+    """
+    Chain tests into one predicate, tests are evaluated in order until one fails.
+    :param list tests: tests
+    :return callable: predicate or None if there are no tests
+    """
+    if not tests:
+        return None
+    if len(tests) == 1:
+        return tests[0]
+    first, rest = tests[0], all_of(tests[1:])
+    return lambda value: first(value) and rest(value)
+
+
+class FileFilter:
+    """
+    Find-like filter of files, evaluated by filesystem crawlers for every file in the directory listing.
+    All given conditions must match. Filter is compiled to two predicates in every process:
+      - name test: extension, glob and regular expression, cheapest first, no system calls
+      - stat test: size, modification time and owner, file is stat-ed only if name test passed
+    Stat of the DirEntry from the listing is used and it's reused for stat columns of the hit.
+    """
+
+    def __init__(self, name: Optional[str] = None, regex: Optional[str] = None,
+                 extensions: Optional[Iterable[str]] = None, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, newer: Optional[float] = None, older: Optional[float] = None,
+                 owner: Optional[Union[int, str]] = None) -> None:
+        """
+        :param str name: glob pattern of the whole filename, e.g. "*.tar.*"
+        :param str regex: regular expression searched in the filename
+        :param extensions: allowed extensions, with or without the dot, e.g. ["zip", ".tar"]
+        :param int min_size: minimum size in bytes, inclusive
+        :param int max_size: maximum size in bytes, inclusive
+        :param float newer: modified at or after this timestamp
+        :param float older: modified before this timestamp
+        :param owner: uid or user name of the owner
+        """
+        if isinstance(owner, str):
+            # Unix only, imported when owner is given by name
+            import pwd
+            owner = pwd.getpwnam(owner).pw_uid
+        self.name = name
+        self.regex = regex
+        self.extensions = None if extensions is None else \
+            tuple(sorted({ext if ext.startswith(".") else "." + ext for ext in extensions}))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.newer = newer
+        self.older = older
+        self.owner = owner
+        self._compiled: Optional[Tuple[Optional[Test], Optional[Test]]] = None
+
+    @classmethod
+    def from_age(cls, newer_days: Optional[float] = None, older_days: Optional[float] = None,
+                 **kwargs: Any) -> 'FileFilter':
+        """
+        Build filter with modification time range given by age in days, relative to now.
+        :param float newer_days: modified within this many days
+        :param float older_days: modified more than this many days ago
+        :param kwargs: other conditions, see FileFilter
+        :return FileFilter: filter
+        """
+        now = time()
+        return cls(newer=None if newer_days is None else now - newer_days * 86400,
+                   older=None if older_days is None else now - older_days * 86400, **kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Compiled predicates are closures, every process compiles its own
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
+
+    def __repr__(self) -> str:
+        conditions = ["%s=%r" % (key, value) for key, value in self.__dict__.items()
+                      if not key.startswith("_") and value is not None]
+        return "%s(%s)" % (self.__class__.__name__, ", ".join(conditions))
+
+    def compile(self) -> Tuple[Optional[Test], Optional[Test]]:
+        """
+        Compile conditions into predicates, compiled once per process.
+        :return tuple: (name test of the filename, stat test of os.stat_result), None if there is nothing to test
+        """
+        if self._compiled is None:
+            name_tests: List[Test] = []
+            if self.extensions is not None:
+                extensions = self.extensions
+                name_tests.append(lambda name: name.endswith(extensions))
+            if self.name is not None:
+                name_tests.append(re.compile(translate(self.name)).match)
+            if self.regex is not None:
+                name_tests.append(re.compile(self.regex).search)
+            stat_tests: List[Test] = []
+            min_size, max_size, newer, older, owner = self.min_size, self.max_size, self.newer, self.older, \
+                                                      self.owner
+            if min_size is not None:
+                stat_tests.append(lambda stat: stat.st_size >= min_size)
+            if max_size is not None:
+                stat_tests.append(lambda stat: stat.st_size <= max_size)
+            if newer is not None:
+                stat_tests.append(lambda stat: stat.st_mtime >= newer)
+            if older is not None:
+                stat_tests.append(lambda stat: stat.st_mtime < older)
+            if owner is not None:
+                stat_tests.append(lambda stat: stat.st_uid == owner)
+            self._compiled = all_of(name_tests), all_of(stat_tests)
+        return self._compiled
+
+    def match(self, filepath: str, entry: Optional[os.DirEntry] = None) -> bool:
+        """
+        Check single file, crawlers evaluate compiled predicates directly.
+        :param str filepath: file path
+        :param DirEntry entry: directory entry of the file, if it's known
+        :return bool: True if file passes the filter
+        """
+        name_test, stat_test = self.compile()
+        if name_test is not None and not name_test(os.path.basename(filepath)):
+            return False
+        if stat_test is None:
+            return True
+        try:
+            return bool(stat_test(os.stat(filepath) if entry is None else entry.stat()))
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,192 @@
+import heapq
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import count
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+from crawlMp.enums import Traversal
+
+
+class Frontier(ABC):
+    """
+    Links waiting to be crawled, subclass decides which link is crawled next.
+    Adding and taking the next link costs O(1) (O(log n) in PriorityFrontier), regardless of frontier size.
+    """
+
+    def __init__(self, links: Optional[Iterable[Any]] = None) -> None:
+        """
+        :param links: initial links
+        """
+        if links is not None:
+            self.extend(links)
+
+    @abstractmethod
+    def append(self, link: Any) -> None:
+        """
+        Add link to the frontier.
+        :param Any link: link
+        :return: None
+        """
+        ...
+
+    def extend(self, links: Iterable[Any]) -> None:
+        """
+        Add links to the frontier.
+        :param links: links
+        :return: None
+        """
+        for link in links:
+            self.append(link)
+
+    def __iadd__(self, links: Iterable[Any]) -> 'Frontier':
+        self.extend(links)
+        return self
+
+    @abstractmethod
+    def pop(self) -> Any:
+        """
+        Remove and return the link to be crawled next.
+        :return Any: link
+        """
+        ...
+
+    @abstractmethod
+    def split(self, size: int) -> List[Any]:
+        """
+        Remove and return links, which would be crawled last.
+        Used to hand links over to other workers or to spill them to disk.
+        :param int size: maximum number of links
+        :return list: links
+        """
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all links.
+        :return: None
+        """
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate over links, not necessarily in crawl order.
+        """
+        ...
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, list(self))
+
+
+class FifoFrontier(Frontier):
+    """
+    First in, first out. Breadth-first traversal, shallow results come first, frontier holds whole levels.
+    """
+
+    def __init__(self, links: Optional[Iterable[Any]] = None) -> None:
+        self.links: Deque[Any] = deque()
+        super().__init__(links)
+
+    def append(self, link: Any) -> None:
+        self.links.append(link)
+
+    def extend(self, links: Iterable[Any]) -> None:
+        self.links.extend(links)
+
+    def pop(self) -> Any:
+        return self.links.popleft()
+
+    def split(self, size: int) -> List[Any]:
+        size = min(size, len(self.links))
+        links = [self.links.pop() for _ in range(size)]
+        links.reverse()
+        return links
+
+    def clear(self) -> None:
+        self.links.clear()
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.links)
+
+
+class LifoFrontier(FifoFrontier):
+    """
+    Last in, first out. Depth-first traversal, frontier holds only siblings of the current path, so memory stays low.
+    Links split off are the oldest ones, which are roots of the biggest unexplored subtrees.
+    """
+
+    def pop(self) -> Any:
+        return self.links.pop()
+
+    def split(self, size: int) -> List[Any]:
+        size = min(size, len(self.links))
+        return [self.links.popleft() for _ in range(size)]
+
+
+class PriorityFrontier(Frontier):
+    """
+    Link with the lowest key is crawled first, links with equal keys in FIFO order.
+    Key function must be picklable (module level function), if crawler runs in worker processes.
+    E.g. key=lambda path: -os.stat(path).st_nlink crawls directories with most subdirectories first.
+    """
+
+    def __init__(self, links: Optional[Iterable[Any]] = None, key: Optional[Callable[[Any], Any]] = None) -> None:
+        """
+        :param links: initial links
+        :param callable key: priority of the link, link itself if None
+        """
+        self.key = key
+        self.heap: List[Tuple[Any, int, Any]] = []
+        self.counter = count()
+        super().__init__(links)
+
+    def append(self, link: Any) -> None:
+        priority = link if self.key is None else self.key(link)
+        heapq.heappush(self.heap, (priority, next(self.counter), link))
+
+    def pop(self) -> Any:
+        return heapq.heappop(self.heap)[2]
+
+    def split(self, size: int) -> List[Any]:
+        if size <= 0:
+            return []
+        # Sorted list is a valid heap
+        self.heap.sort()
+        size = min(size, len(self.heap))
+        entries = self.heap[len(self.heap) - size:]
+        del self.heap[len(self.heap) - size:]
+        return [link for _, _, link in entries]
+
+    def clear(self) -> None:
+        self.heap.clear()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (link for _, _, link in self.heap)
+
+
+def new_frontier(traversal: Union[Traversal, str] = Traversal.BFS, key: Optional[Callable[[Any], Any]] = None,
+                 links: Optional[Iterable[Any]] = None) -> Frontier:
+    """
+    Build frontier for given traversal strategy.
+    :param traversal: Traversal.BFS, Traversal.DFS or Traversal.PRIORITY
+    :param callable key: priority of the link, used by Traversal.PRIORITY only
+    :param links: initial links
+    :return Frontier: new frontier
+    """
+    traversal = Traversal(traversal)
+    if traversal == Traversal.DFS:
+        return LifoFrontier(links)
+    if traversal == Traversal.PRIORITY:
+        return PriorityFrontier(links, key)
+    return FifoFrontier(links)
@@ -0,0 +1,230 @@
+import mmap
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from crawlMp.columns import ColumnarHits
+
+# Files with NUL byte in the head are binary, same heuristic as grep
+BINARY_HEAD = 8192
+# Newlines are counted in blocks of this size
+COUNT_BLOCK = 2 ** 24
+
+Match = Tuple[int, int]
+
+
+class FileChunk(NamedTuple):
+    """
+    Byte range of a large file, crawled as a link by any worker.
+    Worker extends the range to whole lines (see line_start) and numbers lines from the first line of the range,
+    scanned chunk records offset of that line (first) and number of newlines in the range (lines).
+    Line numbers are resolved in the file once all its chunks are scanned, see resolve_lines.
+    Chunks are equal if their ranges are equal, so scanned chunk is the same link as the crawled one.
+    """
+    path: str
+    start: int
+    end: int
+    first: int = -1
+    lines: int = -1
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FileChunk) and self[:3] == other[:3]
+
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        return hash(self[:3])
+
+
+def is_binary(head: bytes) -> bool:
+    """
+    Check if file is binary by its head.
+    :param bytes head: first BINARY_HEAD bytes of the file
+    :return bool: True if head contains NUL byte
+    """
+    return b"\0" in head
+
+
+def split_file(path: str, size: int, chunk_size: int) -> List[FileChunk]:
+    """
+    Split file to chunks of chunk_size bytes, file is not read, so chunks can be dispatched at once.
+    :param str path: file path
+    :param int size: file size
+    :param int chunk_size: size of one chunk
+    :return list: chunks
+    """
+    return [FileChunk(path, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def line_start(data: mmap.mmap, offset: int) -> int:
+    """
+    Get start of the first line starting at or after offset.
+    Neighbouring chunks compute the same border, so every line is scanned by exactly one chunk.
+    :param mmap data: mapped file
+    :param int offset: byte offset
+    :return int: offset of the line start, size of the file if there is no other line
+    """
+    if offset <= 0:
+        return 0
+    newline = data.find(b"\n", offset - 1)
+    return len(data) if newline < 0 else newline + 1
+
+
+def count_lines(data: mmap.mmap, start: int, end: int) -> int:
+    """
+    Count newlines in the byte range, range is copied in blocks of COUNT_BLOCK bytes.
+    :param mmap data: mapped file
+    :param int start: start offset
+    :param int end: end offset
+    :return int: number of newlines
+    """
+    count = 0
+    for block in range(start, end, COUNT_BLOCK):
+        count += data[block:min(end, block + COUNT_BLOCK)].count(b"\n")
+    return count
+
+
+def grep_range(data: mmap.mmap, pattern: Pattern, start: int, end: int, line: int = 1) -> List[Match]:
+    """
+    Search pattern in lines of the byte range, first match of every matching line is reported.
+    Range must start at a line start, only newlines inside the range are counted.
+    :param mmap data: mapped file
+    :param Pattern pattern: compiled bytes pattern
+    :param int start: start offset
+    :param int end: end offset
+    :param int line: number of the line starting at start
+    :return list: [(line number, byte offset of the match)]
+    """
+    matches: List[Match] = []
+    position = start
+    search = pattern.search
+    match = search(data, start, end)
+    while match is not None:
+        offset = match.start()
+        if offset >= end:
+            # Empty match at the end of the range belongs to the next line
+            break
+        line += count_lines(data, position, offset)
+        matches.append((line, offset))
+        # Continue on the next line
+        newline = data.find(b"\n", offset, end)
+        if newline < 0 or newline + 1 >= end:
+            break
+        line += 1
+        position = newline + 1
+        match = search(data, position, end)
+    return matches
+
+
+def map_file(path: str, check_binary: bool = True) -> Optional[mmap.mmap]:
+    """
+    Memory-map the file for sequential reading.
+    :param str path: file path
+    :param bool check_binary: don't map binary file
+    :return mmap: mapped file, None if the file is empty or binary
+    """
+    with open(path, "rb") as fp:
+        if check_binary and is_binary(fp.read(BINARY_HEAD)):
+            return None
+        try:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file can't be mapped
+            return None
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        data.madvise(mmap.MADV_SEQUENTIAL)
+    return data
+
+
+def grep_file(path: str, pattern: Pattern, check_binary: bool = True) -> List[Match]:
+    """
+    Memory-map the file and search pattern in its lines.
+    :param str path: file path
+    :param Pattern pattern: compiled bytes pattern
+    :param bool check_binary: return no matches for binary file
+    :return list: [(line number starting at 1, byte offset of the match)]
+    """
+    data = map_file(path, check_binary)
+    if data is None:
+        return []
+    with data:
+        return grep_range(data, pattern, 0, len(data))
+
+
+def grep_chunk(chunk: FileChunk, pattern: Pattern) -> Tuple[FileChunk, List[Match]]:
+    """
+    Memory-map the file and search pattern in lines of the chunk, chunk is scanned as text.
+    Lines are numbered from the first line of the chunk, newlines after the last match are counted,
+    so the scanned chunk carries number of its newlines.
+    Matches spanning lines are found only within one chunk.
+    :param FileChunk chunk: byte range to scan
+    :param Pattern pattern: compiled bytes pattern
+    :return tuple: (scanned chunk, [(line number in the chunk starting at 1, byte offset of the match)])
+    """
+    data = map_file(chunk.path, False)
+    if data is None:
+        return chunk._replace(first=chunk.start, lines=0), []
+    with data:
+        start = line_start(data, chunk.start)
+        end = len(data) if chunk.end >= len(data) else line_start(data, chunk.end)
+        if start >= end:
+            return chunk._replace(first=start, lines=0), []
+        matches = grep_range(data, pattern, start, end)
+        line, offset = matches[-1] if matches else (1, start)
+        return chunk._replace(first=start, lines=line - 1 + count_lines(data, offset, end)), matches
+
+
+def resolve_lines(hits: Any, start: int, links_followed: Iterable[Any]) -> None:
+    """
+    Turn line numbers of chunk hits to line numbers in their files, in place.
+    First line of the chunk follows all newlines of preceding chunks of the file, chunks are taken from links_followed.
+    Hits of the file keep line numbers relative to their chunk, if some preceding chunk was not scanned
+    (e.g. crawling was stopped).
+    :param hits: hits ending with line number and byte offset, list or ColumnarHits
+    :param int start: index of the first hit to resolve, earlier hits are resolved already
+    :param links_followed: followed links, scanned chunks among them are used
+    :return: None
+    """
+    files: Dict[str, List[FileChunk]] = {}
+    for link in links_followed:
+        if isinstance(link, FileChunk) and link.lines >= 0:
+            files.setdefault(link.path, []).append(link)
+    # Offsets of first lines of chunks and numbers of lines before them, prefix sums of chunk newlines
+    tables: Dict[str, Tuple[List[int], List[int]]] = {}
+    for path, chunks in files.items():
+        chunks.sort(key=lambda chunk: chunk.start)
+        if any(chunk.start != previous.end for previous, chunk in zip([FileChunk(path, 0, 0)] + chunks, chunks)):
+            continue
+        firsts: List[int] = []
+        bases: List[int] = []
+        base = 0
+        for chunk in chunks:
+            firsts.append(chunk.first)
+            bases.append(base)
+            base += chunk.lines
+        tables[path] = firsts, bases
+    if not tables:
+        return
+    columnar = isinstance(hits, ColumnarHits)
+    for index in range(start, len(hits)):
+        hit = hits[index]
+        table = tables.get(hit[0])
+        if table is None:
+            continue
+        firsts, bases = table
+        line = hit[-2] + bases[bisect_right(firsts, hit[-1]) - 1]
+        if columnar:
+            hits.columns[-2][index] = line
+        else:
+            hits[index] = tuple(hit[:-2]) + (line, hit[-1])
+
+
+def read_head(path: str) -> bytes:
+    """
+    Read head of the file for binary detection.
+    :param str path: file path
+    :return bytes: first BINARY_HEAD bytes
+    """
+    with open(path, "rb") as fp:
+        return fp.read(BINARY_HEAD)
+
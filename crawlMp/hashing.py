@@ -0,0 +1,136 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from time import time
+from typing import Any, Dict, Optional
+
+# Size of one read of the full hash, large sequential reads keep the disk streaming
+READ_SIZE = 2 ** 20
+
+
+def partial_digest(path: str, size: int, block: int, algorithm: str = "blake2b") -> bytes:
+    """
+    Hash first and last block of the file, file of at most two blocks is hashed whole.
+    Files of the same size differing in the head or tail (headers, trailers, appended data) are told apart
+    by reading two blocks only.
+    :param str path: file path
+    :param int size: file size
+    :param int block: size of the head and of the tail in bytes
+    :param str algorithm: hashlib algorithm
+    :return bytes: digest
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as fp:
+        if size <= 2 * block:
+            digest.update(fp.read(size))
+        else:
+            digest.update(fp.read(block))
+            fp.seek(size - block)
+            digest.update(fp.read(block))
+    return digest.digest()
+
+
+def full_digest(path: str, algorithm: str = "blake2b") -> bytes:
+    """
+    Hash whole file by large sequential reads into one reused buffer.
+    :param str path: file path
+    :param str algorithm: hashlib algorithm
+    :return bytes: digest
+    """
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as fp:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fp.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            length = fp.readinto(buffer)
+            if not length:
+                break
+            digest.update(view[:length])
+    return digest.digest()
+
+
+class HashCache:
+    """
+    Persistent cache of file digests, stored in SQLite database.
+    Digest is stored by (st_dev, st_ino) of the file and kind of the digest (algorithm and partial block size),
+    together with size and mtime of the file. Digest is valid only while size and mtime didn't change.
+    File modified less than racy_window seconds before it was hashed is not stored, because another
+    change within the same mtime tick would go unnoticed.
+    Every process and thread opens its own connection, so cache can be shared by all workers.
+    """
+
+    def __init__(self, path: str, racy_window: float = 2.0) -> None:
+        """
+        :param str path: path of the database file
+        :param float racy_window: digests of files modified within this many seconds are not stored
+        """
+        self.path = path
+        self.racy_window = racy_window
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections are never shared with other processes
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Connection of the calling thread, forked process opens a new one.
+        """
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection.execute("CREATE TABLE IF NOT EXISTS digests (dev INTEGER, ino INTEGER, kind TEXT, "
+                                     "size INTEGER, mtime INTEGER, digest BLOB, PRIMARY KEY (dev, ino, kind))")
+            local.pid = os.getpid()
+        return local.connection
+
+    def get(self, stat: os.stat_result, kind: str) -> Optional[bytes]:
+        """
+        Get digest of the file, if its size and mtime didn't change.
+        :param stat_result stat: current stat of the file
+        :param str kind: kind of the digest
+        :return bytes: digest or None if file must be hashed
+        """
+        row = self.connection.execute("SELECT size, mtime, digest FROM digests WHERE dev = ? AND ino = ? "
+                                      "AND kind = ?", (stat.st_dev, stat.st_ino, kind)).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return row[2]
+
+    def put(self, stat: os.stat_result, kind: str, digest: bytes) -> None:
+        """
+        Store digest of the file, digest of the same file and kind is replaced.
+        :param stat_result stat: stat of the file, taken before it was hashed
+        :param str kind: kind of the digest
+        :param bytes digest: digest
+        :return: None
+        """
+        if time() - stat.st_mtime_ns / 1e9 < self.racy_window:
+            return
+        self.connection.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                                (stat.st_dev, stat.st_ino, kind, stat.st_size, stat.st_mtime_ns, digest))
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close connection of the calling thread.
+        :return: None
+        """
+        local = self._local
+        if getattr(local, "pid", None) == os.getpid():
+            local.connection.close()
+            del local.connection, local.pid
@@ -0,0 +1,225 @@
+import os
+import re
+from typing import Callable, Iterable, List, Match, NamedTuple, Optional, Tuple
+
+
+class Rule(NamedTuple):
+    """
+    Compiled rule of IgnoreRules.
+    """
+    test: Callable[[str], Optional[Match]]
+    regex: str
+    literal: Optional[str]
+    negate: bool
+    dir_only: bool
+    on_path: bool
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translate gitignore glob to regular expression matching the whole string.
+    * and ? don't match "/", ** matches any number of directories in "**/", "/**/" and "/**".
+    :param str pattern: glob
+    :return str: regular expression
+    """
+    regex = []
+    index, size = 0, len(pattern)
+    while index < size:
+        char = pattern[index]
+        index += 1
+        if char == "*":
+            if pattern[index:index + 1] == "*":
+                index += 1
+                if index - 2 == 0 or pattern[index - 3] == "/":
+                    if index == size:
+                        regex.append(".*")
+                        continue
+                    if pattern[index] == "/":
+                        index += 1
+                        regex.append("(?:.*/)?")
+                        continue
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = index
+            if pattern[end:end + 1] in ("!", "^"):
+                end += 1
+            if pattern[end:end + 1] == "]":
+                end += 1
+            end = pattern.find("]", end)
+            if end < 0:
+                regex.append("\\[")
+                continue
+            content = pattern[index:end].replace("\\", "\\\\")
+            index = end + 1
+            if content[0] in "!^":
+                regex.append("[^/%s]" % content[1:])
+            else:
+                regex.append("[%s]" % content)
+        elif char == "\\" and index < size:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
+
+
+def parse_rule(line: str) -> Optional[Rule]:
+    """
+    Compile one line of gitignore syntax.
+    :param str line: line
+    :return Rule: rule or None for blank lines and comments
+    """
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        # Escaped trailing space is kept
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # Pattern with a slash is relative to the base directory, other patterns match the name at any depth
+    on_path = "/" in line
+    regex = "(?s:%s)\\Z" % translate_glob(line.lstrip("/"))
+    literal = None if on_path or any(char in "*?[\\" for char in line) else line
+    return Rule(re.compile(regex).match, regex, literal, negate, dir_only, on_path)
+
+
+class IgnoreRules:
+    """
+    Exclude rules in gitignore syntax, e.g. node_modules/, *.o, /proc, !keep.o.
+    Rules are relative to the base directory: pattern with a slash matches the path relative to it,
+    other patterns match the name of the entry in any directory. Pattern ending with a slash matches directories only.
+    Last matching rule decides, "!" rules include entries excluded by the rules before them.
+    Rules without "!" are joined, name is looked up in a set or matched by a single regex.
+    """
+
+    def __init__(self, lines: Iterable[str] = (), base: str = os.sep) -> None:
+        """
+        :param lines: rules, one per line, blank lines and lines starting with # are skipped
+        :param str base: base directory of the rules, default is the root, so patterns with a slash are absolute
+        """
+        self.lines = list(lines)
+        self.base = base
+        self.rules: List[Rule] = []
+        for line in self.lines:
+            rule = parse_rule(line)
+            if rule is not None:
+                self.rules.append(rule)
+        self.prefix = base if base.endswith(os.sep) else base + os.sep
+        self.joined: Optional[tuple] = None
+        if not any(rule.negate for rule in self.rules):
+            self.joined = self.join()
+
+    @classmethod
+    def from_file(cls, path: str, base: Optional[str] = None) -> 'IgnoreRules':
+        """
+        Load rules from ignore file.
+        :param str path: path of the file
+        :param str base: base directory, default is the directory of the file
+        :return IgnoreRules: rules
+        """
+        with open(path, "r", errors="surrogateescape") as file:
+            return cls(file.readlines(), os.path.dirname(path) if base is None else base)
+
+    def join(self) -> Tuple[frozenset, frozenset, Optional[Callable], Optional[Callable], Optional[Callable],
+                            Optional[Callable]]:
+        """
+        Join rules which can't be overridden by "!" rules, any matching rule excludes the entry.
+        :return tuple: (literal names, literal names of directories, name test of files, name test of directories,
+                       path test of files, path test of directories)
+        """
+        names, dir_names = set(), set()
+        regexes: Tuple[List[str], List[str], List[str], List[str]] = ([], [], [], [])
+        for rule in self.rules:
+            if rule.literal is not None:
+                (dir_names if rule.dir_only else names).add(rule.literal)
+                continue
+            offset = 2 if rule.on_path else 0
+            regexes[offset + 1].append(rule.regex)
+            if not rule.dir_only:
+                regexes[offset].append(rule.regex)
+        tests = tuple(re.compile("|".join(regex)).match if regex else None for regex in regexes)
+        return (frozenset(names), frozenset(dir_names)) + tests
+
+    def __getstate__(self) -> Tuple[List[str], str]:
+        # Compiled rules are bound methods of patterns, every process compiles its own
+        return self.lines, self.base
+
+    def __setstate__(self, state: Tuple[List[str], str]) -> None:
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __repr__(self) -> str:
+        return "%s(%r, %r)" % (self.__class__.__name__, self.lines, self.base)
+
+    def match(self, path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """
+        Match entry against the rules.
+        :param str path: path of the entry
+        :param str name: name of the entry
+        :param bool is_dir: True if entry is a directory
+        :return bool: True if entry is excluded, False if it's included by "!" rule, None if no rule matches
+        """
+        if self.joined is not None:
+            names, dir_names, file_test, dir_test, file_path_test, dir_path_test = self.joined
+            if name in names or (is_dir and name in dir_names):
+                return True
+            test = dir_test if is_dir else file_test
+            if test is not None and test(name) is not None:
+                return True
+            test = dir_path_test if is_dir else file_path_test
+            if test is None:
+                return None
+        relative = path[len(self.prefix):] if path.startswith(self.prefix) else None
+        if relative is not None and os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        if self.joined is not None:
+            return True if relative is not None and test(relative) is not None else None
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.on_path:
+                if relative is None or rule.test(relative) is None:
+                    continue
+            elif rule.test(name) is None:
+                continue
+            return not rule.negate
+        return None
+
+
+class IgnoreChain:
+    """
+    Rules applying to entries of one directory, ordered by precedence.
+    Rules given to the crawler come first, then rules of ignore files from the deepest directory up.
+    """
+
+    def __init__(self, rules: Tuple[IgnoreRules, ...]) -> None:
+        """
+        :param tuple rules: rules ordered by precedence
+        """
+        self.rules = rules
+
+    def excluded(self, path: str, name: str, is_dir: bool) -> bool:
+        """
+        Check if entry is excluded, first rules which match the entry decide.
+        :param str path: path of the entry
+        :param str name: name of the entry
+        :param bool is_dir: True if entry is a directory
+        :return bool: True if entry is excluded
+        """
+        for rules in self.rules:
+            result = rules.match(path, name, is_dir)
+            if result is not None:
+                return result
+        return False
@@ -0,0 +1,114 @@
+import os
+import pickle
+import sqlite3
+import threading
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+
+Listing = Tuple[List[str], List[Tuple[str, str, Optional[os.DirEntry]]], List[str]]
+
+
+class CrawlIndex:
+    """
+    Persistent index of directory listings, stored in SQLite database.
+    Every listed directory is stored with its mtime and names of its dirs, files and other entries.
+    Listing of the directory, which mtime didn't change, is taken from the index, directory is not read again.
+    Changes inside subdirectories don't change mtime of the parent, subdirectories are checked by their own mtime.
+    Directory modified less than racy_window seconds before it was listed is not stored, because another
+    change within the same mtime tick would go unnoticed.
+    Every process and thread opens its own connection, so index can be shared by all workers.
+    Directories, which don't exist anymore, stay in the index until prune removes them.
+    """
+
+    def __init__(self, path: str, racy_window: float = 2.0) -> None:
+        """
+        :param str path: path of the database file
+        :param float racy_window: listings of directories modified within this many seconds are not stored
+        """
+        self.path = path
+        self.racy_window = racy_window
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections are never shared with other processes
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Connection of the calling thread, forked process opens a new one.
+        """
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # Writers wait for each other, WAL lets readers go on meanwhile
+            local.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT, follow_symlinks INTEGER, "
+                                     "mtime INTEGER, listing BLOB, PRIMARY KEY (path, follow_symlinks))")
+            local.pid = os.getpid()
+        return local.connection
+
+    def get(self, path: str, mtime_ns: int, follow_symlinks: bool = False) -> Optional[Listing]:
+        """
+        Get listing of the directory, if its mtime didn't change.
+        :param str path: directory path
+        :param int mtime_ns: current mtime of the directory in nanoseconds
+        :param bool follow_symlinks: entries were classified following symlinks
+        :return tuple: ([dirs], [(filename, filepath, None)], [others]) or None if directory must be listed
+        """
+        row = self.connection.execute("SELECT mtime, listing FROM dirs WHERE path = ? AND follow_symlinks = ?",
+                                      (path, int(follow_symlinks))).fetchone()
+        if row is None or row[0] != mtime_ns:
+            return None
+        dirs, files, others = pickle.loads(row[1])
+        join = os.path.join
+        return ([join(path, name) for name in dirs], [(name, join(path, name), None) for name in files],
+                [join(path, name) for name in others])
+
+    def put(self, path: str, mtime_ns: int, listing: Listing, follow_symlinks: bool = False) -> None:
+        """
+        Store listing of the directory.
+        Only names are stored, paths are joined again by get.
+        :param str path: directory path
+        :param int mtime_ns: mtime of the directory in nanoseconds, read before it was listed
+        :param tuple listing: ([dirs], [(filename, filepath, DirEntry)], [others])
+        :param bool follow_symlinks: entries were classified following symlinks
+        :return: None
+        """
+        if time() - mtime_ns / 1e9 < self.racy_window:
+            return
+        dirs, files, others = listing
+        data = pickle.dumps(([os.path.basename(p) for p in dirs], [name for name, _, _ in files],
+                             [os.path.basename(p) for p in others]), pickle.HIGHEST_PROTOCOL)
+        self.connection.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                                (path, int(follow_symlinks), mtime_ns, data))
+
+    def prune(self) -> int:
+        """
+        Remove directories, which don't exist anymore.
+        :return int: number of removed directories
+        """
+        paths = [row[0] for row in self.connection.execute("SELECT DISTINCT path FROM dirs")]
+        removed = [(path,) for path in paths if not os.path.isdir(path)]
+        self.connection.executemany("DELETE FROM dirs WHERE path = ?", removed)
+        return len(removed)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close connection of the calling thread.
+        :return: None
+        """
+        local = self._local
+        if getattr(local, "pid", None) == os.getpid():
+            local.connection.close()
+            del local.connection, local.pid
@@ -0,0 +1,176 @@
+import re
+from fnmatch import translate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+# Prefix of glob patterns in PatternSet, other patterns are regular expressions
+GLOB_PREFIX = "glob:"
+
+# Characters with special meaning in regular expressions and in globs
+REGEX_META = frozenset(".^$*+?{}[]\\|()")
+GLOB_META = frozenset("*?[")
+
+# Kinds of literal patterns
+EXACT = "exact"
+PREFIX = "prefix"
+SUFFIX = "suffix"
+CONTAINS = "contains"
+
+Literal = Tuple[str, str, bool]
+Table = List[Tuple[int, Dict[str, List[int]]]]
+
+
+def regex_literal(pattern: str) -> Optional[Literal]:
+    """
+    Reduce regular expression to a literal test, if it's a plain string with optional anchors, e.g. \\.zip$.
+    :param str pattern: regular expression
+    :return tuple: (kind, literal, True if $ also matches before trailing newline) or None if it's not a literal
+    """
+    start = end = newline = False
+    if pattern.startswith("^"):
+        start, pattern = True, pattern[1:]
+    elif pattern.startswith("\\A"):
+        start, pattern = True, pattern[2:]
+    chars = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            escaped = pattern[index + 1:index + 2]
+            if escaped == "Z" and index + 2 == len(pattern):
+                end = True
+                break
+            if not escaped or escaped.isalnum() or escaped == "_":
+                # Character classes, backreferences and other escapes
+                return None
+            chars.append(escaped)
+            index += 2
+            continue
+        if char == "$" and index + 1 == len(pattern):
+            end = newline = True
+            break
+        if char in REGEX_META:
+            return None
+        chars.append(char)
+        index += 1
+    literal = "".join(chars)
+    if start:
+        return EXACT if end else PREFIX, literal, newline
+    return SUFFIX if end else CONTAINS, literal, newline
+
+
+def glob_literal(pattern: str) -> Optional[Literal]:
+    """
+    Reduce glob to a literal test, if it's a plain string with optional * at its start or end, e.g. *.zip.
+    :param str pattern: glob matching the whole filename
+    :return tuple: (kind, literal, False) or None if it's not a literal
+    """
+    start, end = not pattern.startswith("*"), not pattern.endswith("*")
+    literal = pattern[int(not start):len(pattern) - int(not end) or None]
+    if not literal or any(char in GLOB_META for char in literal):
+        return None
+    if start:
+        return EXACT if end else PREFIX, literal, False
+    return SUFFIX if end else CONTAINS, literal, False
+
+
+class PatternSet:
+    """
+    Many filename patterns matched in one pass, match returns ids of all matching patterns.
+    Patterns are regular expressions searched in the filename, or globs matching the whole filename,
+    given with "glob:" prefix. Pattern id is its index in the list of patterns.
+    Plain strings with optional anchors, e.g. \\.zip$, ^README or glob:*.tar.gz, are not run by the regex engine:
+      - exact names are looked up in a dict
+      - prefixes and suffixes are looked up in a dict per literal length, one slice and lookup per length
+      - other literals are tested by substring search
+    Only the remaining patterns are searched one by one.
+    """
+
+    def __init__(self, patterns: Iterable[Union[str, Pattern]]) -> None:
+        """
+        :param patterns: regular expressions, compiled patterns or globs with "glob:" prefix
+        """
+        self.patterns = list(patterns)
+        self.exact: Dict[str, List[int]] = {}
+        self.prefixes: Table = []
+        self.suffixes: Table = []
+        self.contains: List[Tuple[str, int]] = []
+        self.searches: List[Tuple[Callable[[str], Any], int]] = []
+        # Id tuples are shared by all hits matching the same patterns, they are pickled once per batch too
+        self.tuples: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        prefixes: Dict[int, Dict[str, List[int]]] = {}
+        suffixes: Dict[int, Dict[str, List[int]]] = {}
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not isinstance(pattern, str):
+                # Compiled pattern may have flags, it's always searched
+                self.searches.append((pattern.search, pattern_id))
+                continue
+            if pattern.startswith(GLOB_PREFIX):
+                glob = pattern[len(GLOB_PREFIX):]
+                literal = glob_literal(glob)
+                if literal is None:
+                    self.searches.append((re.compile(translate(glob)).match, pattern_id))
+                    continue
+            else:
+                literal = regex_literal(pattern)
+                if literal is None:
+                    self.searches.append((re.compile(pattern).search, pattern_id))
+                    continue
+            kind, string, newline = literal
+            # $ matches before trailing newline too, it's looked up as another literal
+            strings = [string, string + "\n"] if newline else [string]
+            if kind == EXACT:
+                for string in strings:
+                    self.exact.setdefault(string, []).append(pattern_id)
+            elif not string:
+                # Empty prefix, suffix or substring matches every filename
+                self.contains.append((string, pattern_id))
+            elif kind == CONTAINS:
+                self.contains.append((string, pattern_id))
+            else:
+                table = prefixes if kind == PREFIX else suffixes
+                for string in strings:
+                    table.setdefault(len(string), {}).setdefault(string, []).append(pattern_id)
+        self.prefixes = sorted(prefixes.items())
+        self.suffixes = sorted(suffixes.items())
+
+    def __getstate__(self) -> List[Union[str, Pattern]]:
+        # Tables hold bound methods of compiled patterns, every process builds its own
+        return self.patterns
+
+    def __setstate__(self, state: List[Union[str, Pattern]]) -> None:
+        self.__init__(state)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, self.patterns)
+
+    def match(self, name: str) -> Tuple[int, ...]:
+        """
+        Match filename against all patterns.
+        :param str name: filename
+        :return tuple: sorted ids of matching patterns, empty if no pattern matches
+        """
+        ids: List[int] = []
+        found = self.exact.get(name)
+        if found is not None:
+            ids += found
+        for length, table in self.suffixes:
+            found = table.get(name[-length:])
+            if found is not None:
+                ids += found
+        for length, table in self.prefixes:
+            found = table.get(name[:length])
+            if found is not None:
+                ids += found
+        for string, pattern_id in self.contains:
+            if string in name:
+                ids.append(pattern_id)
+        for search, pattern_id in self.searches:
+            if search(name) is not None:
+                ids.append(pattern_id)
+        if len(ids) > 1:
+            ids.sort()
+        pattern_ids = tuple(ids)
+        return self.tuples.setdefault(pattern_ids, pattern_ids)
@@ -0,0 +1,153 @@
+from itertools import count
+from multiprocessing import Event
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from crawlMp import CrawlException
+from crawlMp.crawlWorker import CrawlWorker, CrawlWorkerMixin, CrawlWorkerThread, Job
+from crawlMp.crawlers.crawler import BaseCrawler
+from crawlMp.crawlers.crawler_async import AsyncCrawler
+from crawlMp.enums import Backend
+from crawlMp.scheduler import Scheduler
+from crawlMp.sinks import Sink
+from crawlMp.visited import VisitedSet
+
+
+class CrawlPool:
+    """
+    Pool of pre-started workers, reused by any number of crawls.
+    Spawning processes and importing crawler modules is paid once in start(),
+    every crawl (job) just hands its crawler class, crawler arguments and entrypoints to running workers.
+    Pool crawls one job at a time, CrawlMp(..., pool=pool) submits its job in start().
+    Workers of the pool run either Crawlers or AsyncCrawlers (asynchronous=True), never both.
+    """
+
+    def __init__(self, num_proc: int = 4, buffer_size: int = 96, num_threads: int = 1,
+                 backend: Union[Backend, str] = Backend.PROCESS, asynchronous: bool = False,
+                 visited_size: int = 0) -> None:
+        """
+        :param int num_proc: Number of workers (processes or threads, depending on backend)
+        :param int buffer_size: Size of links buffer
+        :param int num_threads: Number of crawling threads per worker
+        :param backend: Backend.PROCESS or Backend.THREAD
+        :param bool asynchronous: Workers run AsyncCrawlers
+        :param int visited_size: Capacity of the visited set shared by workers (needed by follow_symlinks crawls),
+                                 thread workers get their visited set with the first follow_symlinks job anyway
+        """
+        assert num_proc > 0
+        assert num_threads > 0
+        assert buffer_size >= 1
+        self.num_proc = num_proc
+        self.num_threads = num_threads
+        self.buffer_size = buffer_size
+        self.backend = Backend(backend)
+        self.asynchronous = asynchronous
+        self.scheduler = Scheduler(num_proc * num_threads, threaded=self.backend == Backend.THREAD,
+                                   visited_size=visited_size)
+        self.sig_paused = Event()
+        self.workers: List[CrawlWorkerMixin] = []
+        self.job_ids = count(1)
+        self.job_lock = Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self.workers)
+
+    def start(self) -> 'CrawlPool':
+        """
+        Spawn and start all workers, they wait for jobs.
+        :return CrawlPool: self object
+        """
+        if self.running:
+            raise CrawlException("Pool is already running.")
+        if self.asynchronous:
+            # asyncio is imported only if it's needed
+            from crawlMp.crawlWorkerAsync import CrawlWorkerAsync, CrawlWorkerAsyncThread
+            worker_class = CrawlWorkerAsyncThread if self.backend == Backend.THREAD else CrawlWorkerAsync
+        else:
+            worker_class = CrawlWorkerThread if self.backend == Backend.THREAD else CrawlWorker
+        for i in range(self.num_proc):
+            worker = worker_class(None, self.scheduler, i * self.num_threads, self.sig_paused, self.buffer_size,
+                                  self.num_threads)
+            self.workers.append(worker)
+            worker.start()
+        return self
+
+    def submit(self, crawler_class: Type[BaseCrawler], links: List[Any], args: Tuple[Any, ...] = (),
+               kwargs: Optional[Dict[str, Any]] = None, track_links: bool = False, max_links: Optional[int] = None,
+               spill_dir: Optional[str] = None, sink: Optional[Sink] = None, columnar: bool = False) -> Job:
+        """
+        Start new job, pool must not crawl any other job.
+        Release the pool by finish_job, when job is done or cancelled.
+        :param crawler_class: Crawler class
+        :param list links: List of entrypoints
+        :param tuple args: positional arguments of the crawler
+        :param dict kwargs: key arguments of the crawler
+        :param bool track_links: workers send extracted links together with results
+        :param int max_links: maximum number of links kept in memory by every crawl loop, the rest is spilled to disk
+        :param str spill_dir: directory for spilled links, system temporary directory if None
+        :param Sink sink: output of hits written by the workers, prepared by the caller
+        :param bool columnar: workers collect and send hits as ColumnarHits
+        :return Job: started job
+        """
+        assert issubclass(crawler_class, AsyncCrawler) == self.asynchronous
+        if not self.running:
+            raise CrawlException("Pool is not running.")
+        if kwargs and kwargs.get("follow_symlinks") and self.scheduler.visited is None:
+            if self.backend != Backend.THREAD:
+                # Shared table can't be allocated after the workers were forked
+                raise CrawlException("Pool has no visited set, follow_symlinks needs CrawlPool(visited_size=...).")
+            self.scheduler.visited = VisitedSet(threaded=True)
+        if not self.job_lock.acquire(blocking=False):
+            raise CrawlException("Pool is already crawling another job.")
+        job = Job(next(self.job_ids), crawler_class, args, kwargs, track_links, max_links, spill_dir, sink,
+                  columnar)
+        self.sig_paused.clear()
+        self.scheduler.start_job(job.job_id)
+        self.scheduler.offer(list(links), job)
+        return job
+
+    def cancel(self) -> None:
+        """
+        Cancel running job, workers drop its links and wait for the next job.
+        :return: None
+        """
+        self.scheduler.cancel_job()
+        self.sig_paused.clear()
+        for worker in self.workers:
+            # Wake up paused workers
+            worker.wake_signal.set()
+
+    def wait_idle(self) -> None:
+        """
+        Block until all workers are idle and all their results were collected.
+        :return: None
+        """
+        self.scheduler.wait_for(lambda: self.scheduler.idle == self.scheduler.num_slots and self.scheduler.collected)
+
+    def finish_job(self) -> None:
+        """
+        Release the pool for the next job.
+        :return: None
+        """
+        self.job_lock.release()
+
+    def close(self) -> None:
+        """
+        Stop all workers and wait until they are finished.
+        :return: None
+        """
+        for worker in self.workers:
+            worker.stop()
+        # Wake up idle workers blocked on their inbox
+        self.scheduler.wake()
+        for worker in self.workers:
+            worker.join()
+        self.scheduler.release()
+        self.workers = []
+
+    def __enter__(self) -> 'CrawlPool':
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
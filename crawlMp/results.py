@@ -1,11 +1,13 @@
 from time import time
-from typing import Tuple, List, Any
+from typing import Tuple, List, Any, Union, TYPE_CHECKING
 
-from pandas import DataFrame
-
-from crawlMp import share_manager
+from crawlMp import get_share_manager
+from crawlMp.columns import ColumnarHits
 from crawlMp.enums import Header_ref
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 
 class Results:
     """
@@ -13,12 +15,15 @@ class Results:
     """
     start_time: float = time()
     done_time: float = 0
+    # Directories missing in the full visited set of the crawl, they could be crawled more times, see VisitedSet
+    visited_overflow: int = 0
 
     def __init__(self, hits_header: Tuple[Header_ref, ...], links_header: Tuple[Header_ref, ...],
-                 shared: bool = False) -> None:
+                 shared: bool = False, columnar: bool = False) -> None:
         """
         Create lists of results.
         If shared is True, all results are created from Shared manager.
+        If columnar is True, hits are stored in ColumnarHits, which needs several times less memory per hit.
         Header is defined as a list of tuples (Attribute name, Attribute type, Attribute unit).
         If Attribute has no unit use None.
         For example:
@@ -26,14 +31,25 @@ class Results:
         :param tuple hits_header: header tuple
         :param tuple links_header: header tuple
         :param bool shared: shared or local list
+        :param bool columnar: store hits by columns, can't be shared
         """
+        assert not (shared and columnar)
         # Required fields
         self.shared = shared
-        self.hits: List[Any] = share_manager.list() if shared else []
-        self.links_followed: List[Any] = share_manager.list() if shared else []
-        self.links_skipped: List[Any] = share_manager.list() if shared else []
+        self.columnar = columnar
         self.hits_header = hits_header
         self.links_header = links_header
+        share_manager = get_share_manager() if shared else None
+        self.hits: Union[List[Any], ColumnarHits] = share_manager.list() if shared else self.new_hits()
+        self.links_followed: List[Any] = share_manager.list() if shared else []
+        self.links_skipped: List[Any] = share_manager.list() if shared else []
+
+    def new_hits(self) -> Union[List[Any], ColumnarHits]:
+        """
+        Create empty local hits.
+        :return: list or ColumnarHits
+        """
+        return ColumnarHits(self.hits_header) if self.columnar else []
 
     @property
     def duration(self) -> float:
@@ -42,15 +58,25 @@ class Results:
     def reset(self) -> None:
         """
         Reset all results to empty list.
+        Local lists are replaced, so lists already handed over somewhere else keep their content.
         :return: None
         """
-        self.hits[:] = []
-        self.links_followed[:] = []
-        self.links_skipped[:] = []
+        if self.shared:
+            self.hits[:] = []
+            self.links_followed[:] = []
+            self.links_skipped[:] = []
+        else:
+            self.hits = self.new_hits()
+            self.links_followed = []
+            self.links_skipped = []
 
-    def dataframe(self) -> DataFrame:
+    def dataframe(self) -> 'DataFrame':
         """
         Get pandas data frame of collected results.
+        pandas is imported on the first call.
         :return DataFrame: pandas DataFrame
         """
-        return DataFrame(list(self.hits), columns=self.hits_header)
+        if self.columnar:
+            return self.hits.dataframe()
+        from pandas import DataFrame
+        return DataFrame(list(self.hits) if self.shared else self.hits, columns=self.hits_header)
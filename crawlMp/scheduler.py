@@ -0,0 +1,357 @@
+import queue
+import threading
+from multiprocessing import Condition, Queue
+from multiprocessing.sharedctypes import RawValue
+from queue import Empty
+from typing import Any, Callable, List, Optional, Tuple
+
+from crawlMp.checkpoint import Checkpoint
+from crawlMp.results import Results
+from crawlMp.visited import VisitedSet
+
+
+class LocalValue:
+    """
+    In-process counterpart of RawValue, used when all workers are threads.
+    """
+
+    def __init__(self, value: int = 0) -> None:
+        self.value = value
+
+
+class Scheduler:
+    """
+    Work-stealing scheduler shared by CrawlMp and its CrawlWorkers.
+    Every worker keeps its own local frontier (crawler.links) and owns one inbox queue.
+    Idle workers register themselves as thieves, busy workers hand part of their frontier to them.
+    Links are never stored in a central list, so frontier operations don't serialize through one proxy.
+
+    Batch termination is detected with two shared counters:
+      - pending: number of links submitted, but not yet crawled (including links in transit)
+      - idle: number of workers without any links
+    Workers keep their pending delta locally and publish it only when they become idle.
+    Results are streamed back to the parent through the results queue, batch is done,
+    when all workers are idle, pending is zero and every sent result batch was collected.
+    Nobody polls, every change of the counters is announced through the shared condition variable
+    and idle workers are blocked on their inbox.
+    If threaded is True, all workers must be threads of the calling process.
+    In-process queues and plain counters are used then, so links and results are never pickled.
+
+    With max_unread, workers block in send_results while max_unread of their result batches were not collected yet,
+    so slow consumer of the results (see CrawlMp.stream) throttles the crawl instead of queuing results in memory.
+
+    With visited_size, scheduler also holds VisitedSet shared by all workers, allocated before they are forked.
+
+    Links travel together with the job they belong to, so long-lived workers can crawl jobs of different
+    crawlers one after another (see CrawlPool). Only links of the active job (job_id) are crawled,
+    links of a cancelled job are dropped by the workers.
+    """
+
+    def __init__(self, num_slots: int, threaded: bool = False, visited_size: int = 0) -> None:
+        """
+        :param int num_slots: Number of workers (inboxes)
+        :param bool threaded: Workers are threads, not processes
+        :param int visited_size: Capacity of the visited set, no visited set is allocated if 0
+        """
+        assert num_slots > 0
+        self.num_slots = num_slots
+        self.threaded = threaded
+        queue_class = queue.Queue if threaded else Queue
+        self.inboxes: List[Queue] = [queue_class() for _ in range(num_slots)]
+        self.thieves: Queue = queue_class()
+        self.results_queue: Queue = queue_class()
+        if threaded:
+            self.cond = threading.Condition()
+            self._pending, self._idle, self._paused = LocalValue(), LocalValue(), LocalValue()
+            self._results_sent, self._results_received = LocalValue(), LocalValue()
+            self._job_id, self._max_unread = LocalValue(), LocalValue()
+        else:
+            self.cond = Condition()
+            self._pending, self._idle, self._paused = RawValue("q", 0), RawValue("i", 0), RawValue("i", 0)
+            self._results_sent, self._results_received = RawValue("q", 0), RawValue("q", 0)
+            self._job_id, self._max_unread = RawValue("q", 0), RawValue("q", 0)
+        self._next_slot = 0
+        self.visited = VisitedSet(visited_size, threaded=threaded) if visited_size else None
+
+    @property
+    def pending(self) -> int:
+        return self._pending.value
+
+    @property
+    def idle(self) -> int:
+        return self._idle.value
+
+    @property
+    def paused(self) -> int:
+        return self._paused.value
+
+    @property
+    def job_id(self) -> int:
+        return self._job_id.value
+
+    @property
+    def max_unread(self) -> int:
+        return self._max_unread.value
+
+    @max_unread.setter
+    def max_unread(self, new_max_unread: int) -> None:
+        assert new_max_unread >= 0
+        with self.cond:
+            self._max_unread.value = new_max_unread
+            self.cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        """
+        All links were crawled, all workers are idle and all results were collected.
+        Doesn't acquire the lock, use it in wait_for predicates.
+        """
+        return self._idle.value == self.num_slots and self._pending.value == 0 and self.collected
+
+    @property
+    def collected(self) -> bool:
+        """
+        Every result batch sent by the workers was collected.
+        Doesn't acquire the lock, use it in wait_for predicates.
+        """
+        return self._results_received.value == self._results_sent.value
+
+    @property
+    def halted(self) -> bool:
+        """
+        None of the workers is crawling (all of them are either idle or paused).
+        Doesn't acquire the lock, use it in wait_for predicates.
+        """
+        return self._idle.value + self._paused.value == self.num_slots
+
+    def is_done(self) -> bool:
+        """
+        Check if all links were crawled and all workers are idle.
+        :return bool: True if batch is done
+        """
+        with self.cond:
+            return self.done
+
+    def wait_for(self, predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """
+        Block until predicate is True.
+        Predicate is evaluated with the lock held, every time any counter changes or notify is called.
+        :param callable predicate: condition to wait for
+        :param float timeout: maximum time to wait, None to wait forever
+        :return bool: last value of predicate
+        """
+        with self.cond:
+            return self.cond.wait_for(predicate, timeout)
+
+    def notify(self) -> None:
+        """
+        Wake up everyone waiting on the condition to re-evaluate their predicates.
+        :return: None
+        """
+        with self.cond:
+            self.cond.notify_all()
+
+    def start_job(self, job_id: int) -> None:
+        """
+        Make job active, links of any other job are dropped by workers from now on.
+        All workers must be idle.
+        :param int job_id: job id
+        :return: None
+        """
+        with self.cond:
+            self._job_id.value = job_id
+            # Links of a cancelled job could be still pending, they are never going to be crawled
+            self._pending.value = 0
+            if self.visited is not None:
+                self.visited.clear()
+
+    def cancel_job(self) -> None:
+        """
+        Cancel active job, workers drop its links and become idle.
+        :return: None
+        """
+        with self.cond:
+            self._job_id.value = -1
+            self.cond.notify_all()
+
+    def offer(self, links: List[Any], job: Any = None) -> None:
+        """
+        Submit new links to the workers.
+        Idle workers are served first, remaining links are distributed in round-robin fashion.
+        :param list links: links to crawl
+        :param Job job: job of the links, None for the worker's own job
+        :return: None
+        """
+        if not links:
+            return
+        with self.cond:
+            self._pending.value += len(links)
+        chunk = -(-len(links) // self.num_slots)
+        for i in range(0, len(links), chunk):
+            slot = self.next_thief()
+            if slot is None:
+                slot = self._next_slot
+                self._next_slot = (self._next_slot + 1) % self.num_slots
+            self.inboxes[slot].put((job, links[i:i + chunk]))
+
+    def next_thief(self) -> Optional[int]:
+        """
+        Get slot of the next worker waiting for links.
+        :return int: slot of the idle worker or None if there is none
+        """
+        if self._idle.value == 0:
+            return None
+        try:
+            return self.thieves.get_nowait()
+        except Empty:
+            return None
+
+    def give(self, slot: int, links: List[Any], job: Any = None) -> None:
+        """
+        Hand links over to worker in given slot.
+        Pending counter doesn't change, links are only moved from one frontier to another.
+        :param int slot: target worker slot
+        :param list links: links to hand over
+        :param Job job: job of the links, None for the worker's own job
+        :return: None
+        """
+        self.inboxes[slot].put((job, links))
+
+    def receive(self, slot: int, block: bool = False) -> Optional[Tuple[Any, List[Any]]]:
+        """
+        Receive links from the worker's inbox.
+        Blocking receive returns None only if the worker was woken up by wake().
+        :param int slot: worker slot
+        :param bool block: block until something arrives into the inbox
+        :return tuple: (job, links) or None if inbox is empty
+        """
+        try:
+            if block:
+                return self.inboxes[slot].get()
+            return self.inboxes[slot].get_nowait()
+        except Empty:
+            return None
+
+    def wake(self) -> None:
+        """
+        Wake up all workers blocked on their inbox.
+        :return: None
+        """
+        for inbox in self.inboxes:
+            inbox.put(None)
+
+    def send_results(self, hits: List[Any], links_followed: List[Any], links_skipped: List[Any],
+                     links_extracted: Optional[List[Any]] = None) -> None:
+        """
+        Send batch of worker's results to the parent process.
+        Batch is pickled once in the worker and unpickled once in the parent.
+        Lists must not be modified after they were sent.
+        Blocks while max_unread batches were not collected yet.
+        :param list hits: hits
+        :param list links_followed: followed links
+        :param list links_skipped: skipped links
+        :param list links_extracted: links extracted from followed links, None if job doesn't track them
+        :return: None
+        """
+        with self.cond:
+            if self._max_unread.value:
+                self.cond.wait_for(self._can_send)
+            self._results_sent.value += 1
+        if links_extracted is not None and not self.threaded:
+            # Batch is logged to the checkpoint, encode it here, so the parent only writes it
+            self.results_queue.put(Checkpoint.encode_batch(hits, links_followed, links_skipped, links_extracted))
+        else:
+            self.results_queue.put((hits, links_followed, links_skipped, links_extracted))
+
+    def _can_send(self) -> bool:
+        """
+        Predicate of send_results, evaluated under the lock.
+        :return bool: True if limit of batches not collected yet wasn't reached
+        """
+        limit = self._max_unread.value
+        return not limit or self._results_sent.value - self._results_received.value < limit
+
+    def collect(self, results: Results, checkpoint: Optional[Checkpoint] = None,
+                on_hits: Optional[Callable[[List[Any]], None]] = None) -> None:
+        """
+        Append all incoming result batches to the local results.
+        Runs in the parent process until stop_collecting is called.
+        With on_hits, hits are handed over to it instead of being appended to results.
+        Batch is collected after on_hits returns, so blocking on_hits holds back the workers (see max_unread).
+        :param Results results: local results
+        :param Checkpoint checkpoint: log every batch to the checkpoint before it is appended to results
+        :param callable on_hits: consumer of non-empty hit batches
+        :return: None
+        """
+        while True:
+            batch = self.results_queue.get()
+            if batch is None:
+                break
+            if isinstance(batch, bytes):
+                if checkpoint is not None:
+                    checkpoint.add_record(batch)
+                hits, links_followed, links_skipped, _ = Checkpoint.decode_batch(batch)
+            else:
+                hits, links_followed, links_skipped, links_extracted = batch
+                if checkpoint is not None:
+                    checkpoint.add_batch(hits, links_followed, links_skipped, links_extracted or [])
+            if on_hits is None:
+                results.hits += hits
+            elif hits:
+                on_hits(hits)
+            results.links_followed += links_followed
+            results.links_skipped += links_skipped
+            with self.cond:
+                self._results_received.value += 1
+                self.cond.notify_all()
+
+    def stop_collecting(self) -> None:
+        """
+        Stop collect loop after all results already sent are collected.
+        :return: None
+        """
+        self.results_queue.put(None)
+
+    def release(self) -> None:
+        """
+        Don't wait for queued data to be flushed when the calling process exits.
+        Links left in the inboxes after stop are dropped anyway and nobody is going to read them.
+        :return: None
+        """
+        if self.threaded:
+            return
+        for inbox in self.inboxes + [self.thieves]:
+            inbox.cancel_join_thread()
+
+    def set_idle(self, slot: int, pending_delta: int) -> bool:
+        """
+        Mark worker as idle and publish its pending delta.
+        :param int slot: worker slot
+        :param int pending_delta: links extracted minus links crawled since last publish
+        :return bool: True if this made the whole batch done
+        """
+        with self.cond:
+            self._pending.value += pending_delta
+            self._idle.value += 1
+            done = self.done
+            self.cond.notify_all()
+        self.thieves.put(slot)
+        return done
+
+    def set_busy(self) -> None:
+        """
+        Mark idle worker as busy again.
+        :return: None
+        """
+        with self.cond:
+            self._idle.value -= 1
+
+    def set_paused(self, paused: bool) -> None:
+        """
+        Mark worker as paused or running.
+        :param bool paused: True if worker was paused, False if it was resumed
+        :return: None
+        """
+        with self.cond:
+            self._paused.value += 1 if paused else -1
+            self.cond.notify_all()
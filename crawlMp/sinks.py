@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from glob import escape, glob
+from typing import Any, List, Optional, Tuple, Union
+
+from crawlMp.enums import Format, Header_ref
+
+# Filenames are not guaranteed to be valid utf-8, undecodable bytes are written back as they were
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"
+
+
+class Sink(ABC):
+    """
+    Output of hits written directly by the workers, hits are never sent to the parent process.
+    Every crawl loop buffers encoded records and writes them out in chunks of whole records.
+    Without parts, all crawl loops append to one file opened with O_APPEND, every chunk is written by
+    a single write call, so records of different crawl loops never interleave (on local filesystems).
+    With parts, every crawl loop writes its own part file <path>.part<slot>.
+    Buffers are written out when the crawl loop goes idle, pauses or finishes, so output is complete
+    when the batch is done. Sink is pickled together with the job, so it must be picklable.
+    """
+
+    def __init__(self, path: str, parts: bool = False, buffer_size: int = 2 ** 20) -> None:
+        """
+        :param str path: path of the output file
+        :param bool parts: every crawl loop writes its own part file
+        :param int buffer_size: number of bytes buffered by a crawl loop before they are written out
+        """
+        self.path = path
+        self.parts = parts
+        self.buffer_size = buffer_size
+        self.hits_header: Tuple[Header_ref, ...] = ()
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
+
+    @buffer_size.setter
+    def buffer_size(self, new_buffer_size: int) -> None:
+        assert new_buffer_size >= 0
+        self._buffer_size = new_buffer_size
+
+    def prepare(self, hits_header: Tuple[Header_ref, ...], append: bool = False) -> None:
+        """
+        Prepare output for a new crawl, called by the parent process before the job is submitted.
+        Output file is truncated (part files of previous crawl are removed), unless crawl appends to it.
+        :param tuple hits_header: header of the hits
+        :param bool append: keep previous output, e.g. when crawl is resumed
+        :return: None
+        """
+        self.hits_header = hits_header
+        if append:
+            return
+        if self.parts:
+            for path in self.part_files():
+                os.remove(path)
+        else:
+            # Shared file gets its header before any crawl loop appends to it
+            with open(self.path, "wb") as fp:
+                fp.write(self.header())
+
+    def part_files(self) -> List[str]:
+        """
+        Get existing part files of the output.
+        :return list: paths of the part files
+        """
+        pattern = re.compile(re.escape(self.path) + r"\.part\d+$")
+        return sorted(path for path in glob(escape(self.path) + ".part*") if pattern.match(path))
+
+    def writer(self, slot: int) -> 'SinkWriter':
+        """
+        Build writer of a crawl loop.
+        :param int slot: scheduler slot of the crawl loop
+        :return SinkWriter: writer
+        """
+        return SinkWriter(self, "%s.part%d" % (self.path, slot) if self.parts else self.path)
+
+    def header(self) -> bytes:
+        """
+        Encode header written at the beginning of every output file.
+        :return bytes: encoded header
+        """
+        return b""
+
+    @abstractmethod
+    def encode(self, hits: List[Tuple[Any, ...]]) -> bytes:
+        """
+        Encode hits to records.
+        :param list hits: hits
+        :return bytes: encoded records
+        """
+        ...
+
+
+class SinkWriter:
+    """
+    Buffered writer of a single crawl loop, built by Sink.writer in the worker.
+    """
+
+    def __init__(self, sink: Sink, path: str) -> None:
+        """
+        :param Sink sink: sink
+        :param str path: path of the output file
+        """
+        self.sink = sink
+        self.path = path
+        self.fd: Optional[int] = None
+        self.buffer = bytearray()
+
+    def write(self, hits: List[Tuple[Any, ...]]) -> None:
+        """
+        Encode hits into the buffer, full buffer is written out.
+        :param list hits: hits
+        :return: None
+        """
+        if hits:
+            self.buffer += self.sink.encode(hits)
+        if len(self.buffer) >= self.sink.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write buffered records out.
+        :return: None
+        """
+        if not self.buffer:
+            return
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            if self.sink.parts and os.fstat(self.fd).st_size == 0:
+                self.buffer[:0] = self.sink.header()
+        data = memoryview(self.buffer)
+        while data:
+            data = data[os.write(self.fd, data):]
+        data.release()
+        self.buffer.clear()
+
+    def close(self) -> None:
+        """
+        Write buffered records out and close the file.
+        :return: None
+        """
+        self.flush()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class NdjsonSink(Sink):
+    """
+    Newline delimited JSON, one object per hit with keys named by the hits header.
+    """
+
+    def encode(self, hits: List[Tuple[Any, ...]]) -> bytes:
+        keys = [str(name) for name, _, _ in self.hits_header]
+        # ASCII only output, undecodable bytes of filenames are escaped as lone surrogates
+        return "".join([json.dumps(dict(zip(keys, hit))) + "\n" for hit in hits]).encode("ascii")
+
+
+class CsvSink(Sink):
+    """
+    Comma separated values, first line of every output file is the hits header.
+    """
+
+    def __init__(self, path: str, parts: bool = False, buffer_size: int = 2 ** 20, dialect: str = "excel") -> None:
+        """
+        :param str path: path of the output file
+        :param bool parts: every crawl loop writes its own part file
+        :param int buffer_size: number of bytes buffered by a crawl loop before they are written out
+        :param str dialect: csv dialect
+        """
+        super().__init__(path, parts, buffer_size)
+        self.dialect = dialect
+
+    def _rows(self, rows: List[Any]) -> bytes:
+        """
+        Encode csv rows.
+        :param list rows: rows
+        :return bytes: encoded rows
+        """
+        output = io.StringIO()
+        csv.writer(output, self.dialect, lineterminator="\n").writerows(rows)
+        return output.getvalue().encode(ENCODING, ERRORS)
+
+    def header(self) -> bytes:
+        return self._rows([[str(name) for name, _, _ in self.hits_header]])
+
+    def encode(self, hits: List[Tuple[Any, ...]]) -> bytes:
+        return self._rows(hits)
+
+
+class NullSink(Sink):
+    """
+    Single column of hits (path by default) terminated by null character, ready for xargs -0.
+    """
+
+    def __init__(self, path: str, parts: bool = False, buffer_size: int = 2 ** 20, column: int = 0) -> None:
+        """
+        :param str path: path of the output file
+        :param bool parts: every crawl loop writes its own part file
+        :param int buffer_size: number of bytes buffered by a crawl loop before they are written out
+        :param int column: index of the written column in the hits header
+        """
+        super().__init__(path, parts, buffer_size)
+        self.column = column
+
+    def encode(self, hits: List[Tuple[Any, ...]]) -> bytes:
+        column = self.column
+        return "".join([str(hit[column]) + "\0" for hit in hits]).encode(ENCODING, ERRORS)
+
+
+def new_sink(output_format: Union[Format, str], path: str, parts: bool = False) -> Sink:
+    """
+    Build sink of given format.
+    :param output_format: Format.NDJSON, Format.CSV or Format.NULL
+    :param str path: path of the output file
+    :param bool parts: every crawl loop writes its own part file
+    :return Sink: new sink
+    """
+    output_format = Format(output_format)
+    if output_format == Format.CSV:
+        return CsvSink(path, parts)
+    if output_format == Format.NULL:
+        return NullSink(path, parts)
+    return NdjsonSink(path, parts)
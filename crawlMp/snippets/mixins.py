@@ -1,7 +1,16 @@
 import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple, Union, TYPE_CHECKING
 
 from crawlMp import ActionException
 
+if TYPE_CHECKING:
+    from crawlMp.filters import FileFilter
+    from crawlMp.ignore import IgnoreChain, IgnoreRules
+    from crawlMp.index import CrawlIndex
+    from crawlMp.patterns import PatternSet
+    from crawlMp.visited import VisitedSet
+
 
 class TargetDir:
     """
@@ -22,3 +31,220 @@ class TargetDir:
             except OSError as e:
                 raise ActionException(e)
         self._target_dir = new_target_dir
+
+
+class SearchPattern:
+    """
+    Mixin class providing regular expression pattern and is_hit matching it.
+    """
+    _pattern: Pattern = re.compile(".")
+
+    @property
+    def pattern(self) -> Pattern:
+        return self._pattern
+
+    @pattern.setter
+    def pattern(self, new_pattern: Union[str, Pattern]) -> None:
+        self._pattern = re.compile(new_pattern)
+
+    def is_hit(self, item: str) -> bool:
+        """
+        Check if pattern was found in item
+        :param str item: Filename
+        :return: True if pattern was found in string
+        """
+        return self._pattern.search(item) is not None
+
+
+class ContentPattern:
+    """
+    Mixin class providing regular expression searched in the content of files.
+    Pattern is compiled in bytes mode with re.MULTILINE, so ^ and $ match at every line.
+    """
+    _content: Pattern = re.compile(b".", re.MULTILINE)
+
+    @property
+    def content(self) -> Pattern:
+        return self._content
+
+    @content.setter
+    def content(self, new_content: Union[str, bytes, Pattern]) -> None:
+        if isinstance(new_content, str):
+            # Pattern given as a string is searched in utf-8 content
+            new_content = new_content.encode("utf-8", "surrogateescape")
+        if isinstance(new_content, bytes):
+            new_content = re.compile(new_content, re.MULTILINE)
+        assert isinstance(new_content.pattern, bytes)
+        self._content = new_content
+
+
+class MultiSearchPattern:
+    """
+    Mixin class providing set of patterns and is_hit matching any of them.
+    Patterns given as a list are compiled to PatternSet on assignment.
+    """
+    _patterns: Optional['PatternSet'] = None
+
+    @property
+    def patterns(self) -> Optional['PatternSet']:
+        return self._patterns
+
+    @patterns.setter
+    def patterns(self, new_patterns: Union['PatternSet', Iterable[Union[str, Pattern]]]) -> None:
+        from crawlMp.patterns import PatternSet
+        if not isinstance(new_patterns, PatternSet):
+            new_patterns = PatternSet(new_patterns)
+        assert len(new_patterns) > 0
+        self._patterns = new_patterns
+
+    def is_hit(self, item: str) -> bool:
+        """
+        Check if any pattern matches item
+        :param str item: Filename
+        :return: True if at least one pattern matches
+        """
+        return len(self._patterns.match(item)) > 0
+
+
+class FollowSymlinks:
+    """
+    Mixin class providing follow_symlinks switch and the visited set of the crawler.
+    Crawler following symlinks must crawl every physical directory once, otherwise symlink cycles never end.
+    """
+    follow_symlinks: bool = False
+    visited: Optional['VisitedSet'] = None
+
+    def visited_set(self) -> Optional['VisitedSet']:
+        """
+        Get visited set, if crawler follows symlinks.
+        Workers share one visited set, crawler running on its own gets a private one.
+        :return VisitedSet: visited set or None if symlinks are not followed
+        """
+        if not self.follow_symlinks:
+            return None
+        if self.visited is None:
+            from crawlMp.visited import VisitedSet
+            self.visited = VisitedSet(threaded=True)
+        return self.visited
+
+
+class ListingIndex:
+    """
+    Mixin class providing persistent index of directory listings of the crawler.
+    Index given by path of its database is opened on assignment, sqlite3 is imported only then.
+    """
+    _index: Optional['CrawlIndex'] = None
+
+    @property
+    def index(self) -> Optional['CrawlIndex']:
+        return self._index
+
+    @index.setter
+    def index(self, new_index: Optional[Union['CrawlIndex', str]]) -> None:
+        if isinstance(new_index, str):
+            from crawlMp.index import CrawlIndex
+            new_index = CrawlIndex(new_index)
+        self._index = new_index
+
+
+class FilePredicate:
+    """
+    Mixin class providing find-like file filter of the crawler.
+    """
+    _file_filter: Optional['FileFilter'] = None
+
+    @property
+    def file_filter(self) -> Optional['FileFilter']:
+        return self._file_filter
+
+    @file_filter.setter
+    def file_filter(self, new_file_filter: Optional['FileFilter']) -> None:
+        if new_file_filter is not None:
+            # Compiled before crawling starts, so invalid patterns fail early
+            new_file_filter.compile()
+        self._file_filter = new_file_filter
+
+
+class PruneRules:
+    """
+    Mixin class providing gitignore-style exclude rules of the crawler and rules of per-directory ignore files.
+    Ignore files apply to their directory and its subtree, ignore files of parent directories of the links too.
+    Rules of directories are cached by the crawler, every ignore file is read once per process.
+    """
+    _exclude: Optional['IgnoreRules'] = None
+    ignore_file: Optional[str] = None
+    _ignore_cache: Optional[Dict[str, Tuple['IgnoreRules', ...]]] = None
+    # Cache is dropped when it has more directories, rules of parent directories are loaded again
+    ignore_cache_size: int = 2 ** 16
+
+    @property
+    def exclude(self) -> Optional['IgnoreRules']:
+        return self._exclude
+
+    @exclude.setter
+    def exclude(self, new_exclude: Optional[Union['IgnoreRules', Iterable[str]]]) -> None:
+        if new_exclude is not None:
+            from crawlMp.ignore import IgnoreRules
+            if not isinstance(new_exclude, IgnoreRules):
+                new_exclude = IgnoreRules(new_exclude)
+        self._exclude = new_exclude
+
+    def ignore_chain(self, directory: str, files: Optional[List[Tuple[str, Any, Any]]] = None) \
+            -> Optional['IgnoreChain']:
+        """
+        Get rules applying to entries of the directory.
+        :param str directory: directory path
+        :param list files: listing of the directory (filename first), spares the lookup of its ignore file
+        :return IgnoreChain: rules or None if there are no rules at all
+        """
+        if self.ignore_file is None:
+            if self._exclude is None:
+                return None
+            rules: Tuple['IgnoreRules', ...] = ()
+        else:
+            has_file = None if files is None else any(name == self.ignore_file for name, _, _ in files)
+            rules = self._dir_rules(directory.rstrip(os.sep) or os.sep, has_file)
+        if self._exclude is not None:
+            rules = (self._exclude,) + rules
+        if not rules:
+            return None
+        from crawlMp.ignore import IgnoreChain
+        return IgnoreChain(rules)
+
+    def _dir_rules(self, directory: str, has_file: Optional[bool] = None) -> Tuple['IgnoreRules', ...]:
+        """
+        Get rules of ignore files of the directory and its parents, deepest first.
+        :param str directory: directory path
+        :param bool has_file: True if directory has the ignore file, None if it's not known
+        :return tuple: rules
+        """
+        if self._ignore_cache is None:
+            self._ignore_cache = {}
+        rules = self._ignore_cache.get(directory)
+        if rules is not None:
+            return rules
+        parent = os.path.dirname(directory)
+        rules = () if not parent or parent == directory else self._dir_rules(parent)
+        path = os.path.join(directory, self.ignore_file)
+        if has_file if has_file is not None else os.path.isfile(path):
+            from crawlMp.ignore import IgnoreRules
+            try:
+                own = IgnoreRules.from_file(path)
+            except OSError:
+                own = None
+            if own:
+                rules = (own,) + rules
+        if len(self._ignore_cache) >= self.ignore_cache_size:
+            self._ignore_cache.clear()
+        self._ignore_cache[directory] = rules
+        return rules
+
+    def excluded(self, path: str, is_dir: bool) -> bool:
+        """
+        Check single entry, crawlers check whole listings by the chain of the directory.
+        :param str path: path of the entry
+        :param bool is_dir: True if entry is a directory
+        :return bool: True if entry is excluded
+        """
+        chain = self.ignore_chain(os.path.dirname(path))
+        return chain is not None and chain.excluded(path, os.path.basename(path), is_dir)
@@ -14,6 +14,8 @@ def print_summary(results: Optional[Results] = None) -> None:
         print(f"Number of hits: {len(results.hits)}")
         print(f"Number of followed links: {len(results.links_followed)}")
         print(f"Number of skipped links: {len(results.links_skipped)}")
+        if results.visited_overflow:
+            print(f"Directories outside the full visited set: {results.visited_overflow}, raise visited_size")
     else:
         print("No results...")
 
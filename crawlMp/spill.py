@@ -0,0 +1,93 @@
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+from collections import deque
+from itertools import count
+from typing import Any, Deque, List, Optional, Tuple
+
+
+class SpillStore:
+    """
+    Links spilled out of memory, kept in compact on-disk segments.
+    Push writes links to segments of at most segment_size links (zlib compressed pickles), pop pages
+    the oldest segment back in and deletes it, so links spilled first are crawled first.
+    Segments are stored in a private temporary directory, which is created on the first push
+    and removed by close().
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None, segment_size: int = 65536) -> None:
+        """
+        :param str spill_dir: directory for the segments, system temporary directory if None
+        :param int segment_size: maximum number of links in one segment
+        """
+        self.spill_dir = spill_dir
+        self.segment_size = segment_size
+        self.path: Optional[str] = None
+        self.segments: Deque[Tuple[str, int]] = deque()
+        self.segment_ids = count()
+        self.size = 0
+
+    @property
+    def segment_size(self) -> int:
+        return self._segment_size
+
+    @segment_size.setter
+    def segment_size(self, new_segment_size: int) -> None:
+        assert new_segment_size >= 1
+        self._segment_size = new_segment_size
+
+    def __len__(self) -> int:
+        """
+        Number of spilled links.
+        """
+        return self.size
+
+    def push(self, links: List[Any]) -> None:
+        """
+        Write links to new segments.
+        :param list links: links to spill
+        :return: None
+        """
+        if links and self.path is None:
+            self.path = tempfile.mkdtemp(prefix="crawlMp-", dir=self.spill_dir)
+        for i in range(0, len(links), self.segment_size):
+            segment = links[i:i + self.segment_size]
+            path = os.path.join(self.path, "%d.seg" % next(self.segment_ids))
+            with open(path, "wb") as fp:
+                # Paths compress well, fastest level is enough
+                fp.write(zlib.compress(pickle.dumps(segment, pickle.HIGHEST_PROTOCOL), 1))
+            self.segments.append((path, len(segment)))
+            self.size += len(segment)
+
+    def pop(self) -> List[Any]:
+        """
+        Read and delete the oldest segment.
+        :return list: links of the segment
+        """
+        path, size = self.segments.popleft()
+        with open(path, "rb") as fp:
+            links = pickle.loads(zlib.decompress(fp.read()))
+        os.remove(path)
+        self.size -= size
+        return links
+
+    def clear(self) -> None:
+        """
+        Drop all spilled links.
+        :return: None
+        """
+        while self.segments:
+            os.remove(self.segments.popleft()[0])
+        self.size = 0
+
+    def close(self) -> None:
+        """
+        Drop all spilled links and remove the segments directory.
+        :return: None
+        """
+        self.clear()
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
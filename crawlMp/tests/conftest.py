@@ -1,8 +1,50 @@
+import asyncio
+import importlib
 import os.path
+from multiprocessing.sharedctypes import RawArray
 from typing import Generator
 
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
+from pyfakefs.fake_filesystem_unittest import Patcher
+
+from crawlMp.actions import action_fs
+from crawlMp.crawlers.crawler import BaseCrawler
+from crawlMp.crawlers.crawler_async import AsyncCrawler
+
+# multiprocessing modules doing I/O on pipes, sockets and fds. They are imported here, before any test fakes
+# the filesystem, and never patched, so queues and connections between manager and workers stay real.
+multiprocessing_modules = ["multiprocessing", "multiprocessing.connection", "multiprocessing.context",
+                           "multiprocessing.heap", "multiprocessing.managers", "multiprocessing.popen_fork",
+                           "multiprocessing.process", "multiprocessing.queues", "multiprocessing.reduction",
+                           "multiprocessing.sharedctypes", "multiprocessing.synchronize", "multiprocessing.util"]
+# crawlMp imports these only when they are needed. Modules first imported under the fake filesystem
+# are loaded through it and patched dynamically, so import them here, while the real filesystem is in place.
+lazy_modules = ["asyncio", "pandas"]
+for module_name in multiprocessing_modules + lazy_modules:
+    importlib.import_module(module_name)
+
+# Shared counters (RawValue) are allocated from a heap arena, which is a file created through tempfile.
+# pyfakefs reloads tempfile, so the arena can't be created once the filesystem is faked.
+# Allocate one arena now and free it at once, the heap keeps arenas smaller than 4 MB for next allocations.
+RawArray("b", 2 ** 20)
+
+
+def run_crawler(crawler: BaseCrawler) -> BaseCrawler:
+    """
+    Crawl all links of the crawler in the calling process.
+    Asynchronous crawler runs in a new event loop, asyncio.run needs Python 3.7.
+    """
+    if isinstance(crawler, AsyncCrawler):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(crawler.run())
+        finally:
+            loop.close()
+    else:
+        for _ in crawler:
+            pass
+    return crawler
 
 
 @pytest.fixture(scope="session")
@@ -14,6 +56,19 @@ def fs_files_mock() -> Generator:
         yield fp.readlines()
 
 
+@pytest.fixture
+def fs(monkeypatch: pytest.MonkeyPatch) -> Generator:
+    # Overrides fs fixture of pyfakefs, only crawled files are faked
+    # Kernel copy calls get descriptors of fake files, which may be numbers of real open files, same as
+    # pyfakefs switches off fast copy of shutil, copy actions must use read/write loop
+    for flag in ["USE_REFLINK", "USE_COPY_FILE_RANGE", "USE_SENDFILE"]:
+        monkeypatch.setattr(action_fs, flag, False)
+    patcher = Patcher(additional_skip_names=multiprocessing_modules)
+    patcher.setUp()
+    yield patcher.fs
+    patcher.tearDown()
+
+
 @pytest.fixture
 def fake_fs(fs_files_mock: list, fs: FakeFilesystem) -> Generator:
     p_size, p_name, p_type = fs_files_mock[0].strip().split("\t")
@@ -0,0 +1,108 @@
+from collections import Counter
+from threading import Event
+from time import sleep
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.checkpoint import Checkpoint
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerSearchFs
+from crawlMp.enums import Backend
+
+LINKS = ["/doc/source", "/numpy/doc"]
+
+
+def sync_results(links: List[str]) -> tuple:
+    crawler = CrawlerFs(list(links))
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits), sorted(crawler.results.links_followed)
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_checkpoint_finished_crawl(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerFs, links=LINKS, num_proc=2, buffer_size=4, backend=backend, checkpoint="/crawl.log")
+    manager.start()
+    frontier, hits, links_followed, links_skipped = Checkpoint("/crawl.log").load()
+    # Nothing is left to crawl, logged results are the results of the crawl
+    assert frontier == []
+    assert sorted(hits) == sorted(manager.results.hits)
+    assert sorted(links_followed) == sorted(manager.results.links_followed)
+    assert (sorted(hits), sorted(links_followed)) == sync_results(LINKS)
+
+
+def test_checkpoint_load_frontier(fake_fs: FakeFilesystem) -> None:
+    checkpoint = Checkpoint("/crawl.log").open()
+    checkpoint.add_links(["/a", "/b", "/a"])
+    checkpoint.add_batch([("/a/f", "f")], ["/a"], [], ["/a/c", "/a/d"])
+    checkpoint.add_batch([], [], ["/a/d"], [])
+    checkpoint.close()
+    frontier, hits, links_followed, links_skipped = checkpoint.load()
+    # Entrypoint given twice is crawled twice
+    assert frontier == ["/b", "/a", "/a/c"]
+    assert hits == [("/a/f", "f")]
+    assert links_followed == ["/a"]
+    assert links_skipped == ["/a/d"]
+
+
+def test_checkpoint_truncated_record(fake_fs: FakeFilesystem) -> None:
+    checkpoint = Checkpoint("/crawl.log").open()
+    checkpoint.add_links(["/a", "/b"])
+    checkpoint.add_batch([], ["/a"], [], ["/a/c"])
+    checkpoint.close()
+    size = checkpoint.valid_size()
+    with open("/crawl.log", "r+b") as fp:
+        # Host crashed in the middle of the last record
+        fp.truncate(size - 3)
+    assert checkpoint.load()[0] == ["/a", "/b"]
+    # Truncated record is dropped on resume, new records are readable
+    checkpoint.open(resume=True)
+    checkpoint.add_batch([], ["/b"], [], [])
+    checkpoint.close()
+    assert checkpoint.load() == (["/a"], [], ["/b"], [])
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_checkpoint_resume(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    # Crawl of the first entrypoint was logged before the crawl was killed
+    crawler = CrawlerFs(["/doc/source"])
+    next(crawler)
+    checkpoint = Checkpoint("/crawl.log").open()
+    checkpoint.add_links(LINKS)
+    checkpoint.add_batch(crawler.results.hits, crawler.results.links_followed, [], list(crawler.links))
+    checkpoint.close()
+
+    manager = CrawlMp(CrawlerFs, links=[], num_proc=2, buffer_size=4, backend=backend)
+    manager.resume_from("/crawl.log")
+    # Every directory is followed exactly once
+    assert max(Counter(manager.results.links_followed).values()) == 1
+    assert (sorted(manager.results.hits), sorted(manager.results.links_followed)) == sync_results(LINKS)
+    assert Checkpoint("/crawl.log").load()[0] == []
+
+
+def test_checkpoint_stop_resume(fake_fs: FakeFilesystem) -> None:
+    links = LINKS * 10
+    done = Event()
+    manager = CrawlMp(CrawlerFs, links=links, num_proc=2, buffer_size=1, checkpoint="/crawl.log")
+    manager.start(callback=lambda m: done.set())
+    sleep(0.05)
+    manager.stop()
+    assert done.wait(10)
+
+    manager = CrawlMp(CrawlerFs, links=[], num_proc=2, buffer_size=4)
+    manager.resume_from("/crawl.log")
+    expected_hits, expected_followed = sync_results(links)
+    assert sorted(manager.results.hits) == expected_hits
+    assert sorted(manager.results.links_followed) == expected_followed
+
+
+def test_checkpoint_async(fake_fs: FakeFilesystem) -> None:
+    manager = CrawlMp(AsyncCrawlerSearchFs, links=LINKS, num_proc=2, buffer_size=4, checkpoint="/crawl.log",
+                      pattern=".*", concurrency=4)
+    manager.start()
+    frontier, hits, links_followed, _ = Checkpoint("/crawl.log").load()
+    assert frontier == []
+    assert sorted(hits) == sorted(manager.results.hits)
+    assert sorted(links_followed) == sync_results(LINKS)[1]
@@ -0,0 +1,149 @@
+import os
+import pickle
+import sys
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.columns import ColumnarHits, NameColumn, PathColumn
+from crawlMp.checkpoint import Checkpoint
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs
+from crawlMp.enums import Backend, Header, Mode
+from crawlMp.results import Results
+
+LINKS = ["/doc/source", "/numpy/doc"]
+
+HITS = [(os.path.join("/a", "b", "c.txt"), "c.txt", 10, 1.5, 2.5),
+        (os.path.join("/a", "b", "d.py"), "d.py", 0, 3.0, 4.0),
+        # No directory, name different from the path, undecodable bytes
+        ("e", "e", 1, 0., 0.),
+        (os.path.join("/a", "f"), "other", 2 ** 40, -1., 1e9),
+        (os.path.join("/a", "b", "g\udcff"), "g\udcff", 5, 5., 5.)]
+
+
+def test_columnar_hits_list_behaviour() -> None:
+    hits = ColumnarHits(CrawlerFs.hits_header(Mode.EXTENDED))
+    hits += HITS[:2]
+    hits.extend(HITS[2:])
+    assert len(hits) == len(HITS)
+    assert hits == HITS
+    assert list(hits) == HITS
+    assert hits[0] == HITS[0] and hits[-1] == HITS[-1]
+    assert hits[1:4] == HITS[1:4]
+    with pytest.raises(IndexError):
+        _ = hits[len(HITS)]
+    assert pickle.loads(pickle.dumps(hits)) == HITS
+
+
+def test_columnar_hits_delete() -> None:
+    hits = ColumnarHits(CrawlerFs.hits_header(Mode.EXTENDED), HITS)
+    hits.delete(1)
+    hits.delete(3)
+    hits.delete(3)
+    hits.append(HITS[1])
+    expected = [HITS[0], HITS[2], HITS[4], HITS[1]]
+    # Deleted rows are skipped, rows of other hits don't change
+    assert len(hits) == 4 and hits.deleted == 2 and hits.rows == 6
+    assert hits == expected and hits[1] == HITS[2] and hits[-1] == HITS[1] and hits[1:3] == expected[1:3]
+    assert hits.row(4) == HITS[4]
+    other = ColumnarHits(CrawlerFs.hits_header(Mode.EXTENDED))
+    other += hits
+    assert other == expected and other.deleted == 0
+    hits.compact()
+    assert hits == expected and hits.rows == 4 and hits.alive is None
+
+
+def test_columnar_hits_encoding() -> None:
+    hits = ColumnarHits(CrawlerFs.hits_header(Mode.EXTENDED), HITS)
+    paths, names = hits.columns[:2]
+    assert isinstance(paths, PathColumn) and isinstance(names, NameColumn)
+    # Parent directory is stored once, name only if it is not the base name of the path
+    assert len(paths.dirs) == 3
+    assert names.other == {3: "other"}
+    # Files of one directory take several times less memory than tuples of strings
+    many = [(os.path.join("/a", "b", "c", "%d.txt" % i), "%d.txt" % i) for i in range(1000)]
+    size = sum(sys.getsizeof(hit) + sys.getsizeof(hit[0]) + sys.getsizeof(hit[1]) for hit in many)
+    assert ColumnarHits(CrawlerFs.hits_header(Mode.SIMPLE), many).nbytes * 5 < size
+
+
+@pytest.mark.parametrize("mode", [Mode.SIMPLE, Mode.EXTENDED])
+def test_columnar_hits_numpy_dataframe(mode: Mode) -> None:
+    np = pytest.importorskip("numpy")
+    header = CrawlerFs.hits_header(mode)
+    hits = ColumnarHits(header, [hit[:len(header)] for hit in HITS])
+    arrays = hits.numpy()
+    assert list(arrays[Header.PATH]) == [hit[0] for hit in HITS]
+    if mode == Mode.EXTENDED:
+        # Numeric columns are views of the collected arrays
+        assert np.shares_memory(arrays[Header.SIZE], np.asarray(hits.columns[2]))
+        assert arrays[Header.MODIFIED].tolist() == [hit[3] for hit in HITS]
+        del arrays
+    results = Results(header, header)
+    results.hits += list(hits)
+    df = hits.dataframe()
+    assert df.columns.equals(results.dataframe().columns)
+    assert [tuple(row) for row in df.itertuples(index=False)] == list(hits)
+
+
+def test_columnar_hits_arrow(tmp_path: str) -> None:
+    pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    hits = ColumnarHits(CrawlerFs.hits_header(Mode.EXTENDED), HITS[:4])
+    table = hits.to_arrow()
+    assert table.column_names == [str(name) for name, _, _ in CrawlerFs.hits_header(Mode.EXTENDED)]
+    assert [tuple(row.values()) for row in table.to_pylist()] == HITS[:4]
+    path = os.path.join(str(tmp_path), "hits.parquet")
+    hits.to_parquet(path)
+    assert pq.read_table(path).equals(table)
+
+
+def test_results_columnar() -> None:
+    header = CrawlerFs.hits_header(Mode.SIMPLE)
+    results = Results(header, header, columnar=True)
+    results.hits += [hit[:2] for hit in HITS]
+    hits = results.hits
+    results.reset()
+    assert isinstance(results.hits, ColumnarHits) and len(results.hits) == 0
+    # Hits handed over before reset keep their content
+    assert len(hits) == len(HITS)
+    with pytest.raises(AssertionError):
+        Results(header, header, shared=True, columnar=True)
+
+
+def test_columnar_hits_merge() -> None:
+    header = CrawlerFs.hits_header(Mode.EXTENDED)
+    hits = ColumnarHits(header, HITS[:3])
+    # Batch of a worker has its own directory ids, pickled batch carries only the column buffers
+    batch = pickle.loads(pickle.dumps(ColumnarHits(header, HITS[2:] + HITS[:1])))
+    assert batch.columns[0].dir_codes == {parent: code for code, parent in enumerate(batch.columns[0].dirs)}
+    hits += batch
+    assert hits == HITS[:3] + HITS[2:] + HITS[:1]
+    assert len(hits.columns[0].dirs) == 3
+    assert hits.columns[1].other == {4: "other"}
+    # List of tuples takes batch hit by hit
+    hits_list = list(HITS[:1])
+    hits_list += batch
+    assert hits_list == HITS[:1] + HITS[2:] + HITS[:1]
+
+
+def test_columnar_hits_pickle_size() -> None:
+    header = CrawlerFs.hits_header(Mode.SIMPLE)
+    many = [(os.path.join("/data", "project", "files", "%d.txt" % i), "%d.txt" % i) for i in range(1000)]
+    assert len(pickle.dumps(ColumnarHits(header, many))) * 2 < len(pickle.dumps(many))
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+@pytest.mark.parametrize("mode", [Mode.SIMPLE, Mode.EXTENDED])
+def test_crawl_columnar(fake_fs: FakeFilesystem, mode: Mode, backend: Backend) -> None:
+    crawler = CrawlerFs(list(LINKS), mode=mode)
+    for _ in crawler:
+        pass
+    manager = CrawlMp(CrawlerFs, links=LINKS, num_proc=2, buffer_size=4, columnar=True, mode=mode,
+                      backend=backend, checkpoint="/crawl.log")
+    manager.start()
+    # Logged batches are column buffers too
+    assert sorted(Checkpoint("/crawl.log").load()[1]) == sorted(crawler.results.hits)
+    assert isinstance(manager.results.hits, ColumnarHits)
+    assert sorted(manager.results.hits) == sorted(crawler.results.hits)
+    assert len(manager.results.dataframe()) == len(crawler.results.hits)
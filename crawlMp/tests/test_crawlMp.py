@@ -7,6 +7,7 @@ from pyfakefs.fake_filesystem import FakeFilesystem
 from crawlMp import CrawlException
 from crawlMp.crawlMp import CrawlMp
 from crawlMp.crawlers.crawler_fs import CrawlerFs
+from crawlMp.enums import Backend
 
 
 def done_cb(_, done_event: Event) -> None:
@@ -120,6 +121,23 @@ def test_crawlMp_pause_resume(fake_fs: FakeFilesystem, pause_offset: float, fact
     assert len(manager.results.links_skipped) == 2 * factor
 
 
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_crawlMp_pause_results(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    done_event = Event()
+    manager = CrawlMp(CrawlerFs, links=["/"] * 4, num_proc=2, backend=backend, buffer_size=4)
+    manager.start(callback=lambda results: done_cb(results, done_event))
+    sleep(0.1)
+    manager.pause()
+    try:
+        # Results flushed by workers before they paused are already collected
+        hits = len(manager.results.hits)
+        sleep(0.3)
+        assert len(manager.results.hits) == hits
+    finally:
+        manager.resume()
+    assert done_event.wait(timeout=60)
+
+
 @pytest.mark.parametrize('factor', range(2, 10, 2))
 @pytest.mark.parametrize("pause_offset", [0.1, 0.5])
 @pytest.mark.parametrize("num_proc", [1, 2])
@@ -138,3 +156,42 @@ def test_crawlMp_pause_resume_stop(fake_fs: FakeFilesystem, factor: int, pause_o
     manager.stop()
     done_event.wait(timeout=5)
     assert done_event.is_set()
+
+
+def append_batch_cb(manager: CrawlMp, batch_ids: list) -> None:
+    batch_ids.append(manager.batch_id)
+    if manager.batch_id == 200:
+        manager.stop()
+    else:
+        manager.append_links(["/"])
+
+
+@pytest.mark.parametrize("num_proc", [1, 2])
+def test_crawlMp_small_batches_keep_alive(fake_fs: FakeFilesystem, num_proc: int) -> None:
+    batch_ids = []
+    manager = CrawlMp(CrawlerFs, links=["/"], num_proc=num_proc, keepalive=True, max_depth=0,
+                      on_batch_done=lambda m: append_batch_cb(m, batch_ids))
+    manager.start()
+    assert manager.batch_id == 200
+    # Every batch boundary is notified once, hits of every batch are delivered
+    assert batch_ids == list(range(batch_ids[0], 201)) and len(batch_ids) == 200
+    assert len(manager.results.hits) == 38 * 200
+    assert len(manager.results.links_followed) == 200
+
+
+@pytest.mark.parametrize("backend, num_proc, num_threads",
+                         [(Backend.THREAD, 1, 1), (Backend.THREAD, 4, 1), ("thread", 2, 3), (Backend.PROCESS, 2, 3)])
+def test_crawlMp_backend(fake_fs: FakeFilesystem, backend: Backend, num_proc: int, num_threads: int) -> None:
+    manager = CrawlMp(CrawlerFs, links=["/doc/source", "/numpy/doc"], num_proc=num_proc, num_threads=num_threads,
+                      backend=backend, buffer_size=4)
+    manager.start()
+    assert len(manager.workers) == num_proc
+    assert len(manager.results.hits) == 387
+    assert len(manager.results.links_followed) == 29
+    assert len(manager.results.links_skipped) == 1
+
+
+@pytest.mark.parametrize("num_threads", [0, -1])
+def test_crawlMp_num_threads_fail(fake_fs: FakeFilesystem, num_threads: int) -> None:
+    with pytest.raises(AssertionError):
+        CrawlMp(CrawlerFs, links=["/"], num_threads=num_threads)
@@ -1,5 +1,5 @@
 from multiprocessing import Event
-from threading import Thread, Lock
+from threading import Thread
 from time import sleep
 
 import pytest
@@ -8,41 +8,82 @@ from pyfakefs.fake_filesystem import FakeFilesystem
 from crawlMp.crawlWorker import CrawlWorker
 from crawlMp.crawlers.crawler_fs import CrawlerFs
 from crawlMp.results import Results
+from crawlMp.scheduler import Scheduler
 
 
 @pytest.mark.parametrize('factor', range(2, 10, 2))
 def test_crawl_worker(fake_fs: FakeFilesystem, factor: int) -> None:
     sig_pause = Event()
-    sig_idle = Event()
     results = Results(CrawlerFs.hits_header(), CrawlerFs.links_header())
-    lock_jobs_acq = Lock()
-    job_list = ["/"] * factor
-    worker_1 = CrawlWorker(results, CrawlerFs, job_list, sig_pause, sig_idle, lock_jobs_acq, links=None,
-                           buffer_size=5)
+    scheduler = Scheduler(1)
+    scheduler.offer(["/"] * factor)
+    worker_1 = CrawlWorker(CrawlerFs, scheduler, 0, sig_pause, links=None, buffer_size=5)
+    collector = Thread(target=scheduler.collect, args=(results,))
+    collector.start()
     t1 = Thread(target=worker_1.run)
     t1.start()
-    worker_1.wake_signal.set()
     sig_pause.set()
-    sleep(1)
+    assert scheduler.wait_for(lambda: scheduler.halted, timeout=10)
+    sleep(0.5)
     sig_pause.clear()
-    sleep(0.1)
-    worker_1.wake_signal.set()
-    sleep(0.2)
-    sig_idle.set()
-    sleep(0.2)
-    sig_idle.clear()
     worker_1.wake_signal.set()
-    if (len(job_list) > 0 and not worker_1.sig_idle.is_set()):
-        while len(job_list) != 0 or not worker_1.sig_idle.is_set():
-            worker_1.sig_idle.wait(timeout=10)
-            worker_1.stop()
-            worker_1.wake_signal.set()
-    else:
-        worker_1.stop()
-        worker_1.wake_signal.set()
+    assert scheduler.wait_for(lambda: scheduler.done, timeout=60)
+    worker_1.stop()
+    scheduler.wake()
     t1.join()
-    worker_2 = CrawlWorker(results, CrawlerFs, job_list, sig_pause, sig_idle, lock_jobs_acq, links=None)
+    scheduler.stop_collecting()
+    collector.join()
+    worker_2 = CrawlWorker(CrawlerFs, scheduler, 0, sig_pause, links=None)
     assert worker_2.worker_id - worker_1.worker_id == 1
     assert len(results.hits) == 1811 * factor
     assert len(results.links_followed) == 148 * factor
     assert len(results.links_skipped) == 2 * factor
+
+
+@pytest.mark.parametrize("num_slots", [1, 3])
+def test_scheduler_done(num_slots: int) -> None:
+    scheduler = Scheduler(num_slots)
+    assert not scheduler.is_done()
+    scheduler.offer(["a", "b"])
+    assert scheduler.pending == 2
+    done = [scheduler.set_idle(slot, 0) for slot in range(num_slots)]
+    assert not any(done)
+    scheduler.set_busy()
+    assert not scheduler.set_idle(0, -1)
+    scheduler.set_busy()
+    assert scheduler.set_idle(0, -1)
+    assert scheduler.is_done()
+
+
+def test_scheduler_results() -> None:
+    scheduler = Scheduler(1)
+    results = Results(CrawlerFs.hits_header(), CrawlerFs.links_header())
+    collector = Thread(target=scheduler.collect, args=(results,))
+    collector.start()
+    scheduler.send_results([("/a", "a")], ["/"], [])
+    scheduler.send_results([("/b", "b")], [], ["/c"])
+    scheduler.set_idle(0, 0)
+    assert scheduler.wait_for(lambda: scheduler.done, timeout=10)
+    scheduler.stop_collecting()
+    collector.join()
+    assert results.hits == [("/a", "a"), ("/b", "b")]
+    assert results.links_followed == ["/"]
+    assert results.links_skipped == ["/c"]
+
+
+def test_crawl_worker_streams_results(fake_fs: FakeFilesystem) -> None:
+    sig_pause = Event()
+    scheduler = Scheduler(1)
+    scheduler.offer(["/doc/source", "/numpy/doc"])
+    worker = CrawlWorker(CrawlerFs, scheduler, 0, sig_pause, links=None, buffer_size=5)
+    thread = Thread(target=worker.run)
+    thread.start()
+    assert scheduler.wait_for(lambda: scheduler.idle == 1 and scheduler.pending == 0, timeout=10)
+    worker.stop()
+    scheduler.wake()
+    thread.join()
+    scheduler.stop_collecting()
+    batches = list(iter(scheduler.results_queue.get, None))
+    # 30 links were crawled, results were sent after every 5 of them, not only when the worker went idle
+    assert len(batches) >= 6
+    assert sum(len(hits) for hits, *_ in batches) == 387
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from pathlib import Path
+from time import time
+from typing import List
+
+import pytest
+
+from crawlMp.crawlers.crawler_hash import CrawlerHash
+from crawlMp.dedup import DuplicateFinder
+from crawlMp.enums import Backend
+from crawlMp.hashing import HashCache, full_digest, partial_digest
+from crawlMp.pool import CrawlPool
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Real files modified long ago, so their digests are not racy.
+    """
+    root = tmp_path / "tree"
+    for directory in ["a", "b", "c"]:
+        (root / directory).mkdir(parents=True)
+    data = os.urandom(100000)
+    (root / "a" / "big").write_bytes(data)
+    (root / "b" / "big").write_bytes(data)
+    # Same size, head and tail, differs in the middle
+    (root / "c" / "big").write_bytes(data[:50000] + bytes([data[50000] ^ 1]) + data[50001:])
+    (root / "a" / "small").write_bytes(b"hello")
+    (root / "b" / "small").write_bytes(b"hello")
+    (root / "c" / "small").write_bytes(b"hellO")
+    (root / "a" / "empty").write_bytes(b"")
+    (root / "b" / "empty").write_bytes(b"")
+    (root / "c" / "unique").write_bytes(b"unique size")
+    os.link(str(root / "a" / "big"), str(root / "a" / "hardlink"))
+    old = time() - 3600
+    for path, _, files in os.walk(str(root)):
+        for name in files:
+            os.utime(os.path.join(path, name), (old, old))
+    return str(root)
+
+
+def paths(root: str, *names: str) -> List[str]:
+    return [os.path.join(root, name) for name in names]
+
+
+def test_digests(tree: str) -> None:
+    path = os.path.join(tree, "a", "big")
+    with open(path, "rb") as fp:
+        data = fp.read()
+    assert full_digest(path) == hashlib.blake2b(data).digest()
+    assert full_digest(path, "sha256") == hashlib.sha256(data).digest()
+    assert partial_digest(path, len(data), 4096) == hashlib.blake2b(data[:4096] + data[-4096:]).digest()
+    # File of at most two blocks is hashed whole
+    assert partial_digest(path, len(data), 50000) == full_digest(path)
+    assert partial_digest(os.path.join(tree, "c", "big"), len(data), 4096) == \
+           partial_digest(path, len(data), 4096)
+
+
+def test_hash_crawler(tree: str) -> None:
+    crawler = CrawlerHash(paths(tree, "a/big", "a/small", "missing"), partial=4096)
+    for _ in crawler:
+        pass
+    assert sorted(crawler.results.hits) == [
+        (os.path.join(tree, "a", "big"), 100000, partial_digest(os.path.join(tree, "a", "big"), 100000, 4096)),
+        (os.path.join(tree, "a", "small"), 5, full_digest(os.path.join(tree, "a", "small")))]
+    assert crawler.results.links_skipped == paths(tree, "missing")
+
+
+def test_hash_cache(tmp_path: Path, tree: str) -> None:
+    cache = HashCache(str(tmp_path / "digests.db"))
+    path = os.path.join(tree, "a", "small")
+    stat = os.stat(path)
+    assert cache.get(stat, "blake2b") is None
+    cache.put(stat, "blake2b", b"digest")
+    assert cache.get(stat, "blake2b") == b"digest"
+    assert cache.get(stat, "blake2b:4096") is None
+    # Changed file is hashed again, its digest replaces the old one
+    os.utime(path, (stat.st_atime - 10, stat.st_mtime - 10))
+    assert cache.get(os.stat(path), "blake2b") is None
+    cache.put(os.stat(path), "blake2b", b"new")
+    assert len(cache) == 1
+    # Recently modified file is not stored
+    os.utime(path)
+    cache.put(os.stat(path), "blake2b", b"racy")
+    assert cache.get(os.stat(path), "blake2b") is None
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_find_duplicates(tree: str, backend: Backend) -> None:
+    finder = DuplicateFinder(num_proc=2, backend=backend, partial=1024)
+    assert finder.find([tree]) == [paths(tree, "a/big", "a/hardlink", "b/big"), paths(tree, "a/small", "b/small")]
+    # Unique size is never read, only same-size files larger than two blocks are hashed whole
+    assert finder.stats == {"files": 8, "partial": 7, "full": 4}
+    assert paths(tree, "a/empty", "b/empty") in DuplicateFinder(num_proc=2, backend=backend, min_size=0).find([tree])
+
+
+def test_find_duplicates_cache(tmp_path: Path, tree: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = CrawlPool(2, backend=Backend.THREAD).start()
+    try:
+        finder = DuplicateFinder(pool=pool, cache=str(tmp_path / "digests.db"), partial=1024)
+        expected = finder.find([tree])
+        # Hard link shares digests of its file
+        assert len(finder.cache) == 6 + 3
+        hashed = []
+        monkeypatch.setattr("crawlMp.crawlers.crawler_hash.full_digest",
+                            lambda path, algorithm: hashed.append(path))
+        monkeypatch.setattr("crawlMp.crawlers.crawler_hash.partial_digest",
+                            lambda path, size, block, algorithm: hashed.append(path))
+        # Nothing changed, no file is hashed again
+        assert finder.find([tree]) == expected
+        assert hashed == []
+    finally:
+        pool.close()
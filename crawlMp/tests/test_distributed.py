@@ -0,0 +1,180 @@
+import os
+import subprocess
+import sys
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Connection
+from threading import Event
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+import crawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs
+from crawlMp.distributed import Coordinator, RemoteWorker
+from crawlMp.enums import Message, Mode
+
+authkey = b"secret"
+
+
+def sync_results(links: List[str], **kwargs) -> CrawlerFs:
+    crawler = CrawlerFs(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return crawler
+
+
+def assert_same_results(coordinator: Coordinator, crawler: CrawlerFs) -> None:
+    assert sorted(coordinator.results.hits) == sorted(crawler.results.hits)
+    assert sorted(coordinator.results.links_followed) == sorted(crawler.results.links_followed)
+    assert sorted(coordinator.results.links_skipped) == sorted(crawler.results.links_skipped)
+
+
+def serve(conn: Connection, links: List[str]) -> None:
+    coordinator = Coordinator(CrawlerFs, links, ("127.0.0.1", 0), authkey)
+    conn.send(coordinator.address)
+    coordinator.start()
+    results = coordinator.results
+    conn.send((results.hits, results.links_followed, results.links_skipped))
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+@pytest.mark.parametrize("batch_size, buffer_size", [(1, 1), (16, 4)])
+def test_distributed(fake_fs: FakeFilesystem, num_workers: int, batch_size: int, buffer_size: int) -> None:
+    links = ["/doc/source", "/numpy/doc"]
+    coordinator = Coordinator(CrawlerFs, list(links), ("127.0.0.1", 0), authkey, batch_size=batch_size)
+    done = Event()
+    coordinator.start(lambda c: done.set())
+    workers = [RemoteWorker(CrawlerFs, coordinator.address, authkey, buffer_size=buffer_size, heartbeat=1)
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    assert done.wait(30)
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+    assert_same_results(coordinator, sync_results(links))
+
+
+def test_distributed_lost_worker(fake_fs: FakeFilesystem) -> None:
+    coordinator = Coordinator(CrawlerSearchFs, ["/"], ("127.0.0.1", 0), authkey, batch_size=1, mode=Mode.EXTENDED)
+    done = Event()
+    coordinator.start(lambda c: done.set())
+    # Worker leases the only link and disappears without pushing any results
+    with Client(coordinator.address, authkey=authkey) as conn:
+        conn.send((Message.PULL,))
+        assert conn.recv() == ["/"]
+    assert not done.wait(0.2)
+    worker = RemoteWorker(CrawlerSearchFs, coordinator.address, authkey, buffer_size=2, pattern="\\.py$", max_depth=1,
+                          mode=Mode.EXTENDED)
+    worker.start()
+    assert done.wait(30)
+    worker.join(10)
+    assert len(coordinator.results.hits) == 4
+    assert len(coordinator.results.links_followed) == 1
+    assert all(len(hit) == 5 for hit in coordinator.results.hits)
+
+
+def test_distributed_stop(fake_fs: FakeFilesystem) -> None:
+    coordinator = Coordinator(CrawlerFs, ["/"], ("127.0.0.1", 0), authkey)
+    done = Event()
+    coordinator.start(lambda c: done.set())
+    coordinator.stop()
+    assert done.wait(5)
+    assert coordinator.stopped
+    assert len(coordinator.results.hits) == 0
+
+
+@pytest.mark.parametrize("batch_size", [0, -1])
+def test_distributed_batch_size_fail(fake_fs: FakeFilesystem, batch_size: int) -> None:
+    with pytest.raises(AssertionError):
+        Coordinator(CrawlerFs, ["/"], ("127.0.0.1", 0), authkey, batch_size=batch_size)
+
+
+def test_distributed_lease_timeout(fake_fs: FakeFilesystem) -> None:
+    coordinator = Coordinator(CrawlerFs, ["/doc/source"], ("127.0.0.1", 0), authkey, lease_timeout=0.5)
+    done = Event()
+    coordinator.start(lambda c: done.set())
+    # Worker leases the only link and stays connected, but is never heard of again
+    with Client(coordinator.address, authkey=authkey) as conn:
+        conn.send((Message.PULL,))
+        assert conn.recv() == ["/doc/source"]
+        worker = RemoteWorker(CrawlerFs, coordinator.address, authkey)
+        worker.start()
+        assert done.wait(30)
+        worker.join(10)
+        assert worker.exitcode == 0
+    assert_same_results(coordinator, sync_results(["/doc/source"]))
+
+
+def test_distributed_stop_busy_worker(fake_fs: FakeFilesystem) -> None:
+    coordinator = Coordinator(CrawlerFs, ["/"], ("127.0.0.1", 0), authkey, batch_size=1)
+    done = Event()
+    coordinator.start(lambda c: done.set())
+    worker = RemoteWorker(CrawlerFs, coordinator.address, authkey, buffer_size=1)
+    worker.start()
+    # Stop, when worker has links leased
+    with coordinator.cond:
+        assert coordinator.cond.wait_for(lambda: any(coordinator.leases.values()), 10)
+    coordinator.stop()
+    assert done.wait(10)
+    # Worker is told to finish with its next request
+    worker.join(10)
+    assert worker.exitcode == 0
+
+
+def test_distributed_coordinator_process(fake_fs: FakeFilesystem) -> None:
+    links = ["/doc/source", "/numpy/doc"]
+    parent_conn, child_conn = Pipe()
+    coordinator = Process(target=serve, args=(child_conn, links))
+    coordinator.start()
+    address = parent_conn.recv()
+    workers = [RemoteWorker(CrawlerFs, address, authkey, buffer_size=2) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    assert parent_conn.poll(30)
+    hits, links_followed, links_skipped = parent_conn.recv()
+    coordinator.join(10)
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+    crawler = sync_results(links)
+    assert sorted(hits) == sorted(crawler.results.hits)
+    assert sorted(links_followed) == sorted(crawler.results.links_followed)
+    assert sorted(links_skipped) == sorted(crawler.results.links_skipped)
+
+
+def test_distributed_coordinator_lost(fake_fs: FakeFilesystem) -> None:
+    parent_conn, child_conn = Pipe()
+    coordinator = Process(target=serve, args=(child_conn, ["/"]))
+    coordinator.start()
+    address = parent_conn.recv()
+    workers = [RemoteWorker(CrawlerFs, address, authkey, buffer_size=1) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    coordinator.terminate()
+    coordinator.join(10)
+    # Workers finish cleanly, when coordinator is gone
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+
+@pytest.mark.parametrize("key", [None, b""])
+def test_distributed_authkey_fail(fake_fs: FakeFilesystem, key: bytes) -> None:
+    with pytest.raises(AssertionError):
+        Coordinator(CrawlerFs, ["/"], ("127.0.0.1", 0), key)
+    with pytest.raises(AssertionError):
+        RemoteWorker(CrawlerFs, ("127.0.0.1", 7070), key)
+
+
+@pytest.mark.parametrize("option", ["--serve", "--connect"])
+def test_distributed_script_requires_authkey(option: str) -> None:
+    package_dir = os.path.dirname(os.path.dirname(crawlMp.__file__))
+    script = os.path.join(package_dir, "crawlMp", "scripts", "search_fs_mp")
+    env = {key: value for key, value in os.environ.items() if key != "CRAWLMP_AUTHKEY"}
+    env["PYTHONPATH"] = package_dir
+    process = subprocess.run([sys.executable, script, "x", option, "127.0.0.1:7070"], env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 2
+    assert "--authkey" in process.stderr
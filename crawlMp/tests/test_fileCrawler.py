@@ -1,14 +1,37 @@
+import asyncio
 import math
+import os
 from copy import copy
-from typing import List, Type
+from pathlib import Path
+from typing import List, Tuple, Type
 
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
+from crawlMp import CrawlException
 from crawlMp.crawlMp import CrawlMp
 from crawlMp.crawlers.crawler import Crawler
-from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs
-from crawlMp.enums import Mode
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs, AsyncCrawlerFs, AsyncCrawlerSearchFs, \
+    stat_header
+from crawlMp.enums import Mode, Backend, Header, Header_ref
+
+
+class CrawlerStatFs(CrawlerFs):
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return stat_header(Header.INODE, Header.MODE, Header.UID, Header.CHANGED, Header.SIZE)
+
+
+class CrawlerInodeFs(CrawlerFs):
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return stat_header(Header.INODE)
+
+
+class CrawlerBadFs(CrawlerFs):
+    @staticmethod
+    def hits_header(mode: Mode = Mode.SIMPLE) -> Tuple[Header_ref, ...]:
+        return stat_header() + ((Header.INPUT, str, None),)
 
 
 @pytest.mark.parametrize("links", [["/"], ["/doc/source", "/numpy/doc"]], ids=["all", "two-dir"])
@@ -107,3 +130,90 @@ def test_fs_crawl_extended_search(fake_fs: FakeFilesystem, num_proc: int) -> Non
 
 def test_fs_crawl_modes(fake_fs: FakeFilesystem) -> None:
     assert CrawlerFs.crawl_modes() == [Mode.SIMPLE, Mode.EXTENDED]
+
+
+@pytest.mark.parametrize("concurrency", [1, 8])
+@pytest.mark.parametrize("links, max_depth", [(["/doc/source", "/numpy/doc"], math.inf), (["/"], 2)],
+                         ids=["two-dir", "all-2"])
+def test_fs_crawl_async(fake_fs: FakeFilesystem, links: List[str], max_depth: int, concurrency: int) -> None:
+    sync_crawler = CrawlerFs(copy(links), max_depth=max_depth)
+    for _ in sync_crawler:
+        pass
+    crawler = AsyncCrawlerFs(copy(links), max_depth=max_depth, concurrency=concurrency)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(crawler.run())
+    finally:
+        loop.close()
+    assert sorted(crawler.results.hits) == sorted(sync_crawler.results.hits)
+    assert sorted(crawler.results.links_followed) == sorted(sync_crawler.results.links_followed)
+    assert sorted(crawler.results.links_skipped) == sorted(sync_crawler.results.links_skipped)
+    # AsyncCrawler is not a Crawler, it can't be iterated, executor is shut down after the run
+    assert not isinstance(crawler, Crawler)
+    assert crawler._executor is None
+
+
+@pytest.mark.parametrize("backend, num_proc", [(Backend.PROCESS, 1), (Backend.PROCESS, 2), (Backend.THREAD, 2)])
+def test_fs_crawl_async_mp(fake_fs: FakeFilesystem, backend: Backend, num_proc: int) -> None:
+    manager = CrawlMp(AsyncCrawlerSearchFs, links=["/"], num_proc=num_proc, backend=backend, pattern="\\.py$",
+                      max_depth=2, mode=Mode.EXTENDED, concurrency=4, buffer_size=4)
+    manager.start()
+    assert len(manager.results.hits) == 239
+    assert len(manager.results.links_followed) == 41
+    assert len(manager.results.links_skipped) == 2
+    assert all(len(hit) == 5 for hit in manager.results.hits)
+
+
+@pytest.mark.parametrize("concurrency", [0, -1])
+def test_fs_crawl_async_concurrency_fail(fake_fs: FakeFilesystem, concurrency: int) -> None:
+    with pytest.raises(AssertionError):
+        AsyncCrawlerFs(["/"], concurrency=concurrency)
+
+
+def test_fs_crawl_extended_header(fake_fs: FakeFilesystem) -> None:
+    # Header of EXTENDED mode is built from stat columns, columns didn't change
+    assert CrawlerFs.hits_header(Mode.EXTENDED) == ((Header.PATH, str, None), (Header.NAME, str, None),
+                                                    (Header.SIZE, float, "byte"),
+                                                    (Header.MODIFIED, float, "timestamp"),
+                                                    (Header.ACCESSED, float, "timestamp"))
+    crawler = CrawlerFs(["/doc/source"], mode=Mode.EXTENDED)
+    for _ in crawler:
+        pass
+    for path, name, size, modified, accessed in crawler.results.hits:
+        stat = os.stat(path)
+        assert (name, size, modified, accessed) == (os.path.basename(path), stat.st_size, stat.st_mtime,
+                                                    stat.st_atime)
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_fs_crawl_stat_columns(tmp_path: Path, backend: Backend) -> None:
+    for i in range(3):
+        (tmp_path / str(i)).mkdir()
+        (tmp_path / str(i) / "file.txt").write_text("x" * i)
+        os.chmod(str(tmp_path / str(i) / "file.txt"), 0o600 + i)
+    manager = CrawlMp(CrawlerStatFs, links=[str(tmp_path)], num_proc=2, backend=backend)
+    manager.start()
+    assert len(manager.results.hits) == 3
+    for path, name, inode, mode, uid, changed, size in manager.results.hits:
+        stat = os.stat(path)
+        assert (inode, mode, uid, changed, size) == (stat.st_ino, stat.st_mode, stat.st_uid, stat.st_ctime,
+                                                     stat.st_size)
+    assert list(manager.results.dataframe().columns.get_level_values(0)) == \
+           [Header.PATH, Header.NAME, Header.INODE, Header.MODE, Header.UID, Header.CHANGED, Header.SIZE]
+
+
+def test_fs_crawl_inode_column(tmp_path: Path) -> None:
+    (tmp_path / "file.txt").write_text("")
+    os.symlink(str(tmp_path / "file.txt"), str(tmp_path / "link.txt"))
+    crawler = CrawlerInodeFs([str(tmp_path)], follow_symlinks=True)
+    for _ in crawler:
+        pass
+    # Inode of the file is taken from the listing, inode of the symlink target from stat
+    inode = os.stat(str(tmp_path / "file.txt")).st_ino
+    assert sorted(crawler.results.hits) == [(str(tmp_path / "file.txt"), "file.txt", inode),
+                                            (str(tmp_path / "link.txt"), "link.txt", inode)]
+
+
+def test_fs_crawl_unknown_column(fake_fs: FakeFilesystem) -> None:
+    with pytest.raises(CrawlException):
+        CrawlerBadFs(["/doc/source"])
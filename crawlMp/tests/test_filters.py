@@ -0,0 +1,114 @@
+import os
+import pickle
+import re
+from pathlib import Path
+from time import time
+from typing import Any, List
+
+import pytest
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs, AsyncCrawlerFs
+from crawlMp.enums import Backend, Mode
+from crawlMp.filters import FileFilter, parse_size
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Real files, sizes and mtimes are set for every file.
+    """
+    old = time() - 10 * 86400
+    for i in range(2):
+        directory = tmp_path / str(i)
+        directory.mkdir()
+        for name, size, mtime in [("a.zip", 10, old), ("b.ZIP", 2000, None), ("c.tar.gz", 5000, old),
+                                  ("d.txt", 0, None), ("e.zip", 100000, None)]:
+            path = directory / name
+            path.write_bytes(b"x" * size)
+            if mtime is not None:
+                os.utime(str(path), (mtime, mtime))
+    return str(tmp_path)
+
+
+def crawl(links: List[str], crawler_class: type = CrawlerFs, **kwargs: Any) -> List[str]:
+    crawler = crawler_class(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return sorted(os.path.relpath(hit[0], links[0]) for hit in crawler.results.hits)
+
+
+@pytest.mark.parametrize("size, expected", [("512", 512), ("10k", 10240), ("1.5M", 1572864), ("2G", 2 ** 31),
+                                            ("1 KiB", 1024), ("3mb", 3 * 2 ** 20)])
+def test_parse_size(size: str, expected: int) -> None:
+    assert parse_size(size) == expected
+
+
+def test_parse_size_fail() -> None:
+    with pytest.raises(ValueError):
+        parse_size("10x")
+
+
+@pytest.mark.parametrize("kwargs, expected", [
+    ({}, ["a.zip", "b.ZIP", "c.tar.gz", "d.txt", "e.zip"]),
+    ({"extensions": ["zip", ".gz"]}, ["a.zip", "c.tar.gz", "e.zip"]),
+    ({"name": "*.tar.*"}, ["c.tar.gz"]),
+    ({"regex": "^[ab]"}, ["a.zip", "b.ZIP"]),
+    ({"min_size": 2000}, ["b.ZIP", "c.tar.gz", "e.zip"]),
+    ({"min_size": 1, "max_size": 5000}, ["a.zip", "b.ZIP", "c.tar.gz"]),
+    ({"extensions": ["zip"], "max_size": 1000}, ["a.zip"]),
+    ({"newer": time() - 86400}, ["b.ZIP", "d.txt", "e.zip"]),
+    ({"older": time() - 86400, "name": "*.zip"}, ["a.zip"]),
+    ({"owner": os.getuid()}, ["a.zip", "b.ZIP", "c.tar.gz", "d.txt", "e.zip"]),
+    ({"owner": os.getuid() + 1}, []),
+])
+def test_filter(tree: str, kwargs: dict, expected: List[str]) -> None:
+    file_filter = FileFilter(**kwargs)
+    assert crawl([tree], file_filter=file_filter) == sorted(os.path.join(d, name) for d in "01" for name in expected)
+    for name in ["a.zip", "b.ZIP", "c.tar.gz", "d.txt", "e.zip"]:
+        assert file_filter.match(os.path.join(tree, "0", name)) == (name in expected)
+
+
+def test_filter_from_age(tree: str) -> None:
+    assert crawl([tree], file_filter=FileFilter.from_age(older_days=5, extensions=["gz"])) == \
+           ["0/c.tar.gz", "1/c.tar.gz"]
+    assert crawl([tree], file_filter=FileFilter.from_age(newer_days=1, min_size=3000)) == ["0/e.zip", "1/e.zip"]
+
+
+def test_filter_search_extended(tree: str) -> None:
+    # Pattern of the crawler and the filter must match both, stat of the filter is reused for hit columns
+    crawler = CrawlerSearchFs([tree], pattern=r"\.zip$", mode=Mode.EXTENDED, file_filter=FileFilter(min_size=50))
+    for _ in crawler:
+        pass
+    hits = sorted(crawler.results.hits)
+    assert [(os.path.relpath(hit[0], tree), hit[2]) for hit in hits] == [("0/e.zip", 100000), ("1/e.zip", 100000)]
+
+
+def test_filter_owner_name(tree: str) -> None:
+    pwd = pytest.importorskip("pwd")
+    file_filter = FileFilter(owner=pwd.getpwuid(os.getuid()).pw_name)
+    assert file_filter.owner == os.getuid()
+
+
+def test_filter_pickle() -> None:
+    file_filter = FileFilter(name="*.zip", extensions=["zip"], min_size=10)
+    name_test, stat_test = file_filter.compile()
+    assert name_test("x.zip") and not name_test("x.tar")
+    copy = pickle.loads(pickle.dumps(file_filter))
+    assert copy._compiled is None
+    assert (copy.name, copy.extensions, copy.min_size) == ("*.zip", (".zip",), 10)
+    assert repr(copy) == "FileFilter(name='*.zip', extensions=('.zip',), min_size=10)"
+
+
+def test_filter_invalid_regex() -> None:
+    with pytest.raises(re.error):
+        CrawlerFs(["/"], file_filter=FileFilter(regex="("))
+
+
+@pytest.mark.parametrize("crawler_class, backend", [(CrawlerFs, Backend.PROCESS), (CrawlerFs, Backend.THREAD),
+                                                    (AsyncCrawlerFs, Backend.PROCESS)])
+def test_filter_crawl_mp(tree: str, crawler_class: type, backend: Backend) -> None:
+    file_filter = FileFilter(extensions=["zip"], min_size=1000)
+    manager = CrawlMp(crawler_class, links=[tree], num_proc=2, backend=backend, file_filter=file_filter)
+    manager.start()
+    assert sorted(os.path.relpath(hit[0], tree) for hit in manager.results.hits) == ["0/e.zip", "1/e.zip"]
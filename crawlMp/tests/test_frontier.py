@@ -0,0 +1,85 @@
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerFs
+from crawlMp.enums import Traversal
+from crawlMp.frontier import FifoFrontier, LifoFrontier, PriorityFrontier, new_frontier
+
+LINKS = ["/doc/source", "/numpy/doc"]
+
+
+def deepest_first(path: str) -> int:
+    return -path.count("/")
+
+
+def crawl_order(traversal: Traversal, links: List[str] = LINKS, **kwargs) -> List[str]:
+    crawler = CrawlerFs(list(links), traversal=traversal, **kwargs)
+    for _ in crawler:
+        pass
+    return crawler.results.links_followed
+
+
+@pytest.mark.parametrize("frontier_class, order, split", [
+    (FifoFrontier, ["a", "b", "c", "d"], ["c", "d"]),
+    (LifoFrontier, ["d", "c", "b", "a"], ["a", "b"]),
+    (PriorityFrontier, ["a", "b", "c", "d"], ["c", "d"]),
+])
+def test_frontier_order(frontier_class: type, order: List[str], split: List[str]) -> None:
+    frontier = frontier_class(["a", "b"])
+    frontier += ["c", "d"]
+    assert sorted(frontier) == ["a", "b", "c", "d"]
+    assert len(frontier) == 4
+    assert [frontier.pop() for _ in range(4)] == order
+    assert not frontier
+    # Links crawled last are split off
+    frontier.extend(["a", "b", "c", "d"])
+    assert frontier.split(2) == split
+    assert sorted(frontier) == sorted(set("abcd") - set(split))
+    assert len(frontier.split(3)) == 2
+    assert frontier.split(1) == []
+
+
+def test_frontier_priority_key() -> None:
+    frontier = PriorityFrontier(["/a", "/a/b/c", "/a/b", "/d/e"], key=deepest_first)
+    # Equal priorities keep insertion order
+    assert [frontier.pop() for _ in range(4)] == ["/a/b/c", "/a/b", "/d/e", "/a"]
+
+
+def test_frontier_new() -> None:
+    assert isinstance(new_frontier(), FifoFrontier)
+    assert isinstance(new_frontier("dfs"), LifoFrontier)
+    assert list(new_frontier(Traversal.PRIORITY, links=["b", "a"])) == ["a", "b"]
+    with pytest.raises(ValueError):
+        new_frontier("random")
+
+
+def test_frontier_crawler_traversal(fake_fs: FakeFilesystem) -> None:
+    bfs, dfs = crawl_order(Traversal.BFS, links=["/doc"]), crawl_order(Traversal.DFS, links=["/doc"])
+    assert sorted(bfs) == sorted(dfs)
+    # Breadth-first crawl goes level by level
+    depths = [link.count("/") for link in bfs]
+    assert depths == sorted(depths)
+    # Depth-first crawl finishes every subtree before it leaves it
+    for i, link in enumerate(dfs):
+        inside = [other == link or other.startswith(link + "/") for other in dfs[i:]]
+        assert inside == sorted(inside, reverse=True)
+    deepest = crawl_order(Traversal.PRIORITY, links=["/doc"], priority=deepest_first)
+    assert sorted(deepest) == sorted(bfs)
+    assert deepest != bfs
+
+
+@pytest.mark.parametrize("traversal", list(Traversal))
+def test_frontier_crawlMp(fake_fs: FakeFilesystem, traversal: Traversal) -> None:
+    manager = CrawlMp(CrawlerFs, links=list(LINKS), num_proc=2, buffer_size=2, traversal=traversal,
+                      priority=deepest_first)
+    manager.start()
+    assert sorted(manager.results.links_followed) == sorted(crawl_order(Traversal.BFS))
+
+
+def test_frontier_async(fake_fs: FakeFilesystem) -> None:
+    manager = CrawlMp(AsyncCrawlerFs, links=list(LINKS), num_proc=2, traversal=Traversal.DFS, concurrency=4)
+    manager.start()
+    assert sorted(manager.results.links_followed) == sorted(crawl_order(Traversal.BFS))
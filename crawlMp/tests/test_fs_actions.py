@@ -1,10 +1,18 @@
+import errno
 import os
+from pathlib import Path
+from typing import Dict, Tuple
 
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
 from crawlMp import ActionException
-from crawlMp.actions.action_fs import Copy, Move, Remove
+from crawlMp.actions import action_fs
+from crawlMp.actions.action import Action
+from crawlMp.actions.action_fs import Copy, Move, Remove, copy_file
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs
+from crawlMp.enums import Backend, Mode
 
 
 @pytest.mark.parametrize("target_dir", ["/numpy/random/include/", "/not_existed"])
@@ -57,3 +65,142 @@ def test_fs_Move(fake_fs: FakeFilesystem, target_dir: str) -> None:
     action = Move(target_dir=target_dir)
     action.do(source_file)
     assert not os.path.isfile(source_file)
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Real files, kernel copy calls need real file descriptors.
+    """
+    root = tmp_path / "src"
+    for directory in ["a", "a/b", "c"]:
+        (root / directory).mkdir(parents=True)
+    (root / "a" / "big.bin").write_bytes(os.urandom(3 * 2 ** 20 + 7))
+    (root / "a" / "b" / "small.txt").write_text("small")
+    (root / "c" / "empty").write_bytes(b"")
+    os.chmod(str(root / "a" / "b" / "small.txt"), 0o640)
+    return str(root)
+
+
+def tree_files(root: str) -> Dict[str, bytes]:
+    files = {}
+    for path, _, names in os.walk(root):
+        for name in names:
+            with open(os.path.join(path, name), "rb") as fp:
+                files[os.path.relpath(os.path.join(path, name), root)] = fp.read()
+    return files
+
+
+@pytest.mark.parametrize("flags", [("USE_REFLINK", "USE_COPY_FILE_RANGE", "USE_SENDFILE"),
+                                   ("USE_COPY_FILE_RANGE", "USE_SENDFILE"), ("USE_SENDFILE",), ()])
+def test_copy_file(tree: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, flags: Tuple[str, ...]) -> None:
+    # Every copy path, read/write loop is the last one
+    for flag in ["USE_REFLINK", "USE_COPY_FILE_RANGE", "USE_SENDFILE"]:
+        monkeypatch.setattr(action_fs, flag, flag in flags and getattr(action_fs, flag))
+    for name in ["a/big.bin", "a/b/small.txt", "c/empty"]:
+        target = str(tmp_path / os.path.basename(name))
+        copy_file(os.path.join(tree, name), target, times=True, fsync=True)
+        source_stat, target_stat = os.stat(os.path.join(tree, name)), os.stat(target)
+        assert tree_files(str(tmp_path))[os.path.basename(name)] == tree_files(tree)[name]
+        assert target_stat.st_mode == source_stat.st_mode
+        assert target_stat.st_mtime_ns == source_stat.st_mtime_ns
+
+
+def test_copy_batch(tree: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    target_dir = str(tmp_path / "dst")
+    made = []
+    makedirs = os.makedirs
+    monkeypatch.setattr(os, "makedirs", lambda path, exist_ok: made.append(path) or makedirs(path, exist_ok=exist_ok))
+    action = Copy(target_dir, base_dir=tree, fsync=True)
+    links = [os.path.join(tree, "a", "big.bin"), os.path.join(tree, "missing"), os.path.join(tree, "c", "empty"),
+             os.path.join(tmp_path, "outside")]
+    outputs = action.do_batch(links)
+    assert outputs[0] == os.path.join(target_dir, "a", "big.bin")
+    assert outputs[2] == os.path.join(target_dir, "c", "empty")
+    assert isinstance(outputs[1], ActionException) and isinstance(outputs[3], ActionException)
+    # Target directory of every link is created once per batch
+    assert sorted(made) == [target_dir, os.path.join(target_dir, "a"), os.path.join(target_dir, "c")]
+    # Copy onto itself is valid, file is not touched
+    assert Copy(os.path.join(target_dir, "a")).do(outputs[0]) == outputs[0]
+    assert tree_files(target_dir)[os.path.join("a", "big.bin")] == tree_files(tree)[os.path.join("a", "big.bin")]
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_copy_crawl(tree: str, tmp_path: Path, backend: Backend) -> None:
+    target_dir = str(tmp_path / "dst")
+    manager = CrawlMp(CrawlerFs, links=[tree], num_proc=2, backend=backend,
+                      actions=(Copy(target_dir, base_dir=os.path.dirname(tree)),))
+    manager.start()
+    assert len(manager.results.hits) == 3
+    # Relative structure is kept under the target
+    assert tree_files(os.path.join(target_dir, "src")) == tree_files(tree)
+
+
+def test_move_batch(tree: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = tree_files(tree)
+    target_dir = str(tmp_path / "dst")
+    rename = os.rename
+
+    def cross_device(src: str, dst: str) -> None:
+        # Files of c/ are on another filesystem
+        if os.sep + "c" + os.sep in src:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", cross_device)
+    links = [os.path.join(tree, name) for name in ["a/big.bin", "a/b/small.txt", "c/empty"]]
+    assert Move(target_dir, base_dir=tree, fsync=True).do_batch(links) == \
+           [os.path.join(target_dir, name) for name in ["a/big.bin", "a/b/small.txt", "c/empty"]]
+    assert tree_files(target_dir) == expected
+    assert tree_files(tree) == {}
+    # Existing target is never replaced
+    (tmp_path / "other").write_text("first")
+    Move(target_dir).do(str(tmp_path / "other"))
+    (tmp_path / "other").write_text("second")
+    with pytest.raises(ActionException):
+        Move(target_dir).do(str(tmp_path / "other"))
+    assert tree_files(target_dir)["other"] == b"first"
+    assert (tmp_path / "other").read_text() == "second"
+
+
+def test_move_symlink(tree: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def cross_device(src: str, dst: str) -> None:
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "rename", cross_device)
+    link = os.path.join(tree, "c", "link")
+    os.symlink(os.path.join(tree, "a", "big.bin"), link)
+    target_dir = str(tmp_path / "dst")
+    # Symlink is recreated on the other filesystem, the file it points to is not copied
+    assert Move(target_dir).do(link) == os.path.join(target_dir, "link")
+    assert os.readlink(os.path.join(target_dir, "link")) == os.path.join(tree, "a", "big.bin")
+    assert not os.path.lexists(link) and os.path.isfile(os.path.join(tree, "a", "big.bin"))
+
+
+class SkipText(Action):
+    def do(self, link: str) -> str:
+        if link.endswith(".txt"):
+            raise ActionException(link)
+        return link
+
+
+def test_actions_batch(tree: str, tmp_path: Path) -> None:
+    target_dir = str(tmp_path / "dst")
+    crawler = CrawlerFs([tree], actions=(SkipText(), Copy(target_dir, base_dir=tree)))
+    for _ in crawler:
+        pass
+    # Hit failed by the first action is not a hit and never reaches the next action
+    assert sorted(hit[1] for hit in crawler.results.hits) == ["big.bin", "empty"]
+    assert sorted(tree_files(target_dir)) == [os.path.join("a", "big.bin"), os.path.join("c", "empty")]
+
+
+def test_actions_after_stat(tree: str, tmp_path: Path) -> None:
+    expected = sorted((os.path.join(path, name), os.path.getsize(os.path.join(path, name)))
+                      for path, _, names in os.walk(tree) for name in names)
+    target_dir = str(tmp_path / "dst")
+    crawler = CrawlerFs([tree], mode=Mode.EXTENDED, actions=(Move(target_dir, base_dir=tree),))
+    for _ in crawler:
+        pass
+    # Files are stat-ed before actions, hits describe moved files as they were found
+    assert sorted((hit[0], hit[2]) for hit in crawler.results.hits) == expected
+    assert tree_files(tree) == {}
@@ -0,0 +1,142 @@
+import mmap
+import os
+import pickle
+import random
+import re
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerGrepFs, CrawlerSearchFs
+from crawlMp.enums import Backend, Header, Mode
+from crawlMp.filters import FileFilter
+from crawlMp.grep import FileChunk, grep_chunk, grep_file, line_start, resolve_lines, split_file
+
+
+def reference(path: str, pattern: bytes) -> List[Tuple[int, int]]:
+    """
+    Line by line search, first match of every line.
+    """
+    with open(path, "rb") as fp:
+        data = fp.read()
+    matches, offset = [], 0
+    lines = data.split(b"\n")
+    if data.endswith(b"\n"):
+        lines.pop()
+    for line_number, line in enumerate(lines, 1):
+        match = re.search(pattern, line)
+        if match is not None:
+            matches.append((line_number, offset + match.start()))
+        offset += len(line) + 1
+    return matches
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    rng = random.Random(7)
+    lines = [("error %d" % i) if rng.random() < 0.05 else "x" * rng.randint(0, 60) for i in range(5000)]
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "logs" / "big.log").write_text("\n".join(lines) + "\n")
+    (tmp_path / "logs" / "tail.log").write_text("ok\nerror without newline")
+    (tmp_path / "a.txt").write_text("error\nfine\nan error, another error\n")
+    (tmp_path / "b.txt").write_text("fine\n")
+    (tmp_path / "empty.txt").write_text("")
+    (tmp_path / "core.bin").write_bytes(b"\x7fELF\0\0error\n")
+    return str(tmp_path)
+
+
+def crawl(links: List[str], **kwargs: Any) -> List[Tuple[Any, ...]]:
+    crawler = CrawlerGrepFs(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits)
+
+
+def expected(root: str, names: List[str], pattern: bytes = b"error") -> List[Tuple[Any, ...]]:
+    hits = []
+    for name in names:
+        path = os.path.join(root, name)
+        hits += [(path, os.path.basename(path)) + match for match in reference(path, pattern)]
+    return sorted(hits)
+
+
+def test_split_file(tmp_path: Path) -> None:
+    path = tmp_path / "lines"
+    path.write_bytes(b"ab\ncd\n\nef")
+    f = str(path)
+    assert split_file(f, 9, 4) == [FileChunk(f, 0, 4), FileChunk(f, 4, 8), FileChunk(f, 8, 9)]
+    assert split_file(f, 9, 9) == [FileChunk(f, 0, 9)]
+    # Scanned chunk is the same link, borders are moved to line starts, newlines of the range are counted
+    chunks = [grep_chunk(chunk, re.compile(b"c|f"))[0] for chunk in split_file(f, 9, 4)]
+    assert chunks == split_file(f, 9, 4)
+    assert [chunk[3:] for chunk in chunks] == [(0, 2), (6, 1), (9, 0)]
+    assert pickle.loads(pickle.dumps(chunks[1])) == chunks[1]
+    assert pickle.loads(pickle.dumps(chunks[1])).lines == 1
+
+
+def test_line_start(tmp_path: Path) -> None:
+    path = tmp_path / "lines"
+    path.write_bytes(b"ab\ncd\n\nef")
+    with open(str(path), "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        assert [line_start(data, offset) for offset in range(10)] == [0, 3, 3, 3, 6, 6, 6, 7, 9, 9]
+
+
+@pytest.mark.parametrize("pattern", [b"error", b"^x{59}$", b"^$", rb"\d+$"])
+def test_grep_chunks(tree: str, pattern: bytes) -> None:
+    path = os.path.join(tree, "logs", "big.log")
+    whole = grep_file(path, re.compile(pattern, re.MULTILINE))
+    assert whole == reference(path, pattern)
+    for chunk_size in [1, 100, 4096]:
+        hits, chunks = [], []
+        for chunk in split_file(path, os.path.getsize(path), chunk_size):
+            chunk, matches = grep_chunk(chunk, re.compile(pattern, re.MULTILINE))
+            chunks.append(chunk)
+            hits += [(path,) + match for match in matches]
+        # Every line is searched by exactly one chunk, line numbers are resolved by newlines of preceding chunks
+        resolve_lines(hits, 0, reversed(chunks))
+        assert [hit[1:] for hit in hits] == whole
+        if len(chunks) > 1 and whole:
+            # Lines of the file with a missing chunk are not resolved
+            relative = hits[:1] + [(path, 1, whole[0][1])]
+            resolve_lines(relative, 1, chunks[1:])
+            assert relative[1] == (path, 1, whole[0][1])
+
+
+def test_grep_crawler(tree: str) -> None:
+    names = ["a.txt", "logs/big.log", "logs/tail.log"]
+    hits = crawl([tree], content="error")
+    assert hits == expected(tree, names)
+    # Binary files and empty files are skipped, only the first match of the line is a hit
+    assert [hit[2:] for hit in hits if hit[1] == "a.txt"] == [(1, 0), (3, 14)]
+    # Binary file is searched on demand
+    assert len(crawl([tree], content="error", binary=True)) == len(hits) + 1
+    # Large files are crawled as chunks, hits are the same
+    assert crawl([tree], content=b"error", chunk_size=512) == hits
+    # Name pattern and filters select files to search in
+    assert crawl([tree], content="error", pattern=r"\.log$") == expected(tree, names[1:])
+    assert crawl([tree], content="error", file_filter=FileFilter(max_size=1000)) == \
+           expected(tree, ["a.txt", "logs/tail.log"])
+    assert crawl([tree], content="error", exclude=["logs/"]) == expected(tree, ["a.txt"])
+
+
+def test_grep_crawler_extended(tree: str) -> None:
+    header = CrawlerGrepFs.hits_header(Mode.EXTENDED)
+    assert header[:-2] == CrawlerSearchFs.hits_header(Mode.EXTENDED)
+    assert [name for name, _, _ in header[-2:]] == [Header.LINE, Header.OFFSET]
+    hits = crawl([tree], content="error", mode=Mode.EXTENDED, chunk_size=512)
+    assert [hit[:2] + hit[-2:] for hit in hits] == crawl([tree], content="error")
+    for hit in hits:
+        assert hit[2] == os.path.getsize(hit[0])
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_grep_mp(tree: str, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerGrepFs, links=[tree], num_proc=4, backend=backend, buffer_size=4, columnar=True,
+                      content="error", chunk_size=256)
+    manager.start()
+    assert sorted(manager.results.hits) == crawl([tree], content="error")
+    chunks = [link for link in manager.results.links_followed if isinstance(link, FileChunk)]
+    path = os.path.join(tree, "logs", "big.log")
+    assert len(chunks) == len(split_file(path, os.path.getsize(path), 256))
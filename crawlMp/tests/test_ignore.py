@@ -0,0 +1,141 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Any, List, Optional
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs, AsyncCrawlerFs
+from crawlMp.enums import Backend
+from crawlMp.ignore import IgnoreRules
+from crawlMp.tests.conftest import run_crawler
+
+RULES = ["node_modules/", "*.o", "/proc", "build/**/*.tmp", "**/cache", "# comment", "", "foo\\ ", "\\#hash",
+         "[!a-c]x.log"]
+
+
+def crawl(crawler_class: type, links: List[str], **kwargs: Any) -> Any:
+    return run_crawler(crawler_class(list(links), **kwargs)).results
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Project tree with ignore files in the root, in a subdirectory and above the root.
+    """
+    (tmp_path / ".ignore").write_text("*.secret\n")
+    root = tmp_path / "project"
+    for path in ["a.py", "a.o", "keep.o", "notes.secret", "src/b.py", "src/gen/c.py", "src/gen/keep.py",
+                 "node_modules/x/y.py", "docs/d.md", "docs/drafts/e.md"]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("")
+    (root / ".ignore").write_text("*.o\n!keep.o\nnode_modules/\n/docs/drafts/\n")
+    (root / "src" / ".ignore").write_text("gen/*\n!gen/keep.py\n")
+    return str(root)
+
+
+def relative(tree: str, paths: List[str]) -> List[str]:
+    return sorted(os.path.relpath(path, tree) for path in paths)
+
+
+@pytest.mark.parametrize("path, is_dir, expected", [
+    ("/a/node_modules", True, True),
+    ("/a/node_modules", False, None),
+    ("/x/y.o", False, True),
+    ("/proc", True, True),
+    ("/a/proc", True, None),
+    ("/build/a/b/c.tmp", False, True),
+    ("/build/c.tmp", False, True),
+    ("/a/build/c.tmp", False, None),
+    ("/z/cache", True, True),
+    ("/foo ", False, True),
+    ("/foo", False, None),
+    ("/#hash", False, True),
+    ("/dx.log", False, True),
+    ("/ax.log", False, None),
+])
+def test_rules(path: str, is_dir: bool, expected: Optional[bool]) -> None:
+    rules = IgnoreRules(RULES)
+    assert rules.joined is not None
+    assert rules.match(path, os.path.basename(path), is_dir) == expected
+    # Same result without joined rules
+    rules.joined = None
+    assert rules.match(path, os.path.basename(path), is_dir) == expected
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/repo/a.o", True),
+    ("/repo/keep.o", False),
+    ("/repo/src/x.c", True),
+    ("/repo/src/main.c", False),
+    ("/repo/src/sub/x.c", None),
+    ("/other/src/x.c", None),
+])
+def test_rules_negate(path: str, expected: Optional[bool]) -> None:
+    rules = IgnoreRules(["*.o", "!keep.o", "src/*.c", "!src/main.c"], "/repo")
+    assert rules.joined is None
+    assert rules.match(path, os.path.basename(path), False) == expected
+
+
+def test_rules_pickle() -> None:
+    rules = IgnoreRules(RULES, "/base")
+    copy = pickle.loads(pickle.dumps(rules))
+    assert (copy.lines, copy.base, len(copy)) == (RULES, "/base", 8)
+    assert copy.match("/base/proc", "proc", True)
+
+
+@pytest.mark.parametrize("crawler_class", [CrawlerFs, AsyncCrawlerFs])
+def test_exclude(fake_fs: FakeFilesystem, crawler_class: type) -> None:
+    results = crawl(crawler_class, ["/"])
+    rules = IgnoreRules(["doc/", "/numpy/core", "*.py"])
+    pruned = crawl(crawler_class, ["/"], exclude=["doc/", "/numpy/core", "*.py"])
+
+    def kept(path: str, is_dir: bool) -> bool:
+        parts = path.split(os.sep)
+        # Nothing in the excluded directories is crawled
+        for i in range(2, len(parts)):
+            if rules.match(os.sep.join(parts[:i]), parts[i - 1], True):
+                return False
+        return not rules.match(path, parts[-1], is_dir)
+
+    assert len(pruned.links_followed) < len(results.links_followed)
+    assert sorted(pruned.links_followed) == sorted(path for path in results.links_followed if kept(path, True))
+    assert sorted(pruned.hits) == sorted(hit for hit in results.hits if kept(hit[0], False))
+
+
+@pytest.mark.parametrize("crawler_class", [CrawlerFs, AsyncCrawlerFs])
+def test_ignore_file(tree: str, crawler_class: type) -> None:
+    results = crawl(crawler_class, [tree], ignore_file=".ignore")
+    assert relative(tree, [hit[0] for hit in results.hits]) == [
+        ".ignore", "a.py", "docs/d.md", "keep.o", "src/.ignore", "src/b.py", "src/gen/keep.py"]
+    assert relative(tree, results.links_followed) == [".", "docs", "src", "src/gen"]
+    # Rules given to the crawler override ignore files
+    results = crawl(crawler_class, [tree], ignore_file=".ignore", exclude=["gen/", "!*.secret", ".ignore"])
+    assert relative(tree, [hit[0] for hit in results.hits]) == ["a.py", "docs/d.md", "keep.o", "notes.secret",
+                                                                 "src/b.py"]
+
+
+def test_ignore_file_search(tree: str) -> None:
+    # Subdirectory crawled on its own still follows rules of the parent directories
+    results = crawl(CrawlerSearchFs, [os.path.join(tree, "src", "gen")], pattern=r"\.py$", ignore_file=".ignore")
+    assert relative(tree, [hit[0] for hit in results.hits]) == ["src/gen/keep.py"]
+
+
+def test_excluded(tree: str) -> None:
+    crawler = CrawlerFs([tree], ignore_file=".ignore", exclude=["/proc"])
+    assert crawler.excluded(os.path.join(tree, "node_modules"), True)
+    assert crawler.excluded(os.path.join(tree, "src", "gen", "c.py"), False)
+    assert not crawler.excluded(os.path.join(tree, "src", "gen", "keep.py"), False)
+    assert crawler.excluded("/proc", True)
+    assert CrawlerFs([tree]).ignore_chain(tree) is None
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_ignore_crawl_mp(tree: str, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerFs, links=[tree], num_proc=2, backend=backend, ignore_file=".ignore",
+                      exclude=IgnoreRules(["docs/"]))
+    manager.start()
+    assert relative(tree, [hit[0] for hit in manager.results.hits]) == [
+        ".ignore", "a.py", "keep.o", "src/.ignore", "src/b.py", "src/gen/keep.py"]
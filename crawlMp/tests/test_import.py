@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Tuple
+
+import pytest
+
+import crawlMp
+
+package_dir = os.path.dirname(os.path.dirname(crawlMp.__file__))
+
+import_snippet = """
+import json, sys
+import {module}
+modules = [m for m in {modules!r} if m in sys.modules]
+import multiprocessing
+print(json.dumps({{"children": len(multiprocessing.active_children()), "modules": modules}}))
+"""
+
+# Modules which are imported lazily, the first two ones made the import about ten times slower
+LAZY_MODULES = ("pandas", "multiprocessing.managers", "asyncio")
+
+
+def run_python(*args: str) -> str:
+    env = dict(os.environ, PYTHONPATH=package_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable, *args], env=env, stdout=subprocess.PIPE, check=True,
+                          universal_newlines=True).stdout
+
+
+# Bare package doesn't import typing nor multiprocessing either
+@pytest.mark.parametrize("module, lazy_modules", [("crawlMp", LAZY_MODULES + ("typing", "multiprocessing")),
+                                                  ("crawlMp.results", LAZY_MODULES),
+                                                  ("crawlMp.crawlers.crawler_fs", LAZY_MODULES),
+                                                  ("crawlMp.crawlMp", LAZY_MODULES)])
+def test_import_modules(module: str, lazy_modules: Tuple[str, ...]) -> None:
+    stat = json.loads(run_python("-c", import_snippet.format(module=module, modules=lazy_modules)))
+    # No Manager server process and none of the lazy modules just because of the import
+    assert stat["children"] == 0
+    assert stat["modules"] == []
+
+
+def test_import_version() -> None:
+    script = os.path.join(package_dir, "crawlMp", "scripts", "search_fs_mp")
+    assert run_python(script, "--version").strip() == f"crawlMp v{crawlMp.__version__}"
+
+
+def test_import_share_manager() -> None:
+    # Old share_manager attribute spawns the Manager on first access
+    snippet = "import crawlMp, multiprocessing\n" \
+              "assert not multiprocessing.active_children()\n" \
+              "from crawlMp import share_manager\n" \
+              "assert share_manager is crawlMp.get_share_manager() is crawlMp.share_manager\n" \
+              "print(len(multiprocessing.active_children()))"
+    assert run_python("-c", snippet).strip() == "1"
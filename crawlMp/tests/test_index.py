@@ -0,0 +1,128 @@
+import os
+import pickle
+import shutil
+from pathlib import Path
+from time import time
+from typing import List
+
+import pytest
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerFs
+from crawlMp.enums import Backend
+from crawlMp.index import CrawlIndex
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Real directory tree, SQLite and process workers don't see the fake filesystem.
+    Directories were modified long ago, so their listings are not racy.
+    """
+    root = tmp_path / "tree"
+    for i in range(3):
+        for j in range(3):
+            directory = root / str(i) / str(j)
+            directory.mkdir(parents=True)
+            for k in range(4):
+                (directory / ("f%d.txt" % k)).write_text("")
+    os.symlink(str(root / "0"), str(root / "link"))
+    age(str(root))
+    return str(root)
+
+
+def age(root: str) -> None:
+    old = time() - 3600
+    for path, _, _ in os.walk(root):
+        os.utime(path, (old, old))
+
+
+def crawl(links: List[str], **kwargs) -> tuple:
+    crawler = CrawlerFs(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits), sorted(crawler.results.links_followed), sorted(crawler.results.links_skipped)
+
+
+def count_scandir(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    listed = []
+    scandir = os.scandir
+
+    def counting_scandir(path: str):
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    return listed
+
+
+def test_index_rescan(tree: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = crawl([tree])
+    index = CrawlIndex(str(tmp_path / "index.db"))
+    assert crawl([tree], index=index) == expected
+    assert len(index) == 13
+    listed = count_scandir(monkeypatch)
+    # Nothing changed, nothing is listed
+    assert crawl([tree], index=index) == expected
+    assert listed == []
+
+    # New file changes mtime of its directory only, recent change is listed until its mtime is old enough
+    (Path(tree) / "1" / "2" / "new.txt").write_text("")
+    for _ in range(2):
+        hits = crawl([tree], index=index)[0]
+        assert listed == [os.path.join(tree, "1", "2")]
+        assert (os.path.join(tree, "1", "2", "new.txt"), "new.txt") in hits
+        del listed[:]
+    old = time() - 3600
+    os.utime(os.path.join(tree, "1", "2"), (old, old))
+    crawl([tree], index=index)
+    crawl([tree], index=index)
+    assert listed == [os.path.join(tree, "1", "2")]
+
+
+def test_index_follow_symlinks(tree: str, tmp_path: Path) -> None:
+    index = CrawlIndex(str(tmp_path / "index.db"))
+    for follow_symlinks in [False, True, False, True]:
+        # Listings classified with and without following symlinks are kept apart
+        assert crawl([tree], index=index, follow_symlinks=follow_symlinks) == \
+            crawl([tree], follow_symlinks=follow_symlinks)
+
+
+def test_index_prune(tree: str, tmp_path: Path) -> None:
+    index = CrawlIndex(str(tmp_path / "index.db"))
+    crawl([tree], index=index)
+    shutil.rmtree(os.path.join(tree, "2"))
+    assert index.prune() == 4
+    assert len(index) == 9
+    index.close()
+
+
+def test_index_pickle(tmp_path: Path) -> None:
+    index = CrawlIndex(str(tmp_path / "index.db"), racy_window=5)
+    assert len(index) == 0
+    copy = pickle.loads(pickle.dumps(index))
+    assert (copy.path, copy.racy_window) == (index.path, 5)
+    assert len(copy) == 0
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_index_crawl_mp(tree: str, tmp_path: Path, backend: Backend) -> None:
+    expected = crawl([tree])
+    path = str(tmp_path / "index.db")
+    for _ in range(2):
+        manager = CrawlMp(CrawlerFs, links=[tree], num_proc=2, num_threads=2, buffer_size=1, backend=backend,
+                          index=path)
+        manager.start()
+        results = manager.results
+        assert (sorted(results.hits), sorted(results.links_followed), sorted(results.links_skipped)) == expected
+    assert len(CrawlIndex(path)) == 13
+
+
+def test_index_async(tree: str, tmp_path: Path) -> None:
+    path = str(tmp_path / "index.db")
+    expected = crawl([tree])
+    for _ in range(2):
+        manager = CrawlMp(AsyncCrawlerFs, links=[tree], num_proc=1, index=path, concurrency=4)
+        manager.start()
+        assert sorted(manager.results.hits) == expected[0]
+    assert len(CrawlIndex(path)) == 13
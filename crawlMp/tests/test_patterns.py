@@ -0,0 +1,116 @@
+import os
+import pickle
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerMultiSearchFs, CrawlerSearchFs, AsyncCrawlerMultiSearchFs
+from crawlMp.enums import Backend, Header, Mode
+from crawlMp.patterns import CONTAINS, EXACT, PREFIX, SUFFIX, PatternSet, glob_literal, regex_literal
+from crawlMp.tests.conftest import run_crawler
+
+PATTERNS = [r"\.py$", r"\.txt$", "glob:*.rst", "^README", r"test_\w+\.py$", "conf", "glob:Makefile", r"(?i)\.PNG$",
+            "glob:*.[ch]", r"\.py\Z"]
+
+
+def reference(patterns: List[str], name: str) -> Tuple[int, ...]:
+    ids = []
+    for pattern_id, pattern in enumerate(patterns):
+        if pattern.startswith("glob:"):
+            if fnmatchcase(name, pattern[len("glob:"):]):
+                ids.append(pattern_id)
+        elif re.search(pattern, name):
+            ids.append(pattern_id)
+    return tuple(ids)
+
+
+def crawl(crawler_class: type, links: List[str], **kwargs: Any) -> Dict[str, Any]:
+    crawler = run_crawler(crawler_class(list(links), **kwargs))
+    return {hit[0]: hit for hit in crawler.results.hits}
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"\.zip$", (SUFFIX, ".zip", True)),
+    (r"\.zip\Z", (SUFFIX, ".zip", False)),
+    ("^README", (PREFIX, "README", False)),
+    (r"\Acore$", (EXACT, "core", True)),
+    ("conf", (CONTAINS, "conf", False)),
+    (r"a\$b", (CONTAINS, "a$b", False)),
+    (r"\d+\.log$", None),
+    (r"\.(zip|rar)$", None),
+    ("a.b", None),
+    ("(?i)x", None),
+])
+def test_regex_literal(pattern: str, expected: Any) -> None:
+    assert regex_literal(pattern) == expected
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("*.zip", (SUFFIX, ".zip", False)),
+    ("README*", (PREFIX, "README", False)),
+    ("Makefile", (EXACT, "Makefile", False)),
+    ("*conf*", (CONTAINS, "conf", False)),
+    ("*.[ch]", None),
+    ("a?c", None),
+    ("*", None),
+])
+def test_glob_literal(pattern: str, expected: Any) -> None:
+    assert glob_literal(pattern) == expected
+
+
+@pytest.mark.parametrize("name", ["a.py", "test_a.py", "a.py\n", "README.rst", "README", "xREADME", "Makefile",
+                                  "Makefile.am", "a.conf.txt", "A.png", "a.PNG", "x.c", "x.h", "x.cc", "", "py"])
+def test_pattern_set(name: str) -> None:
+    patterns = PatternSet(PATTERNS)
+    assert patterns.match(name) == reference(PATTERNS, name)
+    assert len(patterns.searches) == 3
+
+
+def test_pattern_set_empty_literals() -> None:
+    patterns = PatternSet(["^", "$", "", "glob:*", "^$"])
+    assert patterns.match("a") == (0, 1, 2, 3)
+    assert patterns.match("") == (0, 1, 2, 3, 4)
+
+
+def test_pattern_set_pickle() -> None:
+    patterns = PatternSet(PATTERNS + [re.compile("core", re.IGNORECASE)])
+    copy = pickle.loads(pickle.dumps(patterns))
+    assert copy.patterns == patterns.patterns
+    assert copy.match("CORE.py") == patterns.match("CORE.py") == (0, 9, 10)
+    # Hits matching the same patterns share one tuple
+    assert copy.match("a.txt") is copy.match("b.txt")
+
+
+@pytest.mark.parametrize("mode", [Mode.SIMPLE, Mode.EXTENDED])
+@pytest.mark.parametrize("crawler_class", [CrawlerMultiSearchFs, AsyncCrawlerMultiSearchFs])
+def test_multi_search(fake_fs: FakeFilesystem, crawler_class: type, mode: Mode) -> None:
+    hits = crawl(crawler_class, ["/"], patterns=PATTERNS, mode=mode)
+    assert crawler_class.hits_header(mode)[-1][0] == Header.PATTERNS
+    assert len(crawler_class.hits_header(mode)) == len(CrawlerSearchFs.hits_header(mode)) + 1
+    # One pass finds the same hits as a search per pattern
+    for pattern_id, pattern in enumerate(PATTERNS):
+        if pattern.startswith("glob:"):
+            continue
+        expected = crawl(CrawlerSearchFs, ["/"], pattern=pattern, mode=mode)
+        assert expected
+        assert sorted(path for path, hit in hits.items() if pattern_id in hit[-1]) == sorted(expected)
+        for path, hit in expected.items():
+            assert hits[path][:-1] == hit
+    for path, hit in hits.items():
+        assert hit[-1] == reference(PATTERNS, os.path.basename(path))
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_multi_search_mp(tmp_path: Path, backend: Backend) -> None:
+    for name in ["a.py", "test_a.py", "README.rst", "x.c", "skip.bin"]:
+        (tmp_path / name).write_text("")
+    manager = CrawlMp(CrawlerMultiSearchFs, links=[str(tmp_path)], num_proc=2, backend=backend, columnar=True,
+                      patterns=PATTERNS)
+    manager.start()
+    assert sorted((hit[1], hit[2]) for hit in manager.results.hits) == [
+        ("README.rst", (2, 3)), ("a.py", (0, 9)), ("test_a.py", (0, 4, 9)), ("x.c", (8,))]
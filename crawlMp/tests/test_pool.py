@@ -0,0 +1,84 @@
+from threading import Event
+from time import perf_counter, sleep
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp import CrawlException
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs, AsyncCrawlerSearchFs
+from crawlMp.enums import Backend
+from crawlMp.pool import CrawlPool
+
+
+def sync_hits(links: List[str], pattern: str) -> list:
+    crawler = CrawlerSearchFs(list(links), pattern=pattern)
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits)
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_pool_reuse(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    links = ["/doc/source", "/numpy/doc"]
+    with CrawlPool(num_proc=2, buffer_size=4, backend=backend) as pool:
+        workers = list(pool.workers)
+        for pattern in ["\\.py$", "\\.rst$", "\\.svg$"]:
+            manager = CrawlMp(CrawlerSearchFs, links=links, pool=pool, pattern=pattern)
+            manager.start()
+            assert sorted(manager.results.hits) == sync_hits(links, pattern)
+            assert len(manager.results.links_followed) == 29
+        # Same workers crawled all the jobs
+        assert pool.workers == workers
+        assert all(worker.is_alive() for worker in workers)
+    assert not any(worker.is_alive() for worker in workers)
+
+
+def test_pool_small_search(fake_fs: FakeFilesystem) -> None:
+    with CrawlPool(num_proc=2) as pool:
+        CrawlMp(CrawlerFs, links=["/"], pool=pool, max_depth=0).start()
+        start = perf_counter()
+        manager = CrawlMp(CrawlerFs, links=["/"], pool=pool, max_depth=0)
+        manager.start()
+        # Workers are not spawned, small search takes milliseconds
+        assert perf_counter() - start < 0.1
+        assert len(manager.results.hits) == 38
+
+
+def test_pool_stop(fake_fs: FakeFilesystem) -> None:
+    with CrawlPool(num_proc=2) as pool:
+        done = Event()
+        manager = CrawlMp(CrawlerFs, links=["/"] * 20, pool=pool)
+        manager.start(callback=lambda m: done.set())
+        sleep(0.1)
+        manager.pause()
+        manager.stop()
+        assert done.wait(10)
+        # Links of the stopped job are dropped, next job crawls only its own links
+        manager = CrawlMp(CrawlerFs, links=["/doc/source", "/numpy/doc"], pool=pool)
+        manager.start()
+        assert len(manager.results.hits) == 387
+        assert len(manager.results.links_followed) == 29
+
+
+def test_pool_busy(fake_fs: FakeFilesystem) -> None:
+    with CrawlPool(num_proc=1) as pool:
+        done = Event()
+        manager = CrawlMp(CrawlerFs, links=["/"] * 20, pool=pool)
+        manager.start(callback=lambda m: done.set())
+        with pytest.raises(CrawlException):
+            CrawlMp(CrawlerFs, links=["/"], pool=pool).start()
+        manager.stop()
+        assert done.wait(10)
+
+
+def test_pool_async(fake_fs: FakeFilesystem) -> None:
+    links = ["/doc/source", "/numpy/doc"]
+    with CrawlPool(num_proc=2, asynchronous=True) as pool:
+        for pattern in ["\\.py$", "\\.rst$"]:
+            manager = CrawlMp(AsyncCrawlerSearchFs, links=links, pool=pool, pattern=pattern, concurrency=4)
+            manager.start()
+            assert sorted(manager.results.hits) == sync_hits(links, pattern)
+        with pytest.raises(AssertionError):
+            CrawlMp(CrawlerFs, links=links, pool=pool).start()
@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.checkpoint import Checkpoint
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerFs
+from crawlMp.enums import Backend, Format, Mode
+from crawlMp.sinks import CsvSink, NdjsonSink, NullSink, new_sink
+
+LINKS = ["/doc/source", "/numpy/doc"]
+
+
+def sync_hits(links: List[str], mode: Mode = Mode.SIMPLE) -> list:
+    crawler = CrawlerFs(list(links), mode=mode)
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits)
+
+
+def read_output(sink_path: str, output_format: Format, parts: bool = False) -> list:
+    directory, name = os.path.split(sink_path)
+    paths = sorted(os.path.join(directory, path) for path in os.listdir(directory) if path.startswith(name + "."))
+    hits = []
+    for path in paths if parts else [sink_path]:
+        with open(path, "rb") as fp:
+            data = fp.read()
+        if output_format == Format.NDJSON:
+            hits += [tuple(json.loads(line).values()) for line in data.decode().splitlines()]
+        elif output_format == Format.CSV:
+            rows = list(csv.reader(data.decode().splitlines()))
+            # Every file starts with the header
+            assert rows[0] == ["Path", "Name"]
+            hits += [tuple(row) for row in rows[1:]]
+        else:
+            assert data.endswith(b"\0")
+            hits += [(path.decode(),) for path in data.split(b"\0")[:-1]]
+    return sorted(hits)
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> List[str]:
+    """
+    Real directory tree, process workers don't share the fake filesystem with the parent.
+    """
+    for i in range(4):
+        for j in range(3):
+            directory = tmp_path / "tree" / str(i) / str(j)
+            directory.mkdir(parents=True)
+            for k in range(5):
+                (directory / ("f%d.txt" % k)).write_text("")
+    (tmp_path / "out").mkdir()
+    return [str(tmp_path / "tree" / str(i)) for i in range(4)]
+
+
+@pytest.mark.parametrize("output_format", list(Format))
+@pytest.mark.parametrize("parts", [False, True], ids=["shared", "parts"])
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_sink(tree: List[str], tmp_path: Path, output_format: Format, parts: bool, backend: Backend) -> None:
+    path = str(tmp_path / "out" / "hits")
+    sink = new_sink(output_format, path, parts)
+    # Small buffer, so chunks of different workers are written in between each other
+    sink.buffer_size = 64
+    manager = CrawlMp(CrawlerFs, links=tree, num_proc=2, buffer_size=2, backend=backend, sink=sink, num_threads=2)
+    manager.start()
+    # Hits never reached the parent
+    assert len(manager.results.hits) == 0
+    assert len(manager.results.links_followed) == 16
+    expected = sync_hits(tree)
+    if output_format == Format.NULL:
+        expected = sorted(hit[:1] for hit in expected)
+    assert len(expected) == 60
+    assert read_output(path, output_format, parts) == expected
+    if parts:
+        assert not os.path.exists(path)
+        assert len(sink.part_files()) > 1
+
+
+@pytest.mark.parametrize("parts", [False, True], ids=["shared", "parts"])
+def test_sink_new_crawl_replaces_output(tree: List[str], tmp_path: Path, parts: bool) -> None:
+    path = str(tmp_path / "out" / "hits")
+    manager = CrawlMp(CrawlerFs, links=tree, num_proc=4, sink=NdjsonSink(path, parts=parts))
+    manager.start()
+    manager.links = tree[:1]
+    manager.start()
+    assert read_output(path, Format.NDJSON, parts) == sync_hits(tree[:1])
+
+
+def test_sink_extended_async(fake_fs: FakeFilesystem) -> None:
+    fake_fs.create_dir("/out")
+    manager = CrawlMp(AsyncCrawlerFs, links=LINKS, num_proc=2, buffer_size=2, sink=NdjsonSink("/out/hits"),
+                      backend=Backend.THREAD, mode=Mode.EXTENDED, concurrency=4)
+    manager.start()
+    with open("/out/hits") as fp:
+        records = [json.loads(line) for line in fp]
+    assert list(records[0]) == ["Path", "Name", "Size", "Modified", "Accessed"]
+    assert sorted(tuple(record.values()) for record in records) == \
+        sorted(tuple(hit) for hit in sync_hits(LINKS, Mode.EXTENDED))
+
+
+def test_sink_resume(fake_fs: FakeFilesystem) -> None:
+    fake_fs.create_dir("/out")
+    crawler = CrawlerFs(["/doc/source"])
+    next(crawler)
+    checkpoint = Checkpoint("/crawl.log").open()
+    checkpoint.add_links(LINKS)
+    checkpoint.add_batch([], crawler.results.links_followed, [], list(crawler.links))
+    checkpoint.close()
+    # Hits of the first run were written to the output
+    sink = CsvSink("/out/hits")
+    sink.prepare(CrawlerFs.hits_header())
+    writer = sink.writer(0)
+    writer.write(crawler.results.hits)
+    writer.close()
+
+    manager = CrawlMp(CrawlerFs, links=[], num_proc=2, backend=Backend.THREAD, sink=sink)
+    manager.resume_from("/crawl.log")
+    assert read_output("/out/hits", Format.CSV) == sync_hits(LINKS)
+
+
+def test_sink_encoding() -> None:
+    hits = [("/a/b\udcff", "b\udcff"), ("/a/c,\"d\"\n", "c,\"d\"\n")]
+    sink = NullSink("/tmp/hits")
+    assert sink.encode(hits) == b"/a/b\xff\0/a/c,\"d\"\n\0"
+    sink = CsvSink("/tmp/hits")
+    sink.hits_header = CrawlerFs.hits_header()
+    assert list(csv.reader(sink.encode(hits).decode(errors="surrogateescape").splitlines(True))) == \
+        [list(hit) for hit in hits]
+    sink = NdjsonSink("/tmp/hits")
+    sink.hits_header = CrawlerFs.hits_header()
+    lines = sink.encode(hits).decode("ascii").splitlines()
+    assert [tuple(json.loads(line).values()) for line in lines] == hits
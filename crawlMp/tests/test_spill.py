@@ -0,0 +1,90 @@
+import os
+from typing import Any, List, Tuple
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerSearchFs
+from crawlMp.distributed import Coordinator, RemoteWorker
+from crawlMp.enums import Backend
+from crawlMp.spill import SpillStore
+
+# Spilled segments are in the system temporary directory, it must not be in the crawled tree
+LINKS = ["/doc", "/numpy"]
+
+
+class CrawlerFsPeak(CrawlerFs):
+    # Largest frontier seen by any crawler, crawlers run in threads of the test process
+    peak = [0]
+
+    def init_entrypoint(self) -> Tuple[Any, ...]:
+        self.peak[0] = max(self.peak[0], len(self.links))
+        return super().init_entrypoint()
+
+
+def sync_results(links: List[str]) -> tuple:
+    crawler = CrawlerFs(list(links))
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits), sorted(crawler.results.links_followed), sorted(crawler.results.links_skipped)
+
+
+def test_spill_store(fake_fs: FakeFilesystem) -> None:
+    spill = SpillStore("/tmp")
+    spill.push(["/a", "/b"])
+    spill.push([])
+    spill.push(["/c"])
+    assert len(spill) == 3
+    assert len(os.listdir(spill.path)) == 2
+    # Oldest segment first
+    assert spill.pop() == ["/a", "/b"]
+    assert len(spill) == 1
+    spill.push(["/d"])
+    spill.clear()
+    assert not spill
+    assert os.listdir(spill.path) == []
+    path = spill.path
+    spill.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+@pytest.mark.parametrize("max_links", [1, 4])
+def test_spill_crawl(fake_fs: FakeFilesystem, backend: Backend, max_links: int) -> None:
+    manager = CrawlMp(CrawlerFs, links=LINKS, num_proc=2, buffer_size=2, backend=backend, max_links=max_links,
+                      spill_dir="/tmp")
+    manager.start()
+    results = manager.results
+    assert (sorted(results.hits), sorted(results.links_followed), sorted(results.links_skipped)) == \
+           sync_results(LINKS)
+    # Segments of finished crawl are removed
+    assert os.listdir("/tmp") == []
+
+
+def test_spill_bounded_frontier(fake_fs: FakeFilesystem) -> None:
+    CrawlerFsPeak.peak[0] = 0
+    CrawlMp(CrawlerFsPeak, links=list(LINKS), num_proc=1, backend=Backend.THREAD).start()
+    unbounded = CrawlerFsPeak.peak[0]
+    CrawlerFsPeak.peak[0] = 0
+    CrawlMp(CrawlerFsPeak, links=list(LINKS), num_proc=1, backend=Backend.THREAD, max_links=8).start()
+    assert CrawlerFsPeak.peak[0] <= 8 < unbounded
+
+
+def test_spill_async(fake_fs: FakeFilesystem) -> None:
+    manager = CrawlMp(AsyncCrawlerSearchFs, links=LINKS, num_proc=2, buffer_size=2, max_links=4, pattern=".*",
+                      concurrency=4)
+    manager.start()
+    assert sorted(manager.results.links_followed) == sync_results(LINKS)[1]
+
+
+def test_spill_coordinator(fake_fs: FakeFilesystem) -> None:
+    coordinator = Coordinator(CrawlerFs, list(LINKS), ("127.0.0.1", 0), b"secret", batch_size=2, max_links=2)
+    coordinator.start(lambda c: None)
+    worker = RemoteWorker(CrawlerFs, coordinator.address, b"secret", buffer_size=2, heartbeat=1)
+    worker.start()
+    worker.join(30)
+    assert worker.exitcode == 0
+    results = coordinator.results
+    assert (sorted(results.hits), sorted(results.links_followed), sorted(results.links_skipped)) == \
+           sync_results(LINKS)
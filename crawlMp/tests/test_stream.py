@@ -0,0 +1,94 @@
+import asyncio
+from time import sleep
+from typing import Any, List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerFs
+from crawlMp.enums import Backend
+from crawlMp.pool import CrawlPool
+
+LINKS = ["/doc/source", "/numpy/doc"]
+
+
+def run(coroutine: Any) -> Any:
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def sync_results(links: List[str]) -> tuple:
+    crawler = CrawlerFs(list(links))
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits), sorted(crawler.results.links_followed)
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_stream(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerFs, links=LINKS, num_proc=2, buffer_size=2, backend=backend)
+    batches = list(manager.stream())
+    assert len(batches) > 1 and all(batches)
+    expected_hits, expected_followed = sync_results(LINKS)
+    assert sorted(hit for hits in batches for hit in hits) == expected_hits
+    # Streamed hits are not stored, links are
+    assert len(manager.results.hits) == 0
+    assert sorted(manager.results.links_followed) == expected_followed
+    assert not manager.running and not manager.stopped
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_stream_backpressure(fake_fs: FakeFilesystem, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerFs, links=LINKS, num_proc=2, buffer_size=1, backend=backend)
+    hits = []
+    for batch in manager.stream(max_batches=1):
+        sleep(0.01)
+        scheduler = manager.scheduler
+        # One batch in the queue, one held by the collector and at most one sent
+        assert scheduler._results_sent.value - scheduler._results_received.value <= 1
+        hits += batch
+    assert sorted(hits) == sync_results(LINKS)[0]
+
+
+def test_iter_hits_early_exit(fake_fs: FakeFilesystem) -> None:
+    pool = CrawlPool(num_proc=2, buffer_size=1).start()
+    try:
+        manager = CrawlMp(CrawlerFs, links=LINKS * 5, pool=pool)
+        for i, hit in enumerate(manager.iter_hits(max_batches=1)):
+            if i == 3:
+                break
+        # Crawl was stopped, pool is ready for the next crawl
+        assert manager.stopped and not manager.running
+        manager = CrawlMp(CrawlerFs, links=LINKS, pool=pool)
+        manager.start()
+        assert sorted(manager.results.hits) == sync_results(LINKS)[0]
+        assert pool.scheduler.max_unread == 0
+    finally:
+        pool.close()
+
+
+@pytest.mark.parametrize("crawler_class", [CrawlerFs, AsyncCrawlerFs])
+def test_aiter_hits(fake_fs: FakeFilesystem, crawler_class: type) -> None:
+    manager = CrawlMp(crawler_class, links=LINKS, num_proc=2, buffer_size=2)
+
+    async def consume() -> list:
+        return [hit async for hit in manager.aiter_hits(max_batches=2)]
+
+    assert sorted(run(consume())) == sync_results(LINKS)[0]
+
+
+def test_astream_early_exit(fake_fs: FakeFilesystem) -> None:
+    manager = CrawlMp(CrawlerFs, links=LINKS * 5, num_proc=2, buffer_size=1)
+
+    async def consume() -> int:
+        batches = manager.astream(max_batches=1)
+        batch = await batches.__anext__()
+        await batches.aclose()
+        return len(batch)
+
+    assert run(consume()) > 0
+    assert manager.stopped and not manager.running
@@ -0,0 +1,119 @@
+import os
+from typing import List
+
+import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
+
+from crawlMp import CrawlException
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, AsyncCrawlerFs
+from crawlMp.enums import Backend
+from crawlMp.pool import CrawlPool
+from crawlMp.visited import VisitedSet
+
+
+@pytest.fixture
+def loop_fs(fake_fs: FakeFilesystem) -> FakeFilesystem:
+    fake_fs.create_file("/loop/a/file.txt")
+    # Cycle
+    fake_fs.create_symlink("/loop/a/up", "/loop")
+    # Same tree under another path, like a bind mount
+    fake_fs.create_symlink("/loop/a/src", "/doc/source")
+    fake_fs.create_symlink("/loop/a/file_link.txt", "/loop/a/file.txt")
+    yield fake_fs
+
+
+def sync_crawl(links: List[str], **kwargs) -> CrawlerFs:
+    crawler = CrawlerFs(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return crawler
+
+
+def physical(paths: List[str]) -> List[tuple]:
+    return [(os.stat(path).st_dev, os.stat(path).st_ino) for path in paths]
+
+
+def assert_crawled_once(followed: List[str]) -> None:
+    dirs = physical(followed)
+    assert len(dirs) == len(set(dirs))
+    assert set(dirs) == set(physical(["/loop", "/loop/a"] + sync_crawl(["/doc/source"]).results.links_followed))
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_visited_set(threaded: bool) -> None:
+    # Shared table of 4 slots per shard keeps 3 keys per shard, the rest overflows to the local set
+    visited = VisitedSet(64, num_shards=16, threaded=threaded)
+    keys = [(dev, ino) for dev in range(3) for ino in range(1, 100)]
+    assert all(visited.add(*key) for key in keys)
+    assert not any(visited.add(*key) for key in keys)
+    assert visited.overflowed == (0 if threaded else len(keys) - sum(visited.fill))
+    visited.clear()
+    assert visited.overflowed == 0
+    assert all(visited.add(*key) for key in keys)
+
+
+def test_symlinks_not_followed(loop_fs: FakeFilesystem) -> None:
+    crawler = sync_crawl(["/loop"])
+    assert sorted(crawler.results.links_followed) == ["/loop", "/loop/a"]
+    assert sorted(crawler.results.hits) == [("/loop/a/file.txt", "file.txt")]
+
+
+def test_symlinks_followed(loop_fs: FakeFilesystem) -> None:
+    crawler = sync_crawl(["/loop", "/doc/source"], follow_symlinks=True)
+    assert_crawled_once(crawler.results.links_followed)
+    assert ("/loop/a/file_link.txt", "file_link.txt") in crawler.results.hits
+    # Other paths of crawled directories are skipped
+    assert sorted(crawler.results.links_skipped) == ["/loop/a/src", "/loop/a/up"]
+    # Whole tree is found, either under /doc/source or under /loop/a/src
+    names = sorted(name for _, name in crawler.results.hits)
+    assert names == sorted(["file.txt", "file_link.txt"] + [name for _, name in
+                                                            sync_crawl(["/doc/source"]).results.hits])
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_symlinks_crawlMp(loop_fs: FakeFilesystem, backend: Backend) -> None:
+    manager = CrawlMp(CrawlerFs, links=["/loop", "/doc/source", "/loop/a/src"], num_proc=3, buffer_size=1,
+                      backend=backend, follow_symlinks=True, visited_size=2 ** 12)
+    manager.start()
+    assert_crawled_once(manager.results.links_followed)
+    assert manager.results.visited_overflow == 0
+
+
+def test_symlinks_visited_overflow(loop_fs: FakeFilesystem) -> None:
+    # Shards of one slot keep no key, every directory overflows to the local set of its process
+    manager = CrawlMp(CrawlerFs, links=["/loop", "/doc/source"], num_proc=2, buffer_size=1, follow_symlinks=True,
+                      visited_size=64)
+    manager.start()
+    assert manager.results.visited_overflow >= len(set(physical(manager.results.links_followed)))
+
+
+def test_symlinks_pool(loop_fs: FakeFilesystem) -> None:
+    with CrawlPool(num_proc=2, buffer_size=1, visited_size=2 ** 12) as pool:
+        for _ in range(2):
+            # Visited set is cleared for every job
+            manager = CrawlMp(CrawlerFs, links=["/loop"], pool=pool, follow_symlinks=True)
+            manager.start()
+            assert_crawled_once(manager.results.links_followed)
+
+
+def test_symlinks_pool_without_visited(loop_fs: FakeFilesystem) -> None:
+    with CrawlPool(num_proc=2, buffer_size=1, backend=Backend.THREAD) as pool:
+        # Thread workers get the shared visited set on demand
+        manager = CrawlMp(CrawlerFs, links=["/loop"], pool=pool, follow_symlinks=True)
+        manager.start()
+        assert_crawled_once(manager.results.links_followed)
+    with CrawlPool(num_proc=2, buffer_size=1) as pool:
+        with pytest.raises(CrawlException):
+            CrawlMp(CrawlerFs, links=["/loop"], pool=pool, follow_symlinks=True).start()
+        # Pool is not taken by the refused job
+        manager = CrawlMp(CrawlerFs, links=["/loop"], pool=pool)
+        manager.start()
+        assert manager.results.hits
+
+
+def test_symlinks_async(loop_fs: FakeFilesystem) -> None:
+    manager = CrawlMp(AsyncCrawlerFs, links=["/loop", "/doc/source"], num_proc=2, buffer_size=1,
+                      follow_symlinks=True, visited_size=2 ** 12, concurrency=4)
+    manager.start()
+    assert_crawled_once(manager.results.links_followed)
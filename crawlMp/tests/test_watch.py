@@ -0,0 +1,203 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+from threading import Lock
+from time import sleep, time
+from typing import Any, Callable, List
+
+import pytest
+
+from crawlMp import CrawlException
+from crawlMp.crawlMp import CrawlMp
+from crawlMp.crawlers.crawler_fs import CrawlerFs, CrawlerSearchFs, AsyncCrawlerFs
+from crawlMp.enums import Backend, Mode
+from crawlMp.watch import WatchTable, Watcher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> str:
+    """
+    Real directory tree, inotify doesn't see the fake filesystem.
+    """
+    root = tmp_path / "tree"
+    for i in range(3):
+        for j in range(2):
+            directory = root / str(i) / str(j)
+            directory.mkdir(parents=True)
+            for k in range(3):
+                (directory / ("f%d.txt" % k)).write_text("")
+    return str(root)
+
+
+def crawl(links: List[str], crawler_class: type = CrawlerFs, **kwargs: Any) -> List[Any]:
+    crawler = crawler_class(list(links), **kwargs)
+    for _ in crawler:
+        pass
+    return sorted(crawler.results.hits)
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 10) -> None:
+    end = time() + timeout
+    while not predicate():
+        assert time() < end, "timeout"
+        sleep(0.02)
+
+
+class Changes:
+    """
+    Collects changes reported by the watcher.
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.added: List[Any] = []
+        self.removed: List[str] = []
+
+    def __call__(self, added: List[Any], removed: List[str]) -> None:
+        with self.lock:
+            self.added += added
+            self.removed += removed
+
+
+@pytest.mark.parametrize("backend", [Backend.PROCESS, Backend.THREAD])
+def test_watch(tree: str, backend: Backend) -> None:
+    changes = Changes()
+    manager = CrawlMp(CrawlerFs, links=[tree], keepalive=True, num_proc=2, buffer_size=1, backend=backend)
+    watcher = manager.watch(changes, interval=0.05)
+    try:
+        # Initial crawl is in the results and it's not reported
+        assert sorted(manager.results.hits) == crawl([tree])
+        assert watcher.watched == 10
+        assert changes.added == changes.removed == []
+
+        new_file = os.path.join(tree, "0", "1", "new.txt")
+        Path(new_file).write_text("data")
+        wait_until(lambda: (new_file, "new.txt") in changes.added)
+        os.remove(os.path.join(tree, "0", "0", "f0.txt"))
+        wait_until(lambda: os.path.join(tree, "0", "0", "f0.txt") in changes.removed)
+
+        # New directory is crawled by the workers and watched
+        new_dir = Path(tree) / "3" / "0"
+        new_dir.mkdir(parents=True)
+        (new_dir / "a.txt").write_text("")
+        wait_until(lambda: (str(new_dir / "a.txt"), "a.txt") in changes.added)
+        (new_dir / "b.txt").write_text("")
+        wait_until(lambda: (str(new_dir / "b.txt"), "b.txt") in changes.added)
+        wait_until(lambda: watcher.watched == 12)
+
+        # Moved directory is removed from its old path and crawled again at the new one
+        os.rename(os.path.join(tree, "1"), os.path.join(tree, "4"))
+        wait_until(lambda: os.path.join(tree, "4", "1", "f2.txt") in [hit[0] for hit in changes.added])
+        assert os.path.join(tree, "1", "1", "f2.txt") in changes.removed
+        shutil.rmtree(os.path.join(tree, "2"))
+        wait_until(lambda: os.path.join(tree, "2", "0", "f1.txt") in changes.removed)
+        wait_until(lambda: sorted(manager.results.hits) == crawl([tree]))
+        wait_until(lambda: watcher.watched == 9)
+    finally:
+        watcher.stop()
+    assert not manager.running
+
+
+def test_watch_search_extended(tree: str) -> None:
+    changes = Changes()
+    manager = CrawlMp(CrawlerSearchFs, links=[tree], keepalive=True, num_proc=2, backend=Backend.THREAD,
+                      pattern=r"\.txt$", mode=Mode.EXTENDED)
+    watcher = manager.watch(changes, interval=0.05)
+    try:
+        path = os.path.join(tree, "0", "0", "f1.txt")
+        Path(path).write_text("12345")
+        Path(os.path.join(tree, "0", "0", "skipped.log")).write_text("")
+        wait_until(lambda: len(changes.added) == 1)
+        # Changed file is reported with its new size, not as removed
+        assert changes.added[0][:3] == (path, "f1.txt", 5)
+        assert changes.removed == []
+        sleep(0.2)
+        assert len(changes.added) == 1
+        assert sorted(manager.results.hits) == crawl([tree], CrawlerSearchFs, pattern=r"\.txt$", mode=Mode.EXTENDED)
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_watch_positions(tree: str, columnar: bool) -> None:
+    manager = CrawlMp(CrawlerFs, links=[tree], keepalive=True, num_proc=1, backend=Backend.THREAD,
+                      columnar=columnar)
+    watcher = manager.watch(interval=0.05)
+    try:
+        hits = manager.results.hits
+        for i in range(3):
+            os.remove(os.path.join(tree, "0", "0", "f%d.txt" % i))
+        Path(os.path.join(tree, "1", "0", "f0.txt")).write_text("changed")
+        shutil.rmtree(os.path.join(tree, "2", "1"))
+        wait_until(lambda: sorted(manager.results.hits) == crawl([tree]))
+        # Hits are changed in place, every hit is indexed by its path
+        assert manager.results.hits is hits
+        assert sorted(path for paths in watcher.positions.values() for path in paths) == \
+               [hit[0] for hit in crawl([tree])]
+        for path, index in watcher.positions[os.path.join(tree, "1", "0")].items():
+            assert (hits.row(index) if columnar else hits[index])[0] == path
+        # Removed directory tree is unlinked from its parent
+        assert os.path.join(tree, "2", "1") not in watcher.tree
+        assert watcher.tree[os.path.join(tree, "2")] == {os.path.join(tree, "2", "0")}
+        if columnar:
+            # Deleted rows are compacted, once they are more than half of all rows
+            assert hits.deleted >= 7 and hits.rows == len(hits) + hits.deleted
+            shutil.rmtree(os.path.join(tree, "1"))
+            wait_until(lambda: sorted(manager.results.hits) == crawl([tree]))
+            assert hits.deleted == 0 and hits.rows == len(hits) == 6
+    finally:
+        watcher.stop()
+
+
+def test_watch_async(tree: str) -> None:
+    manager = CrawlMp(AsyncCrawlerFs, links=[tree], keepalive=True, num_proc=1, concurrency=4)
+    watcher = manager.watch(interval=0.05)
+    try:
+        (Path(tree) / "0" / "2").mkdir()
+        (Path(tree) / "0" / "2" / "x.txt").write_text("")
+        wait_until(lambda: sorted(manager.results.hits) == crawl([tree]))
+    finally:
+        watcher.stop()
+
+
+def test_watch_max_depth(tree: str) -> None:
+    manager = CrawlMp(CrawlerFs, links=[tree], keepalive=True, num_proc=1, backend=Backend.THREAD,
+                      max_depth=tree.count(os.sep) + 1)
+    watcher = manager.watch(interval=0.05)
+    try:
+        assert watcher.watched == 4
+        (Path(tree) / "0" / "5").mkdir()
+        (Path(tree) / "5").mkdir()
+        wait_until(lambda: watcher.watched == 5)
+        sleep(0.2)
+        # Directory deeper than max_depth is neither crawled nor watched
+        assert os.path.join(tree, "0", "5") not in manager.results.links_followed
+        assert watcher.watched == 5
+    finally:
+        watcher.stop()
+
+
+def test_watch_errors(tree: str) -> None:
+    with pytest.raises(CrawlException):
+        Watcher(CrawlMp(CrawlerFs, links=[tree]))
+
+
+def test_watch_table() -> None:
+    table = WatchTable()
+    assert table.add(1, "/a")
+    assert table.add(4, "/a/b")
+    assert table.add(5, "/a/bc")
+    assert not table.add(4, "/a/b")
+    assert len(table) == 3
+    assert [table.get(wd) for wd in range(6)] == [None, "/a", None, None, "/a/b", "/a/bc"]
+    assert table.subtree("/a/b") == [4]
+    assert table.subtree("/a") == [1, 4, 5]
+    table.remove(4)
+    table.remove(4)
+    assert len(table) == 2 and table.get(4) is None
+    # Descriptor reused after wrap-around
+    assert table.add(4, "/x")
+    assert table.get(4) == "/x" and table.subtree("/x") == [4]
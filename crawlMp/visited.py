@@ -0,0 +1,116 @@
+import ctypes
+import threading
+from multiprocessing import Lock
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import List, Set, Tuple
+
+
+class VisitedSet:
+    """
+    Set of visited resources, identified by (st_dev, st_ino), shared by all workers of the crawl.
+    Set is split into shards and the shard owning the key is chosen by its hash. Every shard has its own lock,
+    so concurrent checks of different keys almost never wait for each other.
+    Process workers share fixed-size open addressing tables in shared memory, which must be allocated
+    before workers are forked (see Scheduler). Thread workers use plain sets.
+    Key is stored as (st_dev + 1, st_ino), zero device marks an empty slot.
+    If a shard of the shared table is filled over 3/4, new keys of the shard are kept in a set local
+    to the process, so crawl still never loops, but directory could be crawled by more processes.
+    Such keys are counted in overflowed, CrawlMp reports them in Results.visited_overflow.
+    """
+
+    def __init__(self, size: int = 2 ** 20, num_shards: int = 64, threaded: bool = False) -> None:
+        """
+        :param int size: number of keys the shared table can hold, unused if threaded
+        :param int num_shards: number of shards
+        :param bool threaded: all workers are threads of the calling process
+        """
+        assert num_shards >= 1
+        assert size >= num_shards
+        self.num_shards = num_shards
+        self.threaded = threaded
+        if threaded:
+            self.locks = [threading.Lock() for _ in range(num_shards)]
+            self.sets: List[Set[Tuple[int, int]]] = [set() for _ in range(num_shards)]
+        else:
+            self.locks = [Lock() for _ in range(num_shards)]
+            self.shard_size = size // num_shards
+            self.max_fill = self.shard_size * 3 // 4
+            self.table = RawArray(ctypes.c_uint64, 2 * self.shard_size * num_shards)
+            self.fill = RawArray(ctypes.c_int64, num_shards)
+            # Overflow sets of all processes are dropped, when generation changes
+            self.generation = RawValue(ctypes.c_int64, 0)
+            self.overflow_generation = 0
+            self.overflow: Set[Tuple[int, int]] = set()
+            # Keys added to overflow sets, counted per shard under its lock
+            self.overflows = RawArray(ctypes.c_int64, num_shards)
+
+    @property
+    def overflowed(self) -> int:
+        """
+        Number of keys kept outside the shared table since the last clear, raise size if it's not 0.
+        """
+        return 0 if self.threaded else sum(self.overflows)
+
+    def add(self, dev: int, ino: int) -> bool:
+        """
+        Add key to the set.
+        :param int dev: st_dev of the resource
+        :param int ino: st_ino of the resource
+        :return bool: True if key was added, False if it was already visited
+        """
+        key_hash = hash((dev, ino)) & 0xFFFFFFFFFFFFFFFF
+        shard = key_hash % self.num_shards
+        with self.locks[shard]:
+            if self.threaded:
+                shard_set = self.sets[shard]
+                if (dev, ino) in shard_set:
+                    return False
+                shard_set.add((dev, ino))
+                return True
+            return self._add_shared(shard, key_hash // self.num_shards, dev + 1, ino)
+
+    def _add_shared(self, shard: int, key_hash: int, dev: int, ino: int) -> bool:
+        """
+        Add key to the shard of the shared table, shard lock must be held.
+        :param int shard: shard
+        :param int key_hash: hash of the key within the shard
+        :param int dev: st_dev + 1
+        :param int ino: st_ino
+        :return bool: True if key was added
+        """
+        table, base = self.table, 2 * shard * self.shard_size
+        slot = key_hash % self.shard_size
+        # Linear probing, table is never full, so an empty slot is always found
+        while True:
+            index = base + 2 * slot
+            if table[index] == 0:
+                break
+            if table[index] == dev and table[index + 1] == ino:
+                return False
+            slot = (slot + 1) % self.shard_size
+        if self.fill[shard] >= self.max_fill:
+            if self.overflow_generation != self.generation.value:
+                self.overflow.clear()
+                self.overflow_generation = self.generation.value
+            if (dev, ino) in self.overflow:
+                return False
+            self.overflow.add((dev, ino))
+            self.overflows[shard] += 1
+            return True
+        table[index], table[index + 1] = dev, ino
+        self.fill[shard] += 1
+        return True
+
+    def clear(self) -> None:
+        """
+        Remove all keys, none of the workers may use the set.
+        :return: None
+        """
+        if self.threaded:
+            for shard_set in self.sets:
+                shard_set.clear()
+        else:
+            ctypes.memset(self.table, 0, ctypes.sizeof(self.table))
+            ctypes.memset(self.fill, 0, ctypes.sizeof(self.fill))
+            ctypes.memset(self.overflows, 0, ctypes.sizeof(self.overflows))
+            self.generation.value += 1
@@ -0,0 +1,590 @@
+import ctypes
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+from bisect import bisect_right
+from time import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from crawlMp import CrawlException
+from crawlMp.columns import ENCODING, ERRORS, ColumnarHits, StringColumn
+from crawlMp.constants import inf_int
+from crawlMp.crawlers.crawler_fs import AsyncCrawlerFs, CrawlerFs, collect_hits
+
+if TYPE_CHECKING:
+    from crawlMp.crawlMp import CrawlMp
+
+# inotify(7) event flags
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | \
+             IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK
+# struct inotify_event without the name: wd, mask, cookie, len
+EVENT = struct.Struct("iIII")
+
+# Pending file, which must be checked when changes are applied
+CHECK = object()
+
+Event = Tuple[int, int, str]
+Hit = Tuple[Any, ...]
+
+
+class Inotify:
+    """
+    Minimal inotify binding, libc is called by ctypes. Linux only.
+    """
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise CrawlException("Watching needs inotify, which is available on Linux only.")
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.poll = select.poll()
+        self.poll.register(self.fd, select.POLLIN)
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Watch directory, watching the same directory again returns its watch descriptor.
+        :param str path: directory path
+        :param int mask: watched events
+        :return int: watch descriptor
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        """
+        Stop watching, watch already removed by the kernel (deleted directory) is ignored.
+        :param int wd: watch descriptor
+        :return: None
+        """
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Event]:
+        """
+        Wait for events and read them.
+        :param float timeout: maximum time to wait in seconds
+        :return list: [(watch descriptor, mask, name)], name is empty for events of the directory itself
+        """
+        if not self.poll.poll(timeout * 1000):
+            return []
+        data = os.read(self.fd, 2 ** 16)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            events.append((wd, mask, os.fsdecode(data[offset:offset + length].rstrip(b"\0"))))
+            offset += length
+        return events
+
+    def close(self) -> None:
+        """
+        Close inotify instance, all its watches are removed.
+        :return: None
+        """
+        os.close(self.fd)
+
+
+class WatchTable:
+    """
+    Paths of watched directories by their watch descriptor.
+    Kernel hands out watch descriptors as increasing small integers, so paths are stored in one buffer
+    indexed by the descriptor, that's about len(path) + 9 bytes per watched directory.
+    Descriptors of removed watches are not reused, their slots stay in the buffer.
+    """
+
+    def __init__(self) -> None:
+        self.paths = StringColumn()
+        self.alive = bytearray()
+        # Paths of descriptors reused after the kernel counter wrapped around
+        self.other: Dict[int, str] = {}
+        self.count = 0
+
+    def add(self, wd: int, path: str) -> bool:
+        """
+        Add watched directory.
+        :param int wd: watch descriptor
+        :param str path: directory path
+        :return bool: False if descriptor is already watched
+        """
+        if wd < len(self.alive):
+            if self.alive[wd]:
+                return False
+            self.other[wd] = path
+        else:
+            while len(self.paths) < wd:
+                self.paths.append("")
+                self.alive.append(0)
+            self.paths.append(path)
+            self.alive.append(0)
+        self.alive[wd] = 1
+        self.count += 1
+        return True
+
+    def get(self, wd: int) -> Optional[str]:
+        """
+        Get path of the watched directory.
+        :param int wd: watch descriptor
+        :return str: path or None if the descriptor is not watched
+        """
+        if not 0 <= wd < len(self.alive) or not self.alive[wd]:
+            return None
+        if wd in self.other:
+            return self.other[wd]
+        return self.paths[wd]
+
+    def remove(self, wd: int) -> None:
+        """
+        Remove watched directory, removed descriptors are ignored.
+        :param int wd: watch descriptor
+        :return: None
+        """
+        if self.get(wd) is not None:
+            self.alive[wd] = 0
+            self.other.pop(wd, None)
+            self.count -= 1
+
+    def subtree(self, path: str) -> List[int]:
+        """
+        Get watched directories in the directory tree.
+        Paths are searched in the buffer as bytes, rows are not decoded.
+        :param str path: directory path
+        :return list: watch descriptors
+        """
+        found = set()
+        data, offsets, alive = self.paths.data, self.paths.offsets, self.alive
+        for pattern, exact in [(path.encode(ENCODING, ERRORS), True),
+                               (path.rstrip(os.sep).encode(ENCODING, ERRORS) + os.sep.encode(), False)]:
+            position = data.find(pattern)
+            while position >= 0:
+                wd = bisect_right(offsets, position) - 1
+                if offsets[wd] == position and (not exact or offsets[wd + 1] == position + len(pattern)):
+                    if alive[wd] and wd not in self.other:
+                        found.add(wd)
+                # Pattern found inside a row, look for it from the next row
+                position = data.find(pattern, offsets[wd + 1])
+        found.update(wd for wd, other in self.other.items() if other == path or other.startswith(path + os.sep))
+        return sorted(found)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class Watcher:
+    """
+    Keeps results of a keepalive manager current, without crawling everything again.
+    Crawled directories are watched by inotify. New directories are crawled by the workers (append_links),
+    changed, new and removed files are checked by the watcher itself. Changes are applied to the results
+    every interval seconds and reported to on_change(added hits, removed paths).
+    Events of the same file within an interval are merged, only the final state is checked.
+    Initial crawl is not reported. Directory is watched once its results reach the watcher, so changes made
+    between listing a directory and watching it are missed, during the initial crawl and for new directories.
+    If the kernel event queue overflows, events are lost and all links are crawled again.
+    Hits are found by their path in positions (parent directory -> {path: index in results.hits}), directories
+    with hits are linked to their parents in tree, so applying changes (removed subtree too) takes time of
+    the changes, not of all hits. Every path has one hit. Removed hit of a list is replaced by the last hit,
+    ColumnarHits rows are deleted and compacted once more than half of the rows are deleted.
+    Memory of the watcher is about 100 bytes per hit (positions, plus the path string of ColumnarHits),
+    len(path) + 9 bytes per watched directory and about 200 bytes per directory with hits (tree).
+    Kernel needs about 1 KiB per watch and limits their number (fs.inotify.max_user_watches),
+    directories over the limit are not watched and counted in missed.
+    With follow_symlinks, directory moved within the crawl is not crawled again, it's in the visited set already.
+    """
+
+    def __init__(self, manager: 'CrawlMp', on_change: Optional[Callable[[List[Hit], List[str]], None]] = None,
+                 interval: float = 0.5) -> None:
+        """
+        :param CrawlMp manager: keepalive manager of a filesystem crawler, not started yet
+        :param callable on_change: called with list of added (or changed) hits and list of removed paths
+        :param float interval: seconds between applying changes to the results
+        """
+        if not issubclass(manager.crawler_class, (CrawlerFs, AsyncCrawlerFs)):
+            raise CrawlException("Only filesystem crawlers can be watched.")
+        if not manager.keepalive:
+            raise CrawlException("Watched manager must be keepalive.")
+        if manager.sink is not None:
+            raise CrawlException("Hits written to the sink can't be watched.")
+        assert interval > 0
+        self.manager = manager
+        self.on_change = on_change
+        self.interval = interval
+        # Crawler checking changed files, same arguments as the crawlers of the workers
+        self.crawler = manager.crawler_class([], *manager.args, **dict(manager.kwargs, actions=manager.actions))
+        self.follow_symlinks = bool(manager.kwargs.get("follow_symlinks"))
+        self.mask = WATCH_MASK if self.follow_symlinks else WATCH_MASK | IN_DONT_FOLLOW
+        self.table = WatchTable()
+        self.missed = 0
+        self.running = False
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        # Changes not applied yet: path -> CHECK or None (removed), hits crawled by workers, removed trees
+        self.pending: Dict[str, Any] = {}
+        self.collected: List[Hit] = []
+        self.prefixes: Set[str] = set()
+        self.followed = 0
+        # Index of every hit in results.hits: parent directory -> {path: index}
+        self.positions: Dict[str, Dict[str, int]] = {}
+        # Directories of positions and their ancestors: directory -> its child directories
+        self.tree: Dict[str, Set[str]] = {}
+        self.inotify: Optional[Inotify] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def watched(self) -> int:
+        """
+        Number of watched directories.
+        """
+        return len(self.table)
+
+    def start(self) -> 'Watcher':
+        """
+        Start crawl and watching, block until the initial crawl is done and its hits are in the results.
+        :return Watcher: self
+        """
+        self.running = True
+        self.manager._run(self._finished, True, self._collect)
+        # Workers are already spawned, so they don't inherit the inotify descriptor
+        self.inotify = Inotify()
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop watching and the manager.
+        :return: None
+        """
+        self.running = False
+        if self.manager.running:
+            self.manager.stop()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait until watching is stopped.
+        :param float timeout: maximum time to wait in seconds
+        :return: None
+        """
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _finished(self, manager: 'CrawlMp') -> None:
+        """
+        Manager was stopped, stop watching too.
+        :param CrawlMp manager: manager
+        :return: None
+        """
+        self.running = False
+
+    def _collect(self, hits: List[Hit]) -> None:
+        """
+        Keep hits crawled by the workers until changes are applied, called by the collector thread.
+        :param list hits: hits
+        :return: None
+        """
+        with self.lock:
+            self.collected += hits
+
+    def _watch(self) -> None:
+        """
+        Watching loop, reads events, watches new crawled directories and applies changes.
+        :return: None
+        """
+        try:
+            applied = time()
+            while self.running:
+                for wd, mask, name in self.inotify.read(min(self.interval, 0.1)):
+                    self._handle(wd, mask, name)
+                if not self.ready.is_set():
+                    # Batch is done after all its results were collected
+                    done = self.manager.sig_batch_done.is_set()
+                    self._register()
+                    if done:
+                        self._apply(report=False)
+                        applied = time()
+                        self.ready.set()
+                    continue
+                self._register()
+                if time() - applied >= self.interval:
+                    self._apply()
+                    applied = time()
+        finally:
+            self.running = False
+            self.ready.set()
+            self.inotify.close()
+
+    def _register(self) -> None:
+        """
+        Watch directories followed by the workers since the last call.
+        :return: None
+        """
+        followed = self.manager.results.links_followed
+        new = followed[self.followed:]
+        self.followed += len(new)
+        for path in new:
+            self._watch_dir(path)
+
+    def _watch_dir(self, path: str) -> None:
+        """
+        Watch directory.
+        :param str path: directory path
+        :return: None
+        """
+        try:
+            wd = self.inotify.add_watch(path, self.mask)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.missed += 1
+            # Otherwise directory is already gone, its removal was reported by the parent
+            return
+        self.table.add(wd, path)
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        """
+        Turn event to pending change.
+        :param int wd: watch descriptor
+        :param int mask: event mask
+        :param str name: name of the entry in the watched directory
+        :return: None
+        """
+        if mask & IN_Q_OVERFLOW:
+            self._resync()
+            return
+        if mask & IN_IGNORED:
+            self.table.remove(wd)
+            return
+        parent = self.table.get(wd)
+        if parent is None:
+            # Event queued before the watch was removed
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._remove_tree(parent)
+            return
+        path = os.path.join(parent, name)
+        removed = mask & (IN_DELETE | IN_MOVED_FROM)
+        if mask & IN_ISDIR or (self.follow_symlinks and not removed and os.path.isdir(path)):
+            if removed:
+                self._remove_tree(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(parent, path)
+            return
+        if removed and self.follow_symlinks:
+            # Symlink could lead to a crawled directory
+            self._remove_tree(path)
+        with self.lock:
+            self.pending[path] = None if removed else CHECK
+
+    def _add_tree(self, parent: str, path: str) -> None:
+        """
+        Watch new directory and let the workers crawl it.
+        :param str parent: watched parent directory
+        :param str path: new directory
+        :return: None
+        """
+        # Same depth limit as CrawlerFs.is_link
+        if parent.count(os.sep) >= getattr(self.crawler, "max_depth", inf_int):
+            return
+        # Excluded directories are pruned by the crawler
+        if self.crawler.excluded(path, True):
+            return
+        self._watch_dir(path)
+        try:
+            self.manager.append_links([path])
+        except CrawlException:
+            # Manager is already stopped
+            pass
+
+    def _remove_tree(self, path: str) -> None:
+        """
+        Stop watching the directory tree and remove its hits.
+        :param str path: directory path
+        :return: None
+        """
+        for wd in self.table.subtree(path):
+            self.inotify.rm_watch(wd)
+            self.table.remove(wd)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self.lock:
+            self.prefixes.add(prefix)
+            self.pending = {p: change for p, change in self.pending.items() if not p.startswith(prefix)}
+            self.collected = [hit for hit in self.collected if not hit[0].startswith(prefix)]
+
+    def _resync(self) -> None:
+        """
+        Events were lost, crawl all links again.
+        :return: None
+        """
+        links = list(self.manager.links)
+        for path in links:
+            self._remove_tree(path)
+        # Root directories are watched again before they are crawled
+        for path in links:
+            self._watch_dir(path)
+        try:
+            self.manager.append_links(links)
+        except CrawlException:
+            pass
+
+    def _check(self, path: str) -> Optional[Hit]:
+        """
+        Check changed file the same way as the crawler does.
+        :param str path: file path
+        :return tuple: hit or None if file is not a hit (anymore)
+        """
+        try:
+            if not stat.S_ISREG(os.stat(path, follow_symlinks=self.follow_symlinks).st_mode):
+                return None
+        except OSError:
+            return None
+        hits = collect_hits(self.crawler, [(os.path.basename(path), path, None)],
+                            self.crawler.ignore_chain(os.path.dirname(path)))
+        return hits[0] if hits else None
+
+    def _apply(self, report: bool = True) -> None:
+        """
+        Apply pending changes to the results and report them.
+        Removed and changed hits are found in positions, new crawled hits are just added.
+        :param bool report: call on_change
+        :return: None
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            collected, self.collected = self.collected, []
+            prefixes, self.prefixes = self.prefixes, set()
+        if not (pending or collected or prefixes):
+            return
+        removed: Dict[str, Hit] = {}
+        for prefix in prefixes:
+            for parent in self._remove_dirs(prefix.rstrip(os.sep) or os.sep):
+                for path in list(self.positions.get(parent, ())):
+                    removed[path] = self._remove(path)
+        for path in pending:
+            if path in self.positions.get(os.path.dirname(path), ()):
+                removed[path] = self._remove(path)
+        # Change seen by the watcher is newer than the crawled hit
+        added = [hit for hit in collected if hit[0] not in pending]
+        for path, change in pending.items():
+            hit = self._check(path) if change is CHECK else None
+            if hit is not None:
+                added.append(hit)
+        for hit in added:
+            self._add(hit)
+        hits = self.manager.results.hits
+        if isinstance(hits, ColumnarHits) and hits.deleted * 2 > hits.rows:
+            hits.compact()
+            self._index()
+        if report and self.on_change is not None:
+            paths = {hit[0] for hit in added}
+            changed = [hit for hit in added if removed.get(hit[0]) != hit]
+            gone = [path for path in removed if path not in paths]
+            if changed or gone:
+                self.on_change(changed, gone)
+
+    def _add(self, hit: Hit) -> None:
+        """
+        Add hit to the results, hit of the same path is replaced.
+        :param tuple hit: hit
+        :return: None
+        """
+        path = hit[0]
+        parent = os.path.dirname(path)
+        if parent not in self.positions:
+            self._add_dir(parent)
+        siblings = self.positions.setdefault(parent, {})
+        if path in siblings:
+            self._remove(path)
+        hits = self.manager.results.hits
+        siblings[path] = hits.rows if isinstance(hits, ColumnarHits) else len(hits)
+        hits.append(hit)
+
+    def _remove(self, path: str) -> Hit:
+        """
+        Remove hit of the path from the results.
+        :param str path: path of the hit
+        :return tuple: removed hit
+        """
+        parent = os.path.dirname(path)
+        siblings = self.positions[parent]
+        index = siblings.pop(path)
+        if not siblings:
+            del self.positions[parent]
+        hits = self.manager.results.hits
+        if isinstance(hits, ColumnarHits):
+            hit = hits.row(index)
+            hits.delete(index)
+            return hit
+        hit, last = hits[index], hits.pop()
+        if index < len(hits):
+            hits[index] = last
+            self.positions[os.path.dirname(last[0])][last[0]] = index
+        return hit
+
+    def _add_dir(self, directory: str) -> None:
+        """
+        Add directory and its ancestors to the tree.
+        :param str directory: directory path
+        :return: None
+        """
+        tree, child = self.tree, None
+        while directory not in tree:
+            tree[directory] = set() if child is None else {child}
+            child, directory = directory, os.path.dirname(directory)
+            if directory == child:
+                return
+        if child is not None:
+            tree[directory].add(child)
+
+    def _remove_dirs(self, path: str) -> List[str]:
+        """
+        Remove directory tree from the tree.
+        :param str path: root of the directory tree
+        :return list: removed directories
+        """
+        tree = self.tree
+        if path not in tree:
+            return []
+        parent = os.path.dirname(path)
+        if parent != path and parent in tree:
+            tree[parent].discard(path)
+        directories, stack = [], [path]
+        while stack:
+            directory = stack.pop()
+            stack.extend(tree.pop(directory))
+            directories.append(directory)
+        return directories
+
+    def _index(self) -> None:
+        """
+        Index all hits of the results again.
+        :return: None
+        """
+        self.positions = {}
+        for index, hit in enumerate(self.manager.results.hits):
+            self.positions.setdefault(os.path.dirname(hit[0]), {})[hit[0]] = index